@@ -0,0 +1,262 @@
+import itertools
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import codegen
+
+# Build-matrix mode for main_script.py (--matrix SPEC.json). A spec lists project names and optimization
+# toggle values; every combination becomes a job that renders its own JulesBuildAutomation.cs and runs
+# scripts/create_unity_project.py in an isolated workspace (<matrix root>/<job id>/). Jobs are scheduled
+# concurrently, but only as long as they fit the host budget:
+# - Unity instances: each running Unity process takes a licence seat. A job runs its steps serially, so it
+#   needs one seat, or one per platform with --parallel-platform-builds.
+# - CPU and RAM: every job reserves the spec's job_resources (per seat) out of the host budget, which
+#   defaults to the CPU count and the currently available memory.
+# A job that does not fit yet waits; a later, smaller job may start in its place. A job that could never
+# fit fails immediately. At the end a consolidated report is printed and written to matrix_report.json.
+#
+# Example spec:
+# {
+#   "project_names": ["RubeGoldbergVR"],
+#   "axes": {"skip_texture_optimization": [false, true], "disable_batching": [false, true]},
+#   "fixed": {"skip_light_baking_setup": true},
+#   "exclude": [{"skip_texture_optimization": true, "disable_batching": true}],
+#   "include": [{"project_name": "RubeGoldbergVRLite", "skip_audio_optimization": true}],
+#   "create_unity_project_args": ["--run-alpha-build"],
+#   "limits": {"max_unity_instances": 2, "cpu_budget": 8, "memory_budget_gb": 16},
+#   "job_resources": {"cpus": 2, "memory_gb": 4}
+# }
+
+REPORT_FILE_NAME = "matrix_report.json"
+JOB_LOG_FILE_NAME = "create_unity_project.log"
+DEFAULT_JOB_RESOURCES = {"cpus": 2, "memory_gb": 4}
+DEFAULT_PLATFORM_COUNT = 2
+# Short labels for job ids, keyed by main_script.py toggle.
+TOGGLE_LABELS = {
+    "skip_texture_optimization": "no_tex",
+    "skip_mesh_optimization": "no_mesh",
+    "skip_audio_optimization": "no_audio",
+    "disable_batching": "no_batching",
+    "skip_light_baking_setup": "no_lightbake",
+    "skip_physics_culling_setup": "no_physcull",
+    "skip_build_settings_optimization": "no_buildopt",
+}
+
+
+def host_memory_gb():
+    # Memory available for new processes, not total RAM: other work on the host counts against the budget.
+    try:
+        with open("/proc/meminfo", "r") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) / (1024 * 1024)
+    except OSError:
+        pass
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_AVPHYS_PAGES") / (1024 ** 3)
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+def load_spec(spec_path):
+    with open(spec_path, "r") as f:
+        spec = json.load(f)
+    for section in ("axes", "fixed"):
+        for toggle in spec.get(section, {}):
+            if toggle not in TOGGLE_LABELS:
+                raise ValueError(f"Unknown toggle '{toggle}' in matrix spec '{section}'. Known toggles: {', '.join(TOGGLE_LABELS)}")
+    for entry in spec.get("include", []) + spec.get("exclude", []):
+        for key in entry:
+            if key != "project_name" and key not in TOGGLE_LABELS:
+                raise ValueError(f"Unknown key '{key}' in matrix spec include/exclude entry.")
+    return spec
+
+
+def _job_seats(job_args):
+    if "--parallel-platform-builds" not in job_args:
+        return 1
+    if "--build-platforms" in job_args:
+        return len(job_args[job_args.index("--build-platforms") + 1].split(","))
+    return DEFAULT_PLATFORM_COUNT
+
+
+def expand_jobs(spec, base_toggles, default_project_name, base_args):
+    # base_toggles/base_args come from main_script.py's own command line; the spec's fixed values and axes
+    # override them. Returns the job list in spec order, without duplicates.
+    project_names = spec.get("project_names") or [default_project_name]
+    axes = spec.get("axes", {})
+    job_args = list(base_args) + list(spec.get("create_unity_project_args", []))
+    resources = dict(DEFAULT_JOB_RESOURCES, **spec.get("job_resources", {}))
+
+    combinations = []
+    for project_name in project_names:
+        for values in itertools.product(*axes.values()):
+            combination = dict(base_toggles, **spec.get("fixed", {}), **dict(zip(axes, values)))
+            combination["project_name"] = project_name
+            combinations.append(combination)
+    combinations = [combination for combination in combinations
+                    if not any(all(combination.get(key) == value for key, value in entry.items()) for entry in spec.get("exclude", []))]
+    for entry in spec.get("include", []):
+        combination = dict(base_toggles, **spec.get("fixed", {}), project_name=default_project_name)
+        combination.update(entry)
+        combinations.append(combination)
+
+    jobs = []
+    seen = set()
+    for combination in combinations:
+        key = tuple(sorted(combination.items()))
+        if key in seen:
+            continue
+        seen.add(key)
+        toggles = {toggle: bool(combination.get(toggle, False)) for toggle in TOGGLE_LABELS}
+        labels = [TOGGLE_LABELS[toggle] for toggle, enabled in toggles.items() if enabled]
+        seats = _job_seats(job_args)
+        jobs.append({
+            "id": "-".join([f"{len(jobs) + 1:02d}", combination["project_name"]] + labels),
+            "project_name": combination["project_name"],
+            "toggles": toggles,
+            "args": job_args,
+            "seats": seats,
+            "cpus": resources["cpus"] * seats,
+            "memory_gb": resources["memory_gb"] * seats,
+        })
+    return jobs
+
+
+class ResourceBudget:
+    # Licence seats, CPUs and memory shared by all running jobs.
+    def __init__(self, max_unity_instances, cpu_budget, memory_budget_gb):
+        self.capacity = {"seats": max_unity_instances, "cpus": cpu_budget, "memory_gb": memory_budget_gb}
+        self.in_use = {"seats": 0, "cpus": 0, "memory_gb": 0}
+        self.condition = threading.Condition()
+
+    def _needs(self, job):
+        return {"seats": job["seats"], "cpus": job["cpus"], "memory_gb": job["memory_gb"]}
+
+    def can_ever_fit(self, job):
+        return all(self.capacity[name] is None or amount <= self.capacity[name] for name, amount in self._needs(job).items())
+
+    def fits_now(self, job):
+        return all(self.capacity[name] is None or self.in_use[name] + amount <= self.capacity[name]
+                   for name, amount in self._needs(job).items())
+
+    def acquire(self, job):
+        for name, amount in self._needs(job).items():
+            self.in_use[name] += amount
+
+    def release(self, job):
+        with self.condition:
+            for name, amount in self._needs(job).items():
+                self.in_use[name] -= amount
+            self.condition.notify_all()
+
+
+def _job_outputs(project_path):
+    builds_dir = os.path.join(project_path, "Builds", "AlphaTest")
+    outputs = []
+    if os.path.isdir(builds_dir):
+        for platform in sorted(os.listdir(builds_dir)):
+            platform_dir = os.path.join(builds_dir, platform)
+            if os.path.isdir(platform_dir):
+                outputs.extend(os.path.join(platform_dir, name) for name in sorted(os.listdir(platform_dir)))
+    return outputs
+
+
+def run_job(job, matrix_root, script_path, unity_editor_path, render_automation_script):
+    # Runs one job in <matrix_root>/<job id>/. Fills in the job's result fields.
+    workspace = os.path.join(matrix_root, job["id"])
+    os.makedirs(workspace, exist_ok=True)
+    cs_path = os.path.join(workspace, "JulesBuildAutomation.cs")
+    # Unchanged toggles leave the script untouched, so a rerun keeps create_unity_project.py's step cache warm.
+    codegen.write_if_changed(cs_path, render_automation_script(job["project_name"], job["toggles"]))
+    command = [sys.executable, script_path, "--project-name", job["project_name"], "--unity-editor-path", unity_editor_path,
+               "--cs-script-source", cs_path] + job["args"]
+    job["workspace"] = workspace
+    job["log"] = os.path.join(workspace, JOB_LOG_FILE_NAME)
+    start = time.monotonic()
+    try:
+        with open(job["log"], "w") as log_file:
+            completed = subprocess.run(command, cwd=workspace, stdout=log_file, stderr=subprocess.STDOUT)
+        job["returncode"] = completed.returncode
+        job["status"] = "SUCCEEDED" if completed.returncode == 0 else "FAILED"
+    except OSError as e:
+        job["returncode"] = None
+        job["status"] = "FAILED"
+        job["error"] = str(e)
+    job["duration"] = time.monotonic() - start
+    job["outputs"] = _job_outputs(os.path.join(workspace, job["project_name"]))
+
+
+def run_matrix(jobs, matrix_root, script_path, unity_editor_path, render_automation_script, budget):
+    # Starts jobs in order whenever the budget allows, until all have finished. Returns the jobs with results.
+    matrix_root = os.path.abspath(matrix_root)
+    pending = []
+    for job in jobs:
+        job.update({"status": "PENDING", "returncode": None, "error": None, "queued": 0.0, "duration": 0.0, "outputs": []})
+        if budget.can_ever_fit(job):
+            pending.append(job)
+        else:
+            job["status"] = "FAILED"
+            job["error"] = f"needs {job['seats']} seat(s), {job['cpus']} CPUs, {job['memory_gb']} GB; exceeds the matrix budget"
+    start = time.monotonic()
+    threads = []
+
+    def worker(job):
+        try:
+            run_job(job, matrix_root, script_path, unity_editor_path, render_automation_script)
+        finally:
+            budget.release(job)
+            print(f"MAIN_SCRIPT.PY: Matrix job {job['id']} {job['status']} after {job['duration']:.1f}s")
+
+    with budget.condition:
+        while pending:
+            job = next((candidate for candidate in pending if budget.fits_now(candidate)), None)
+            if job is None:
+                budget.condition.wait()
+                continue
+            pending.remove(job)
+            budget.acquire(job)
+            job["status"] = "RUNNING"
+            job["queued"] = time.monotonic() - start
+            print(f"MAIN_SCRIPT.PY: Starting matrix job {job['id']} (seats in use: {budget.in_use['seats']})")
+            thread = threading.Thread(target=worker, args=(job,), name=f"matrix-{job['id']}")
+            thread.start()
+            threads.append(thread)
+    for thread in threads:
+        thread.join()
+    return jobs, time.monotonic() - start
+
+
+def write_report(jobs, wall_time, budget, matrix_root):
+    report = {
+        "wall_time": wall_time,
+        "serial_time": sum(job["duration"] for job in jobs),
+        "budget": budget.capacity,
+        "succeeded": sum(1 for job in jobs if job["status"] == "SUCCEEDED"),
+        "failed": sum(1 for job in jobs if job["status"] != "SUCCEEDED"),
+        "jobs": jobs,
+    }
+    os.makedirs(matrix_root, exist_ok=True)
+    report_path = os.path.join(matrix_root, REPORT_FILE_NAME)
+    with open(report_path, "w") as f:
+        json.dump(report, f, indent=2)
+    return report, report_path
+
+
+def print_report(report, report_path):
+    print("Build matrix results:")
+    print(f"  {'job':<48} {'status':<10} {'queued':>7} {'run':>7} {'seats':>5}  outputs")
+    for job in report["jobs"]:
+        print(f"  {job['id']:<48} {job['status']:<10} {job['queued']:>6.1f}s {job['duration']:>6.1f}s {job['seats']:>5}  {len(job['outputs'])}")
+        if job.get("error"):
+            print(f"    error: {job['error']}")
+        elif job["status"] != "SUCCEEDED" and job.get("log"):
+            print(f"    log: {job['log']}")
+    budget = ", ".join(f"{name}={'unlimited' if value is None else round(value, 1)}" for name, value in report["budget"].items())
+    print(f"  {report['succeeded']} succeeded, {report['failed']} failed in {report['wall_time']:.1f}s "
+          f"(serial sum {report['serial_time']:.1f}s; budget {budget})")
+    print(f"  Report written to {report_path}")
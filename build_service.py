@@ -0,0 +1,506 @@
+import argparse
+import ast
+import atexit
+import hashlib
+import http.client
+import http.server
+import json
+import os
+import re
+import signal
+import socket
+import socketserver
+import subprocess
+import sys
+import threading
+import time
+
+import codegen
+import main_script
+
+# Long-running build service: pipeline jobs are submitted over localhost HTTP (or a Unix socket) with the
+# same flags main_script.py takes, instead of every request paying for interpreter startup, code generation
+# and a cold project. The service renders the automation scripts in-process and keeps a pool of warm workers:
+# - every worker is a resident Python process that owns a workspace (<root>/worker-N/) and has already
+#   imported everything create_unity_project.py imports; it forks once per job and runs the cached,
+#   compiled script in the child (a plain subprocess per job where there is no fork);
+# - the projects in a worker's workspace persist between jobs, so a job that finds its project already
+#   created and set up with the same automation script only pays for the steps that actually changed (the
+#   step cache skips the rest, and Library/ is already imported).
+# Jobs are queued FIFO and each one is routed to the idle worker whose project state fits it best: the same
+# project with the same rendered JulesBuildAutomation.cs, else the same project, else a worker without it.
+# A job's build version is read from <root>/build_version.txt when it is dispatched, not when it is queued,
+# and --alpha-build jobs, which bump that file when they finish, run one at a time: the next one starts after
+# the previous one has synced its new version, so no two builds share a version. Other jobs can overtake a
+# waiting --alpha-build job.
+#
+# Endpoints (JSON):
+#   POST /jobs          {"args": ["--project-name", "RubeGoldbergVR", "--alpha-build", ...]} -> the job
+#   GET  /jobs/<id>     the job: state, worker, match, queue/run seconds, return code, log path
+#   GET  /jobs/<id>/log the job's create_unity_project.py output (text)
+#   GET  /status        queue depth, per-job latency percentiles and per-worker utilization
+#
+# Usage:
+#   python build_service.py serve --workers 2 --unity-editor-path ./dummy_unity.sh
+#   python build_service.py submit --wait -- --alpha-build --skip-audio-optimization
+#   python build_service.py status
+
+DEFAULT_PORT = 8765
+DEFAULT_ROOT = "build_service"
+DEFAULT_WORKERS = 2
+JOB_LOG_FILE_NAME = "create_unity_project.log"
+MAX_FINISHED_JOBS = 1000
+SCRIPT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "scripts", "create_unity_project.py")
+# main_script.py flags that make no sense for a single service job.
+SERVICE_ONLY_FLAGS = ("matrix", "matrix_root", "max_unity_instances", "cpu_budget", "memory_budget_gb", "unity_editor_path")
+MATCH_SCORES = {"exact": 2, "project": 1, "cold": 0}
+BUILD_VERSION_PATTERN = re.compile(r'public static string buildVersion = "[^"]*";')
+
+
+def _percentiles(values):
+    if not values:
+        return {"count": 0, "p50": None, "p95": None, "max": None}
+    values = sorted(values)
+    pick = lambda fraction: round(values[min(len(values) - 1, int(fraction * len(values)))], 3)
+    return {"count": len(values), "p50": pick(0.5), "p95": pick(0.95), "max": round(values[-1], 3)}
+
+
+def _script_hash(script):
+    # Without the buildVersion line, which changes with every --alpha-build job, so "exact" matches the step cache.
+    return hashlib.sha256(BUILD_VERSION_PATTERN.sub("", script).encode("utf-8")).hexdigest()[:16]
+
+
+def _read_build_version(path):
+    try:
+        with open(path, "r") as f:
+            return f.read().strip() or "0.1.0"
+    except OSError:
+        return "0.1.0"
+
+
+# --- Worker process ---
+
+def _script_imports(script_path):
+    # Top-level modules the orchestrator script imports; importing them up front is what makes a worker warm.
+    with open(script_path, "r") as f:
+        tree = ast.parse(f.read(), script_path)
+    names = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            names.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            names.append(node.module)
+    return names
+
+
+def run_worker(script_path):
+    # Reads one JSON request per line on stdin ({"argv", "cwd", "log"}) and answers {"returncode"} on stdout.
+    sys.path.insert(0, os.path.dirname(script_path))
+    for name in _script_imports(script_path):
+        __import__(name)
+    compiled = {"mtime": None, "code": None}
+    replies = sys.stdout
+    sys.stdout = sys.stderr  # Nothing but replies goes to the service.
+    for line in sys.stdin:
+        request = json.loads(line)
+        mtime = os.path.getmtime(script_path)
+        if compiled["mtime"] != mtime:
+            with open(script_path, "r") as f:
+                compiled.update(mtime=mtime, code=compile(f.read(), script_path, "exec"))
+        if hasattr(os, "fork"):
+            returncode = _fork_job(compiled["code"], script_path, request)
+        else:
+            with open(request["log"], "w") as log_file:
+                returncode = subprocess.run([sys.executable, script_path] + request["argv"], cwd=request["cwd"],
+                                            stdout=log_file, stderr=subprocess.STDOUT).returncode
+        replies.write(json.dumps({"returncode": returncode}) + "\n")
+        replies.flush()
+
+
+def _fork_job(code, script_path, request):
+    pid = os.fork()
+    if pid:
+        _, status = os.waitpid(pid, 0)
+        return os.waitstatus_to_exitcode(status)
+    returncode = 1
+    try:
+        os.chdir(request["cwd"])
+        log_fd = os.open(request["log"], os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        os.dup2(log_fd, 1)
+        os.dup2(log_fd, 2)
+        os.close(log_fd)
+        sys.stdout = open(1, "w", buffering=1, closefd=False)
+        sys.stderr = sys.stdout
+        sys.argv = [script_path] + request["argv"]
+        try:
+            exec(code, {"__name__": "__main__", "__file__": script_path, "__builtins__": __builtins__})
+            returncode = 0
+        except SystemExit as e:
+            returncode = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+        atexit._run_exitfuncs()
+    except BaseException:
+        import traceback
+        traceback.print_exc()
+    finally:
+        sys.stdout.flush()
+        os._exit(returncode)
+
+
+class Worker:
+    def __init__(self, worker_id, workspace):
+        self.id = worker_id
+        self.workspace = workspace
+        self.process = None
+        self.job = None
+        self.projects = {}  # project name -> hash of the automation script it was last set up with
+        self.jobs_run = 0
+        self.busy_seconds = 0.0
+        self.lock = threading.Lock()
+
+    def start(self):
+        os.makedirs(self.workspace, exist_ok=True)
+        self.process = subprocess.Popen([sys.executable, os.path.abspath(__file__), "worker"], stdin=subprocess.PIPE,
+                                        stdout=subprocess.PIPE, text=True, bufsize=1)
+
+    def run(self, argv, log_path):
+        # Returns the job's exit code; a worker that died is restarted for the next job.
+        with self.lock:
+            if self.process is None or self.process.poll() is not None:
+                self.start()
+            try:
+                self.process.stdin.write(json.dumps({"argv": argv, "cwd": self.workspace, "log": log_path}) + "\n")
+                self.process.stdin.flush()
+                reply = self.process.stdout.readline()
+            except OSError:
+                reply = ""
+            if not reply:
+                self.process = None
+                return None
+            return json.loads(reply)["returncode"]
+
+    def stop(self):
+        if self.process is not None and self.process.poll() is None:
+            self.process.stdin.close()
+            self.process.wait()
+
+    def match(self, job):
+        if job["project_name"] not in self.projects:
+            return "cold"
+        return "exact" if self.projects[job["project_name"]] == job["script_hash"] else "project"
+
+    def describe(self, uptime):
+        return {"id": self.id, "busy": self.job is not None, "job": self.job, "projects": sorted(self.projects), "jobs_run": self.jobs_run,
+                "busy_seconds": round(self.busy_seconds, 3), "utilization": round(self.busy_seconds / uptime, 3) if uptime else 0.0}
+
+
+# --- Service ---
+
+class BuildService:
+    def __init__(self, root, workers, unity_editor_path):
+        self.root = os.path.abspath(root)
+        self.unity_editor_path = unity_editor_path
+        self.workers = [Worker(f"worker-{index + 1}", os.path.join(self.root, f"worker-{index + 1}")) for index in range(workers)]
+        self.jobs = {}
+        self.queue = []
+        self.version_path = os.path.join(self.root, "build_version.txt")
+        self.version_job = None  # The running job that bumps build_version.txt, if any.
+        self.next_id = 1
+        self.started = time.monotonic()
+        self.lock = threading.Lock()
+        self.parser = main_script.build_parser()
+        self.parser.exit_on_error = False
+
+    def start(self):
+        # Code generation happens once here rather than per job; unchanged output leaves the file alone.
+        if codegen.write_if_changed(SCRIPT_PATH, codegen.render_template("create_unity_project.py.template", {})):
+            print(f"BUILD_SERVICE: Wrote {SCRIPT_PATH}")
+        for worker in self.workers:
+            worker.start()
+        print(f"BUILD_SERVICE: {len(self.workers)} warm worker(s) in {self.root}")
+
+    def stop(self):
+        for worker in self.workers:
+            worker.stop()
+
+    def _parse_job_args(self, job_args):
+        try:
+            args, unknown = self.parser.parse_known_args(job_args)
+        except argparse.ArgumentError as e:
+            raise ValueError(f"invalid job flags: {e}")
+        if unknown:
+            raise ValueError(f"unknown job flags: {' '.join(unknown)}")
+        used = [flag for flag in SERVICE_ONLY_FLAGS if getattr(args, flag) != self.parser.get_default(flag)]
+        if used:
+            raise ValueError("not available per job: " + ", ".join("--" + flag.replace("_", "-") for flag in used))
+        if args.parallel_platform_builds and args.pipeline_mode:
+            raise ValueError("--parallel-platform-builds and --pipeline-mode cannot be combined.")
+        return args
+
+    def _render_script(self, args, build_version):
+        return codegen.render_template("JulesBuildAutomation.cs.template", main_script.automation_template_values(args.project_name, build_version, vars(args)))
+
+    def submit(self, job_args):
+        args = self._parse_job_args(job_args)
+        # Routing only needs the script without its version, which is assigned at dispatch.
+        script_hash = _script_hash(self._render_script(args, ""))
+        with self.lock:
+            job = {"id": f"job-{self.next_id:04d}", "args": list(job_args), "project_name": args.project_name, "state": "queued",
+                   "worker": None, "match": None, "returncode": None, "submitted": time.time(), "queue_seconds": None, "run_seconds": None,
+                   "log": None, "script_hash": script_hash, "build_version": None, "bumps_version": args.alpha_build}
+            self.next_id += 1
+            self.jobs[job["id"]] = job
+            self.queue.append((job, args))
+            self._dispatch()
+            return dict(job)
+
+    def _dispatch(self):
+        # Called with the lock held whenever a job arrives or a worker frees up.
+        for entry in list(self.queue):
+            job = entry[0]
+            idle = [worker for worker in self.workers if worker.job is None]
+            if not idle:
+                return
+            if job["bumps_version"] and self.version_job is not None:
+                continue  # Waits for the running --alpha-build job to sync the version it builds from.
+            worker = max(idle, key=lambda candidate: (MATCH_SCORES[candidate.match(job)], -len(candidate.projects)))
+            self.queue.remove(entry)
+            job.update({"state": "running", "worker": worker.id, "match": worker.match(job), "queue_seconds": round(time.time() - job["submitted"], 3),
+                        "build_version": _read_build_version(self.version_path)})
+            if job["bumps_version"]:
+                self.version_job = job["id"]
+            worker.job = job["id"]
+            threading.Thread(target=self._run_job, args=(worker,) + entry, name=f"job-{job['id']}", daemon=True).start()
+
+    def _run_job(self, worker, job, args):
+        start = time.monotonic()
+        cs_path = os.path.join(worker.workspace, f"{args.project_name}.JulesBuildAutomation.cs")
+        # Unchanged toggles and version leave the script untouched, so the worker's step cache stays warm.
+        codegen.write_if_changed(cs_path, self._render_script(args, job["build_version"]))
+        command_args = main_script.create_unity_project_args(args)
+        if "--sync-version-file" in command_args:
+            # Versions carry over between jobs like between main_script.py runs.
+            command_args[command_args.index("--sync-version-file") + 1] = self.version_path
+        argv = ["--project-name", args.project_name, "--unity-editor-path", self.unity_editor_path, "--cs-script-source", cs_path] + command_args
+        log_dir = os.path.join(self.root, "jobs", job["id"])
+        os.makedirs(log_dir, exist_ok=True)
+        job["log"] = os.path.join(log_dir, JOB_LOG_FILE_NAME)
+        print(f"BUILD_SERVICE: {job['id']} on {worker.id} ({job['match']}): {' '.join(job['args']) or '(defaults)'}")
+        returncode = worker.run(argv, job["log"])
+        duration = time.monotonic() - start
+        with self.lock:
+            job.update({"state": "succeeded" if returncode == 0 else "failed", "returncode": returncode, "run_seconds": round(duration, 3),
+                        "finished": time.time()})
+            if returncode is None:
+                job["error"] = "worker process died"
+            if returncode == 0:
+                worker.projects[args.project_name] = job["script_hash"]
+            else:
+                worker.projects.pop(args.project_name, None)  # Unknown state; don't route on it.
+            worker.job = None
+            if self.version_job == job["id"]:
+                self.version_job = None
+            worker.jobs_run += 1
+            worker.busy_seconds += duration
+            self._forget_old_jobs()
+            self._dispatch()
+        print(f"BUILD_SERVICE: {job['id']} {job['state']} after {duration:.1f}s")
+
+    def _forget_old_jobs(self):
+        finished = [job for job in self.jobs.values() if job["state"] in ("succeeded", "failed")]
+        for job in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self.jobs[job["id"]]
+
+    def get_job(self, job_id):
+        with self.lock:
+            job = self.jobs.get(job_id)
+            return dict(job) if job else None
+
+    def status(self):
+        with self.lock:
+            uptime = time.monotonic() - self.started
+            finished = [job for job in self.jobs.values() if job["state"] in ("succeeded", "failed")]
+            states = {}
+            for job in self.jobs.values():
+                states[job["state"]] = states.get(job["state"], 0) + 1
+            return {
+                "uptime_seconds": round(uptime, 3),
+                "queue_depth": len(self.queue),
+                "jobs": states,
+                "latency": {"queue_seconds": _percentiles([job["queue_seconds"] for job in finished]),
+                            "run_seconds": _percentiles([job["run_seconds"] for job in finished]),
+                            "total_seconds": _percentiles([job["finished"] - job["submitted"] for job in finished])},
+                "matches": {match: sum(1 for job in finished if job["match"] == match) for match in MATCH_SCORES},
+                "workers": [worker.describe(uptime) for worker in self.workers],
+            }
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    service = None
+
+    def _send(self, code, body, content_type="application/json"):
+        data = (json.dumps(body, indent=2) + "\n" if content_type == "application/json" else body).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        parts = [part for part in self.path.split("?")[0].split("/") if part]
+        if parts == ["status"]:
+            return self._send(200, self.service.status())
+        if len(parts) in (2, 3) and parts[0] == "jobs":
+            job = self.service.get_job(parts[1])
+            if job is None:
+                return self._send(404, {"error": f"no job {parts[1]}"})
+            if len(parts) == 2:
+                return self._send(200, job)
+            if parts[2] == "log":
+                try:
+                    with open(job["log"] or "", "r", errors="replace") as f:
+                        return self._send(200, f.read(), "text/plain")
+                except OSError:
+                    return self._send(404, {"error": f"{job['id']} has no log yet"})
+        self._send(404, {"error": f"unknown path {self.path}"})
+
+    def do_POST(self):
+        if self.path.rstrip("/") != "/jobs":
+            return self._send(404, {"error": f"unknown path {self.path}"})
+        try:
+            request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            job = self.service.submit([str(arg) for arg in request.get("args", [])])
+        except ValueError as e:
+            return self._send(400, {"error": str(e)})
+        self._send(202, job)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def get_request(self):
+        request, _ = super().get_request()
+        return request, ("unix", 0)  # BaseHTTPRequestHandler expects a (host, port) client address.
+
+
+def _stop_serving(signum, frame):
+    raise KeyboardInterrupt  # serve_forever() runs on this thread; unwinding it is the clean way out.
+
+
+def serve(service, port=DEFAULT_PORT, socket_path=None):
+    _Handler.service = service
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        server = _UnixHTTPServer(socket_path, _Handler)
+        where = socket_path
+    else:
+        server = http.server.ThreadingHTTPServer(("127.0.0.1", port), _Handler)
+        where = f"http://127.0.0.1:{server.server_address[1]}"
+    service.start()
+    signal.signal(signal.SIGTERM, _stop_serving)
+    print(f"BUILD_SERVICE: Listening on {where}")
+    sys.stdout.flush()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.stop()
+        print("BUILD_SERVICE: Stopped.")
+        if socket_path and os.path.exists(socket_path):
+            os.remove(socket_path)
+
+
+# --- Client ---
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, socket_path):
+        super().__init__("localhost")
+        self.socket_path = socket_path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(self.socket_path)
+
+
+def request(method, path, body=None, port=DEFAULT_PORT, socket_path=None):
+    # Returns (status code, decoded JSON or text).
+    connection = _UnixHTTPConnection(socket_path) if socket_path else http.client.HTTPConnection("127.0.0.1", port)
+    try:
+        connection.request(method, path, body=json.dumps(body) if body is not None else None, headers={"Content-Type": "application/json"})
+        response = connection.getresponse()
+        data = response.read().decode("utf-8")
+        return response.status, json.loads(data) if response.getheader("Content-Type") == "application/json" else data
+    finally:
+        connection.close()
+
+
+def print_status(status):
+    print(f"Build service: up {status['uptime_seconds']:.0f}s, queue depth {status['queue_depth']}, jobs "
+          + (", ".join(f"{count} {state}" for state, count in sorted(status["jobs"].items())) or "none"))
+    for name, stats in status["latency"].items():
+        if stats["count"]:
+            print(f"  {name:<14} p50 {stats['p50']:.2f}s  p95 {stats['p95']:.2f}s  max {stats['max']:.2f}s  ({stats['count']} job(s))")
+    print("  routing: " + ", ".join(f"{count} {match}" for match, count in status["matches"].items()))
+    for worker in status["workers"]:
+        state = f"running {worker['job']}" if worker["busy"] else "idle"
+        print(f"  {worker['id']:<10} {state:<18} {worker['jobs_run']} job(s), {worker['utilization'] * 100:.0f}% busy, projects: {', '.join(worker['projects']) or '-'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Long-running build service with a pool of warm project workers.")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="Localhost HTTP port.")
+    parser.add_argument("--socket", type=str, default=None, help="Serve on / talk to this Unix socket instead of localhost HTTP.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve_parser = commands.add_parser("serve", help="Run the service.")
+    serve_parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Warm workers, i.e. jobs that can run at once.")
+    serve_parser.add_argument("--root", type=str, default=DEFAULT_ROOT, help="Directory for the worker workspaces and job logs.")
+    serve_parser.add_argument("--unity-editor-path", type=str, default="Unity", help="Unity Editor executable the workers run.")
+    submit_parser = commands.add_parser("submit", help="Queue a job; flags after -- are main_script.py flags.")
+    submit_parser.add_argument("--wait", action="store_true", help="Wait for the job to finish and exit with its status.")
+    submit_parser.add_argument("job_args", nargs=argparse.REMAINDER)
+    job_parser = commands.add_parser("job", help="Show a job.")
+    job_parser.add_argument("job_id")
+    job_parser.add_argument("--log", action="store_true", help="Print the job's output instead.")
+    commands.add_parser("status", help="Show queue depth, latency and worker utilization.")
+    commands.add_parser("worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.command == "worker":
+        return run_worker(SCRIPT_PATH)
+    if args.command == "serve":
+        if args.workers < 1:
+            parser.error("--workers must be at least 1.")
+        return serve(BuildService(args.root, args.workers, args.unity_editor_path), port=args.port, socket_path=args.socket)
+    try:
+        if args.command == "status":
+            _, status = request("GET", "/status", port=args.port, socket_path=args.socket)
+            return print_status(status)
+        if args.command == "job":
+            code, body = request("GET", f"/jobs/{args.job_id}" + ("/log" if args.log else ""), port=args.port, socket_path=args.socket)
+            print(body if isinstance(body, str) else json.dumps(body, indent=2))
+            sys.exit(0 if code == 200 else 1)
+        job_args = args.job_args[1:] if args.job_args[:1] == ["--"] else args.job_args
+        code, job = request("POST", "/jobs", {"args": job_args}, port=args.port, socket_path=args.socket)
+        if code != 202:
+            print(f"Job rejected: {job['error']}")
+            sys.exit(1)
+        print(f"Queued {job['id']}.")
+        while args.wait and job["state"] in ("queued", "running"):
+            time.sleep(0.2)
+            _, job = request("GET", f"/jobs/{job['id']}", port=args.port, socket_path=args.socket)
+        if args.wait:
+            print(f"{job['id']} {job['state']} on {job['worker']} ({job['match']}) after {job['queue_seconds']:.1f}s queued, "
+                  f"{job['run_seconds']:.1f}s running; log: {job['log']}")
+            sys.exit(0 if job["state"] == "succeeded" else 1)
+    except OSError as e:
+        print(f"Cannot reach the build service: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+import os
+import re
+
+# Code generation helpers for main_script.py. The generated files live as real source under templates/,
+# with @@name@@ placeholders for the few values that vary between runs (project name, build version,
+# optimization flags). Outputs are only rewritten when their content actually changes: bumping the mtime
+# of an Editor script makes Unity recompile and domain-reload on its next launch.
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates")
+PLACEHOLDER_PATTERN = re.compile(r"@@(\w+)@@")
+
+
+def render_template(template_name, values):
+    # Substitutes every @@name@@ in the template. A placeholder without a value is an error rather than
+    # being left in the output, where it would only surface as a Unity compile error much later.
+    with open(os.path.join(TEMPLATE_DIR, template_name), "r", newline="") as f:
+        template = f.read()
+    missing = set()
+
+    def substitute(match):
+        name = match.group(1)
+        if name not in values:
+            missing.add(name)
+            return match.group(0)
+        return str(values[name])
+
+    rendered = PLACEHOLDER_PATTERN.sub(substitute, template)
+    if missing:
+        raise KeyError(f"Template {template_name} has no value for: {', '.join(sorted(missing))}")
+    return rendered
+
+
+def write_if_changed(path, content):
+    # Returns True if the file was (re)written, False if it already had exactly this content.
+    try:
+        with open(path, "r", newline="") as f:
+            if f.read() == content:
+                return False
+    except (FileNotFoundError, UnicodeDecodeError):
+        pass
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temp_path = path + ".tmp"
+    with open(temp_path, "w", newline="") as f:
+        f.write(content)
+    os.replace(temp_path, path)
+    return True
@@ -1,11 +1,39 @@
 #!/bin/bash
 
+# Latency and behaviour knobs, used by scripts/benchmark_orchestrator.py:
+#   DUMMY_UNITY_STARTUP_SECONDS      editor startup time before any method runs (default 1)
+#   DUMMY_UNITY_METHOD_SECONDS       runtime of every -executeMethod / pipeline step (default 0)
+#   DUMMY_UNITY_METHOD_SECONDS_<M>   runtime override for one method, e.g. DUMMY_UNITY_METHOD_SECONDS_PerformAlphaTestBuild
+#   DUMMY_UNITY_LOG_LINES            filler lines written to the -logFile per method (default 0)
+#   DUMMY_UNITY_STDOUT_LINES         filler lines written to stdout per method (default 0)
+#   DUMMY_UNITY_FAILURE_RATE         probability (0-1) that a method fails (default 0)
+#   DUMMY_UNITY_SEED                 seed for the failure dice, for reproducible runs
+#   DUMMY_UNITY_LIBRARY_IMPORT_SECONDS extra SetupVRProject time when Library/ has no imported assets yet (default 0)
+#   DUMMY_UNITY_SMOKE_TEST_SECONDS   runtime of each smoke test case (default 0)
+#   DUMMY_UNITY_FAIL_SMOKE_TESTS     comma-separated smoke tests to fail, as Name or Platform/Name
+#   DUMMY_UNITY_BUILD_SIZE_<P>       reported player size in bytes for platform P, e.g. DUMMY_UNITY_BUILD_SIZE_Android
+#   DUMMY_UNITY_HANG_METHOD          method that hangs without any output, e.g. SetupVRProject (as on a modal dialog)
+#   DUMMY_UNITY_HANG_TIMES           how many launches of that method hang before one goes through (default 1, 0 = every launch)
+#   DUMMY_UNITY_BUILD_DATA_FILES     identical 1 MiB data files written next to each fake player (default 0)
+# Run with -julesSmokeTests but without -executeMethod, this script also stands in for a built player
+# running its smoke tests (create_unity_project.py --smoke-player ./dummy_unity.sh).
+DUMMY_UNITY_STARTUP_SECONDS="${DUMMY_UNITY_STARTUP_SECONDS:-1}"
+DUMMY_UNITY_METHOD_SECONDS="${DUMMY_UNITY_METHOD_SECONDS:-0}"
+DUMMY_UNITY_LOG_LINES="${DUMMY_UNITY_LOG_LINES:-0}"
+DUMMY_UNITY_STDOUT_LINES="${DUMMY_UNITY_STDOUT_LINES:-0}"
+DUMMY_UNITY_FAILURE_RATE="${DUMMY_UNITY_FAILURE_RATE:-0}"
+DUMMY_UNITY_SMOKE_TEST_SECONDS="${DUMMY_UNITY_SMOKE_TEST_SECONDS:-0}"
+DUMMY_UNITY_LIBRARY_IMPORT_SECONDS="${DUMMY_UNITY_LIBRARY_IMPORT_SECONDS:-0}"
+DUMMY_UNITY_BUILD_DATA_FILES="${DUMMY_UNITY_BUILD_DATA_FILES:-0}"
+
 echo "Dummy Unity Editor invoked with arguments: $@"
+START_SECONDS=$SECONDS
 
 # Log file path is usually the last argument or after -logFile
 LOG_FILE_ARG_INDEX=-1
 PROJECT_PATH_ARG_INDEX=-1
 EXECUTE_METHOD_ARG_INDEX=-1
+CHANGED_ASSETS_ARG_INDEX=-1
 
 for i in $(seq 1 $#); do
     if [ "${!i}" == "-logFile" ]; then
@@ -17,6 +45,18 @@ for i in $(seq 1 $#); do
     if [ "${!i}" == "-executeMethod" ]; then
         EXECUTE_METHOD_ARG_INDEX=$((i + 1))
     fi
+    if [ "${!i}" == "-julesChangedAssets" ]; then
+        CHANGED_ASSETS_ARG_INDEX=$((i + 1))
+    fi
+    if [[ "${!i}" == -julesSmoke* ]]; then
+        NEXT=$((i + 1))
+        case "${!i}" in
+            -julesSmokeTests) SMOKE_TESTS="${!NEXT}" ;;
+            -julesSmokePlatform) SMOKE_PLATFORM="${!NEXT}" ;;
+            -julesSmokeBuildDir) SMOKE_BUILD_DIR="${!NEXT}" ;;
+            -julesSmokeResults) SMOKE_RESULTS="${!NEXT}" ;;
+        esac
+    fi
 done
 
 LOG_FILE=""
@@ -24,6 +64,11 @@ if [ $LOG_FILE_ARG_INDEX -ne -1 ] && [ $LOG_FILE_ARG_INDEX -le $# ]; then
     LOG_FILE="${!LOG_FILE_ARG_INDEX}"
 fi
 
+CHANGED_ASSETS_FILE=""
+if [ $CHANGED_ASSETS_ARG_INDEX -ne -1 ] && [ $CHANGED_ASSETS_ARG_INDEX -le $# ]; then
+    CHANGED_ASSETS_FILE="${!CHANGED_ASSETS_ARG_INDEX}"
+fi
+
 PROJECT_PATH="." # Default to current directory if not specified
 if [ $PROJECT_PATH_ARG_INDEX -ne -1 ] && [ $PROJECT_PATH_ARG_INDEX -le $# ]; then
     PROJECT_PATH="${!PROJECT_PATH_ARG_INDEX}"
@@ -61,19 +106,179 @@ else
     echo "Command: $0 $@" >> "$LOG_FILE"
 fi
 
+# Simulate editor startup (project load, script compilation, domain reload)
+sleep "$DUMMY_UNITY_STARTUP_SECONDS"
 
-# Simulate -executeMethod
-if [ $EXECUTE_METHOD_ARG_INDEX -ne -1 ] && [ $EXECUTE_METHOD_ARG_INDEX -le $# ]; then
-    METHOD_NAME="${!EXECUTE_METHOD_ARG_INDEX}"
-    echo "Dummy Unity: Attempting to execute method $METHOD_NAME" >> "$LOG_FILE"
+# Per-method cost: runtime, output volume and an optional injected failure. Returns non-zero to fail the method.
+simulate_method_cost() {
+    SHORT_NAME="${1#JulesBuildAutomation.}"
+    OVERRIDE_VAR="DUMMY_UNITY_METHOD_SECONDS_$SHORT_NAME"
+    if [ "$SHORT_NAME" == "$DUMMY_UNITY_HANG_METHOD" ]; then
+        # Launches are counted per project, so a retry after the watchdog killed the hung one can go through.
+        HANG_COUNT_FILE="$PROJECT_PATH/Logs/dummy_unity_hangs_$SHORT_NAME"
+        HANG_COUNT=$(cat "$HANG_COUNT_FILE" 2>/dev/null || echo 0)
+        if [ "${DUMMY_UNITY_HANG_TIMES:-1}" -eq 0 ] || [ "$HANG_COUNT" -lt "${DUMMY_UNITY_HANG_TIMES:-1}" ]; then
+            echo $((HANG_COUNT + 1)) > "$HANG_COUNT_FILE"
+            echo "Dummy Unity: [$SHORT_NAME] Waiting for a modal dialog to be dismissed..." >> "$LOG_FILE"
+            sleep 86400
+        fi
+    fi
+    sleep "${!OVERRIDE_VAR:-$DUMMY_UNITY_METHOD_SECONDS}"
+    if [ "$DUMMY_UNITY_LOG_LINES" -gt 0 ]; then
+        yes "Dummy Unity: [$SHORT_NAME] Refreshing native plugins compatible for Editor in 0.42 ms, found 3 plugins." | head -n "$DUMMY_UNITY_LOG_LINES" >> "$LOG_FILE"
+    fi
+    if [ "$DUMMY_UNITY_STDOUT_LINES" -gt 0 ]; then
+        yes "Dummy Unity: [$SHORT_NAME] Asset import worker output line." | head -n "$DUMMY_UNITY_STDOUT_LINES"
+    fi
+    ROLL=$RANDOM
+    if [ -n "$DUMMY_UNITY_SEED" ]; then
+        # Deterministic per (seed, method), so a seeded run always fails the same steps.
+        ROLL=$(( $(printf '%s:%s' "$DUMMY_UNITY_SEED" "$1" | cksum | cut -d' ' -f1) % 32768 ))
+    fi
+    if awk -v roll="$ROLL" -v rate="$DUMMY_UNITY_FAILURE_RATE" 'BEGIN { exit !(roll / 32768 < rate) }'; then
+        echo "Dummy Unity: Injected failure in $1 (DUMMY_UNITY_FAILURE_RATE=$DUMMY_UNITY_FAILURE_RATE)" >> "$LOG_FILE"
+        return 1
+    fi
+}
+
+
+# Mirrors ApplyAssetOptimizations: a full pass over every texture/model/audio asset, or only the assets in the
+# -julesChangedAssets list.
+simulate_asset_optimizations() {
+    echo "Jules: Applying Asset Optimizations & Runtime Performance Setup (if enabled)..." >> "$LOG_FILE"
+    if [ -n "$CHANGED_ASSETS_FILE" ] && [ -f "$CHANGED_ASSETS_FILE" ]; then
+        ASSET_COUNT=$(grep -c . "$CHANGED_ASSETS_FILE")
+        echo "JulesBuildAutomation: Asset optimization incremental pass over $ASSET_COUNT new or changed asset(s)." >> "$LOG_FILE"
+    else
+        ASSET_COUNT=$(find "$PROJECT_PATH/Assets" -type f \( -iname '*.png' -o -iname '*.jpg' -o -iname '*.tga' -o -iname '*.psd' -o -iname '*.fbx' -o -iname '*.obj' -o -iname '*.wav' -o -iname '*.ogg' -o -iname '*.mp3' \) | wc -l)
+        echo "JulesBuildAutomation: Asset optimization full pass over the project." >> "$LOG_FILE"
+    fi
+    echo "Jules: Optimized import settings of $ASSET_COUNT asset(s)." >> "$LOG_FILE"
+    echo "Jules: Finished applying Asset Optimizations & Runtime Performance Setup." >> "$LOG_FILE"
+}
+
+# The buildVersion baked into the deployed JulesBuildAutomation.cs, which is what the real script builds and
+# increments; the project's version file only where no script is deployed.
+current_build_version() {
+    SCRIPT_VERSION=$(sed -n 's/.*public static string buildVersion = "\([^"]*\)";.*/\1/p' "$PROJECT_PATH/Assets/Editor/JulesBuildAutomation.cs" 2>/dev/null | head -n 1)
+    if [ -n "$SCRIPT_VERSION" ]; then
+        echo "$SCRIPT_VERSION"
+    elif [ -s "$PROJECT_PATH/Assets/Resources/build_version.txt" ]; then
+        tr -d '[:space:]' < "$PROJECT_PATH/Assets/Resources/build_version.txt"
+    else
+        echo "0.1.0"
+    fi
+}
+
+# Writes a fake player into Builds/AlphaTest/<Platform>/RubeGoldbergVR_v<version>, the layout BuildAlphaTestPlayer uses.
+simulate_player_build() {
+    PLATFORM="$1"
+    EXTENSION="$2"
+    SIZE_VAR="DUMMY_UNITY_BUILD_SIZE_$PLATFORM"
+    SIZE="${!SIZE_VAR:-$3}"
+    BUILD_VERSION=$(current_build_version)
+    BUILD_FOLDER="Builds/AlphaTest/$PLATFORM/RubeGoldbergVR_v$BUILD_VERSION"
+    mkdir -p "$PROJECT_PATH/$BUILD_FOLDER"
+    echo "Dummy Build Output for $PLATFORM" > "$PROJECT_PATH/$BUILD_FOLDER/RubeGoldbergVR.$EXTENSION"
+    for ((DATA_INDEX = 0; DATA_INDEX < DUMMY_UNITY_BUILD_DATA_FILES; DATA_INDEX++)); do
+        mkdir -p "$PROJECT_PATH/$BUILD_FOLDER/RubeGoldbergVR_Data"
+        head -c 1048576 /dev/zero > "$PROJECT_PATH/$BUILD_FOLDER/RubeGoldbergVR_Data/data$DATA_INDEX.bin"
+    done
+    echo "Jules: $PLATFORM Alpha Test Build succeeded: $SIZE bytes at $BUILD_FOLDER/RubeGoldbergVR.$EXTENSION in $((SECONDS - START_SECONDS)).0 seconds" >> "$LOG_FILE"
+}
+
+# Mirrors RunSmokeTestShard: runs each case of -julesSmokeTests against -julesSmokeBuildDir, logging
+# SMOKE_TEST <name> PASSED|FAILED and appending a JSON line per case to -julesSmokeResults.
+simulate_smoke_tests() {
+    if [ -z "$SMOKE_TESTS" ] || [ -z "$SMOKE_BUILD_DIR" ]; then
+        echo "JulesBuildAutomation: RunSmokeTestShard requires -julesSmokeTests and -julesSmokeBuildDir." >> "$LOG_FILE"
+        return 1
+    fi
+    echo "JulesBuildAutomation: Running smoke tests $SMOKE_TESTS on $SMOKE_PLATFORM build $SMOKE_BUILD_DIR..." >> "$LOG_FILE"
+    SMOKE_FAILURES=0
+    IFS=',' read -r -a SMOKE_CASES <<< "$SMOKE_TESTS"
+    for CASE in "${SMOKE_CASES[@]}"; do
+        CASE_START=$(date +%s%3N)
+        sleep "$DUMMY_UNITY_SMOKE_TEST_SECONDS"
+        MESSAGE=""
+        if [[ ",$DUMMY_UNITY_FAIL_SMOKE_TESTS," == *",$CASE,"* ]] || [[ ",$DUMMY_UNITY_FAIL_SMOKE_TESTS," == *",$SMOKE_PLATFORM/$CASE,"* ]]; then
+            MESSAGE="injected failure (DUMMY_UNITY_FAIL_SMOKE_TESTS)"
+        elif [ "$CASE" == "BuildOutputExists" ] && ! ls "$SMOKE_BUILD_DIR"/RubeGoldbergVR.* > /dev/null 2>&1; then
+            MESSAGE="no RubeGoldbergVR player in $SMOKE_BUILD_DIR"
+        fi
+        ELAPSED_MS=$(( $(date +%s%3N) - CASE_START ))
+        if [ -z "$MESSAGE" ]; then
+            echo "JulesBuildAutomation: SMOKE_TEST $CASE PASSED ${ELAPSED_MS}ms" >> "$LOG_FILE"
+            RESULT_JSON="{\"name\": \"$CASE\", \"platform\": \"$SMOKE_PLATFORM\", \"status\": \"passed\", \"seconds\": $(awk -v ms="$ELAPSED_MS" 'BEGIN { print ms / 1000 }'), \"message\": null}"
+        else
+            echo "JulesBuildAutomation: SMOKE_TEST $CASE FAILED ${ELAPSED_MS}ms ($MESSAGE)" >> "$LOG_FILE"
+            RESULT_JSON="{\"name\": \"$CASE\", \"platform\": \"$SMOKE_PLATFORM\", \"status\": \"failed\", \"seconds\": $(awk -v ms="$ELAPSED_MS" 'BEGIN { print ms / 1000 }'), \"message\": \"$MESSAGE\"}"
+            SMOKE_FAILURES=$((SMOKE_FAILURES + 1))
+        fi
+        if [ -n "$SMOKE_RESULTS" ]; then
+            echo "$RESULT_JSON" >> "$SMOKE_RESULTS"
+        fi
+    done
+    [ $SMOKE_FAILURES -eq 0 ]
+}
+
+# Mirrors InstallXRPackages plus the Package Manager resolve on startup: XR packages (read from the deployed
+# script's xrPackages) that Packages/manifest.json already lists resolve with the project, the rest are added in
+# one AddAndRemove request. "file:" tarball dependencies must exist. Resolved packages land in Library/PackageCache.
+simulate_package_resolve() {
+    MANIFEST="$PROJECT_PATH/Packages/manifest.json"
+    XR_PACKAGE_IDS=$(grep -o 'com\.unity\.xr\.[a-z.-]*@[0-9][0-9.]*' "$PROJECT_PATH/Assets/Editor/JulesBuildAutomation.cs" 2>/dev/null | sort -u)
+    for TARBALL in $(grep -o '"file:[^"]*"' "$MANIFEST" 2>/dev/null | sed 's/^"file:\(.*\)"$/\1/'); do
+        if [ ! -f "$TARBALL" ]; then
+            echo "Dummy Unity: Package resolution failed: tarball $TARBALL not found." >> "$LOG_FILE"
+            return 1
+        fi
+    done
+    MISSING=""
+    for PACKAGE_ID in $XR_PACKAGE_IDS; do
+        if ! grep -q "\"${PACKAGE_ID%@*}\"" "$MANIFEST" 2>/dev/null; then
+            MISSING="$MISSING $PACKAGE_ID"
+        fi
+    done
+    if [ -z "$MISSING" ]; then
+        echo "JulesBuildAutomation: All XR packages are already installed from Packages/manifest.json. Proceeding to XR Plug-in Management and OpenXR configuration..." >> "$LOG_FILE"
+    else
+        echo "JulesBuildAutomation: Installing $(echo $MISSING | wc -w) XR package(s) in one request:$MISSING" >> "$LOG_FILE"
+        echo "JulesBuildAutomation: All XR packages installed. Proceeding to XR Plug-in Management and OpenXR configuration after recompilation (if any)..." >> "$LOG_FILE"
+    fi
+    # XR Interaction Toolkit pulls in XR Core Utilities, like the real package does.
+    for PACKAGE_ID in $XR_PACKAGE_IDS com.unity.xr.core-utils@2.2.0; do
+        PACKAGE_DIR="$PROJECT_PATH/Library/PackageCache/$PACKAGE_ID"
+        if [ ! -f "$PACKAGE_DIR/package.json" ]; then
+            mkdir -p "$PACKAGE_DIR"
+            DEPENDENCIES="{}"
+            if [ "${PACKAGE_ID%@*}" == "com.unity.xr.interaction.toolkit" ]; then
+                DEPENDENCIES='{"com.unity.xr.core-utils": "2.2.0"}'
+            fi
+            echo "{\"name\": \"${PACKAGE_ID%@*}\", \"version\": \"${PACKAGE_ID#*@}\", \"dependencies\": $DEPENDENCIES}" > "$PACKAGE_DIR/package.json"
+        fi
+    done
+}
+
+# Simulate a single JulesBuildAutomation method. Returns non-zero to simulate a failed step.
+simulate_method() {
+    METHOD_NAME="$1"
+    simulate_method_cost "$METHOD_NAME" || return 1
     if [ "$METHOD_NAME" == "JulesBuildAutomation.SetupVRProject" ]; then
         echo "Jules: Starting VR Project Setup..." >> "$LOG_FILE"
+        simulate_package_resolve || return 1
+        if [ ! -d "$PROJECT_PATH/Library/Artifacts" ]; then
+            # Cold Library: import every asset, as a fresh workspace does.
+            echo "Dummy Unity: Library is empty, importing all assets..." >> "$LOG_FILE"
+            sleep "$DUMMY_UNITY_LIBRARY_IMPORT_SECONDS"
+            mkdir -p "$PROJECT_PATH/Library/Artifacts/00"
+            echo "dummy import artifact" > "$PROJECT_PATH/Library/Artifacts/00/0011223344"
+        else
+            echo "Dummy Unity: Library is warm, reusing imported assets." >> "$LOG_FILE"
+        fi
         # Simulate creation of Assets/Editor if it doesn't exist from project creation step
         mkdir -p "$PROJECT_PATH/Assets/Editor"
         echo "Jules: Created folder: Assets/Editor" >> "$LOG_FILE" # if it were to create it
-        echo "Jules: Attempting to install package: com.unity.xr.interaction.toolkit@2.3.1" >> "$LOG_FILE"
-        echo "Jules: Attempting to install package: com.unity.xr.openxr@1.9.0" >> "$LOG_FILE"
-        echo "Jules: All XR packages installation requests sent. Now configuring XR Plug-in Management and OpenXR. Please wait for assembly compilation." >> "$LOG_FILE"
         echo "Jules: Starting XR configuration..." >> "$LOG_FILE"
         echo "Jules: Configuring XR for Windows, Mac & Linux..." >> "$LOG_FILE"
         echo "Jules: Added OpenXR Loader to Windows, Mac & Linux XR General Settings." >> "$LOG_FILE"
@@ -99,27 +304,43 @@ if [ $EXECUTE_METHOD_ARG_INDEX -ne -1 ] && [ $EXECUTE_METHOD_ARG_INDEX -le $# ];
         echo "Jules: Added Left Hand Controller with XRRayInteractor." >> "$LOG_FILE"
         echo "Jules: Added Right Hand Controller with XRDirectInteractor." >> "$LOG_FILE"
         echo "Jules: Basic VR scene elements created and scene saved." >> "$LOG_FILE"
+        # SetupVRProject chains into SetupRubeGoldbergGame, which also creates the prefabs
+        mkdir -p "$PROJECT_PATH/Assets/RubeGoldbergPrefabs"
+        touch "$PROJECT_PATH/Assets/RubeGoldbergPrefabs/Ramp.prefab"
+        touch "$PROJECT_PATH/Assets/RubeGoldbergPrefabs/Lever.prefab"
+        touch "$PROJECT_PATH/Assets/RubeGoldbergPrefabs/Domino.prefab"
+        echo "Jules: All Rube Goldberg prefabs created." >> "$LOG_FILE"
         echo "SetupVRProject completed successfully by dummy script." >> "$LOG_FILE"
     elif [ "$METHOD_NAME" == "JulesBuildAutomation.PerformAlphaTestBuild" ]; then
-        echo "Jules: Starting Alpha Test Build..." >> "$LOG_FILE"
+        echo "JulesBuildAutomation: Starting Alpha Test Build for version $(current_build_version)..." >> "$LOG_FILE"
         # Simulate finding the scene
         SCENE_PATH="$PROJECT_PATH/Assets/Scenes/SampleScene.unity"
         if [ ! -f "$SCENE_PATH" ]; then
             # This case should ideally not happen if SetupVRProject ran correctly
             echo "Jules: Scene 'Assets/Scenes/SampleScene.unity' not found for build. Please ensure it exists." >> "$LOG_FILE"
-            exit 1 # Simulate build failure
+            return 1 # Simulate build failure
         fi
+        simulate_asset_optimizations
         echo "Jules: Building for Windows Standalone (Alpha Test)..." >> "$LOG_FILE"
-        mkdir -p "$PROJECT_PATH/Builds/AlphaTest/Windows"
-        echo "Dummy Build Output for Windows" > "$PROJECT_PATH/Builds/AlphaTest/Windows/RubeGoldbergVR.exe"
-        echo "Jules: Windows Alpha Test Build succeeded: 12345 bytes at Builds/AlphaTest/Windows/RubeGoldbergVR.exe" >> "$LOG_FILE"
-
+        simulate_player_build Windows exe 12345
         echo "Jules: Building for Android (Alpha Test for Quest/VR)..." >> "$LOG_FILE"
-        mkdir -p "$PROJECT_PATH/Builds/AlphaTest/Android"
-        echo "Dummy Build Output for Android" > "$PROJECT_PATH/Builds/AlphaTest/Android/RubeGoldbergVR.apk"
-        echo "Jules: Android Alpha Test Build succeeded: 67890 bytes at Builds/AlphaTest/Android/RubeGoldbergVR.apk" >> "$LOG_FILE"
+        simulate_player_build Android apk 67890
         echo "Jules: All Alpha Test Builds completed successfully." >> "$LOG_FILE"
         echo "PerformAlphaTestBuild completed successfully by dummy script." >> "$LOG_FILE"
+    elif [ "$METHOD_NAME" == "JulesBuildAutomation.PerformAlphaTestBuildWindows" ] || [ "$METHOD_NAME" == "JulesBuildAutomation.PerformAlphaTestBuildAndroid" ]; then
+        echo "JulesBuildAutomation: Starting Alpha Test Build for version $(current_build_version)..." >> "$LOG_FILE"
+        if [ ! -f "$PROJECT_PATH/Assets/Scenes/SampleScene.unity" ]; then
+            echo "Jules: Scene 'Assets/Scenes/SampleScene.unity' not found for build. Please ensure it exists." >> "$LOG_FILE"
+            return 1
+        fi
+        simulate_asset_optimizations
+        if [ "$METHOD_NAME" == "JulesBuildAutomation.PerformAlphaTestBuildWindows" ]; then
+            echo "Jules: Building for Windows Standalone (Alpha Test)..." >> "$LOG_FILE"
+            simulate_player_build Windows exe 12345
+        else
+            echo "Jules: Building for Android (Alpha Test for Quest/VR)..." >> "$LOG_FILE"
+            simulate_player_build Android apk 67890
+        fi
     elif [ "$METHOD_NAME" == "JulesBuildAutomation.SetupRubeGoldbergGame" ]; then
         echo "Jules: Starting Rube Goldberg Game Setup..." >> "$LOG_FILE"
         # Simulate CreateBasicVRSceneElements
@@ -157,13 +378,84 @@ if [ $EXECUTE_METHOD_ARG_INDEX -ne -1 ] && [ $EXECUTE_METHOD_ARG_INDEX -le $# ];
 
         echo "JulesBuildAutomation.SetupRubeGoldbergGame completed successfully by dummy script." >> "$LOG_FILE"
         # EditorApplication.Exit(0) is called in C#, so simulate successful exit
+    elif [ "$METHOD_NAME" == "JulesBuildAutomation.IncrementBuildVersion" ]; then
+        VERSION_FILE="$PROJECT_PATH/Assets/Resources/build_version.txt"
+        CURRENT_VERSION=$(current_build_version)
+        IFS='.' read -r MAJOR MINOR PATCH <<< "$CURRENT_VERSION"
+        NEW_VERSION="$MAJOR.$MINOR.$((PATCH + 1))"
+        mkdir -p "$(dirname "$VERSION_FILE")"
+        echo "$NEW_VERSION" > "$VERSION_FILE"
+        echo "JulesBuildAutomation: Build version incremented from $CURRENT_VERSION to $NEW_VERSION." >> "$LOG_FILE"
+    elif [ "$METHOD_NAME" == "JulesBuildAutomation.PerformSmokeTests" ]; then
+        echo "JulesBuildAutomation: Starting smoke tests..." >> "$LOG_FILE"
+        if [ ! -d "$PROJECT_PATH/Builds/AlphaTest" ]; then
+            echo "JulesBuildAutomation: Smoke tests failed: no alpha builds found." >> "$LOG_FILE"
+            return 1
+        fi
+        echo "JulesBuildAutomation: Smoke tests passed." >> "$LOG_FILE"
+    elif [ "$METHOD_NAME" == "JulesBuildAutomation.RunSmokeTestShard" ]; then
+        simulate_smoke_tests || return 1
+    elif [ "$METHOD_NAME" == "JulesBuildAutomation.DistributeAlphaBuilds" ]; then
+        echo "JulesBuildAutomation: Distributing alpha builds..." >> "$LOG_FILE"
+        mkdir -p "$PROJECT_PATH/Distribution"
+        cp -r "$PROJECT_PATH/Builds/AlphaTest" "$PROJECT_PATH/Distribution/" || return 1
+        echo "JulesBuildAutomation: Alpha builds distributed to Distribution/AlphaTest." >> "$LOG_FILE"
     else
         echo "Dummy Unity: Unknown method $METHOD_NAME" >> "$LOG_FILE"
-        exit 1 # Simulate error for unknown method
+        return 1 # Simulate error for unknown method
+    fi
+}
+
+# Simulate JulesBuildAutomation.RunPipeline: run each step of -pipelineSteps in this one process,
+# printing the same PIPELINE_STEP_* markers as the C# runner. A trailing '?' marks an optional step.
+simulate_pipeline() {
+    STEPS_ARG=""
+    for i in $(seq 1 $#); do
+        if [ "${!i}" == "-pipelineSteps" ]; then
+            NEXT=$((i + 1))
+            STEPS_ARG="${!NEXT}"
+        fi
+    done
+    if [ -z "$STEPS_ARG" ]; then
+        echo "JulesBuildAutomation: RunPipeline requires -pipelineSteps <Step1,Step2,...>." >> "$LOG_FILE"
+        return 1
+    fi
+    IFS=',' read -r -a PIPELINE_STEPS <<< "$STEPS_ARG"
+    echo "JulesBuildAutomation: Pipeline starting with ${#PIPELINE_STEPS[@]} steps: $STEPS_ARG" >> "$LOG_FILE"
+    FAILED=0
+    for RAW_STEP in "${PIPELINE_STEPS[@]}"; do
+        STEP="${RAW_STEP%\?}"
+        if [ $FAILED -ne 0 ]; then
+            echo "JulesBuildAutomation: PIPELINE_STEP_SKIPPED $STEP" >> "$LOG_FILE"
+            continue
+        fi
+        echo "JulesBuildAutomation: PIPELINE_STEP_BEGIN $STEP" >> "$LOG_FILE"
+        STEP_START=$(date +%s%3N)
+        if simulate_method "JulesBuildAutomation.$STEP"; then
+            echo "JulesBuildAutomation: PIPELINE_STEP_END $STEP SUCCEEDED exitCode=0 elapsedMs=$(( $(date +%s%3N) - STEP_START ))" >> "$LOG_FILE"
+        else
+            echo "JulesBuildAutomation: PIPELINE_STEP_END $STEP FAILED exitCode=1 elapsedMs=$(( $(date +%s%3N) - STEP_START ))" >> "$LOG_FILE"
+            if [ "$RAW_STEP" == "$STEP" ]; then
+                FAILED=1
+            fi
+        fi
+    done
+    echo "JulesBuildAutomation: Pipeline finished." >> "$LOG_FILE"
+    return $FAILED
+}
+
+# Simulate -executeMethod
+if [ $EXECUTE_METHOD_ARG_INDEX -ne -1 ] && [ $EXECUTE_METHOD_ARG_INDEX -le $# ]; then
+    METHOD_NAME="${!EXECUTE_METHOD_ARG_INDEX}"
+    echo "Dummy Unity: Attempting to execute method $METHOD_NAME" >> "$LOG_FILE"
+    if [ "$METHOD_NAME" == "JulesBuildAutomation.RunPipeline" ]; then
+        simulate_pipeline "$@" || exit 1
+    else
+        simulate_method "$METHOD_NAME" || exit 1
     fi
+elif [ -n "$SMOKE_TESTS" ]; then
+    simulate_smoke_tests || exit 1
 fi
 
-# Simulate a short delay like a real Unity process might have
-sleep 1
 echo "Dummy Unity Editor finished." >> "$LOG_FILE"
 exit 0
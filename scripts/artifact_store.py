@@ -0,0 +1,351 @@
+import argparse
+import concurrent.futures
+import contextvars
+import errno
+import hashlib
+import json
+import os
+import re
+import shutil
+import stat
+import struct
+import sys
+import tempfile
+import time
+
+import command_runner
+
+try:
+    import fcntl
+except ImportError:  # Windows: no reflinks, materialization falls back to hardlinks/copies.
+    fcntl = None
+
+# Content-addressed store for versioned alpha build outputs (Builds/AlphaTest/<Platform>/<Project>_v<version>).
+# Consecutive versions share most of their files, so instead of keeping a full folder per version every file
+# is split into fixed-size chunks stored once under their SHA-256, and each build version is a manifest
+# listing its files and their chunks:
+#   <store>/chunks/ab/abcdef...            read-only chunk files
+#   <store>/manifests/<artifact>/<version>.json
+# where <artifact> is e.g. RubeGoldbergVR/Windows.
+#
+# Materializing a version does not copy data where the filesystem allows it: single-chunk files are
+# hardlinked to the chunk (so they are read-only, like the store), multi-chunk files are assembled with
+# FICLONERANGE reflinks, and only otherwise are chunks copied. Chunks are a multiple of the filesystem block
+# size, which range cloning requires. Unreferenced chunks are removed by a mark-and-sweep collection after
+# retention policies drop manifests.
+
+CHUNK_SIZE = 4 * 1024 * 1024
+HASH_WORKERS = 4
+FICLONERANGE = 0x4020940D  # _IOW(0x94, 13, struct file_clone_range) from linux/fs.h
+VERSION_DIR_PATTERN = re.compile(r"^(?P<project>.+)_v(?P<version>[^/\\]+)$")
+
+
+def default_store_path(project_path):
+    return os.path.join(os.path.dirname(project_path), os.path.basename(project_path) + "_ArtifactStore")
+
+
+def _chunk_path(store_root, digest):
+    return os.path.join(store_root, "chunks", digest[:2], digest)
+
+
+def _manifest_path(store_root, artifact, version):
+    return os.path.join(store_root, "manifests", *artifact.split("/"), version + ".json")
+
+
+def _version_key(version):
+    # Orders 0.1.10 after 0.1.9; non-numeric parts compare as text.
+    return [(0, int(part), "") if part.isdigit() else (1, 0, part) for part in re.split(r"[.\-_]", version)]
+
+
+def _store_chunk(store_root, digest, data):
+    # Returns True if the chunk was new. Files with the same content are ingested by several threads at once
+    # (and builds by several processes), so each writer has its own temp file and the first to link it wins.
+    path = _chunk_path(store_root, digest)
+    if os.path.exists(path):
+        return False
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(prefix=digest[:16] + ".", suffix=".tmp", dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        try:
+            os.link(temp_path, path)
+        except FileExistsError:
+            return False  # Stored by another writer meanwhile; the content is the same.
+        except OSError:  # No hardlinks on this filesystem.
+            os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    os.chmod(path, stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+    return True
+
+
+def _ingest_file(store_root, source_path):
+    chunks = []
+    new_chunks = 0
+    new_bytes = 0
+    with open(source_path, "rb") as f:
+        for data in iter(lambda: f.read(CHUNK_SIZE), b""):
+            command_runner.check_cancelled()
+            digest = hashlib.sha256(data).hexdigest()
+            if _store_chunk(store_root, digest, data):
+                new_chunks += 1
+                new_bytes += len(data)
+            chunks.append(digest)
+    return chunks, new_chunks, new_bytes
+
+
+def ingest(store_root, source_dir, artifact, version):
+    # Adds source_dir as <artifact>@<version>. Returns stats about what was new.
+    entries = []
+    for root, dirs, files in os.walk(source_dir):
+        dirs.sort()
+        for name in sorted(files):
+            path = os.path.join(root, name)
+            if os.path.isfile(path) and not os.path.islink(path):
+                entries.append((os.path.relpath(path, source_dir).replace(os.sep, "/"), path))
+    # sha256 releases the GIL on large buffers, so hashing several files at once scales across cores. Each file
+    # is hashed in a copy of the caller's context, so a cancelled step stops all of them.
+    with concurrent.futures.ThreadPoolExecutor(max_workers=HASH_WORKERS) as executor:
+        futures = [executor.submit(contextvars.copy_context().run, _ingest_file, store_root, path) for _, path in entries]
+        results = [future.result() for future in futures]
+    manifest_files = []
+    stats = {"artifact": artifact, "version": version, "files": len(entries), "bytes": 0, "new_chunks": 0, "new_bytes": 0}
+    for (rel_path, path), (chunks, new_chunks, new_bytes) in zip(entries, results):
+        file_stat = os.stat(path)
+        manifest_files.append({"path": rel_path, "size": file_stat.st_size, "mode": stat.S_IMODE(file_stat.st_mode), "chunks": chunks})
+        stats["bytes"] += file_stat.st_size
+        stats["new_chunks"] += new_chunks
+        stats["new_bytes"] += new_bytes
+    manifest = {"artifact": artifact, "version": version, "created": time.time(), "chunk_size": CHUNK_SIZE,
+                "source": os.path.abspath(source_dir), "files": manifest_files}
+    manifest_path = _manifest_path(store_root, artifact, version)
+    os.makedirs(os.path.dirname(manifest_path), exist_ok=True)
+    with open(manifest_path + ".tmp", "w") as f:
+        json.dump(manifest, f)
+    os.replace(manifest_path + ".tmp", manifest_path)
+    stats["reused_bytes"] = stats["bytes"] - stats["new_bytes"]
+    return stats
+
+
+def load_manifest(store_root, artifact, version):
+    with open(_manifest_path(store_root, artifact, version), "r") as f:
+        return json.load(f)
+
+
+def list_versions(store_root):
+    # Returns {artifact: [versions, oldest first]}.
+    manifests_root = os.path.join(store_root, "manifests")
+    versions = {}
+    for root, _, files in os.walk(manifests_root):
+        artifact = os.path.relpath(root, manifests_root).replace(os.sep, "/")
+        for name in files:
+            if name.endswith(".json"):
+                versions.setdefault(artifact, []).append(name[:-len(".json")])
+    return {artifact: sorted(found, key=_version_key) for artifact, found in sorted(versions.items())}
+
+
+def _clone_range(source_fd, dest_fd, length, dest_offset):
+    fcntl.ioctl(dest_fd, FICLONERANGE, struct.pack("qQQQ", source_fd, 0, length, dest_offset))
+
+
+def _materialize_file(store_root, entry, dest_path, state):
+    chunks = entry["chunks"]
+    if len(chunks) == 1 and state["hardlinks"]:
+        try:
+            os.link(_chunk_path(store_root, chunks[0]), dest_path)
+            return "hardlink"
+        except OSError as e:
+            if e.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK):
+                raise
+            state["hardlinks"] = False  # Store on another filesystem; don't retry per file.
+    method = "reflink" if state["reflinks"] and chunks else "copy"
+    with open(dest_path, "wb") as dest:
+        offset = 0
+        for digest in chunks:
+            with open(_chunk_path(store_root, digest), "rb") as source:
+                length = os.fstat(source.fileno()).st_size
+                if method == "reflink":
+                    try:
+                        # The final chunk may be shorter than a block; cloning it to EOF is allowed.
+                        _clone_range(source.fileno(), dest.fileno(), length, offset)
+                        offset += length
+                        continue
+                    except OSError as e:
+                        if e.errno not in (errno.EOPNOTSUPP, errno.ENOTTY, errno.EXDEV, errno.EINVAL, errno.ENOSYS):
+                            raise
+                        state["reflinks"] = False
+                        method = "copy"
+                dest.seek(offset)
+                shutil.copyfileobj(source, dest, CHUNK_SIZE)
+                offset += length
+    os.chmod(dest_path, entry["mode"])
+    return method
+
+
+def materialize(store_root, artifact, version, dest_dir, hardlinks=True):
+    # Recreates <artifact>@<version> in dest_dir (which must not exist yet). Returns counts per method.
+    # With hardlinks=False every file is an independent, writable file (reflinked or copied).
+    if os.path.exists(dest_dir):
+        raise FileExistsError(f"Destination already exists: {dest_dir}")
+    manifest = load_manifest(store_root, artifact, version)
+    state = {"hardlinks": hardlinks, "reflinks": fcntl is not None}
+    counts = {"hardlink": 0, "reflink": 0, "copy": 0}
+    temp_dir = dest_dir + ".partial"
+    if os.path.exists(temp_dir):
+        shutil.rmtree(temp_dir)
+    for entry in manifest["files"]:
+        dest_path = os.path.join(temp_dir, *entry["path"].split("/"))
+        os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+        counts[_materialize_file(store_root, entry, dest_path, state)] += 1
+    os.makedirs(temp_dir, exist_ok=True)
+    os.replace(temp_dir, dest_dir)
+    return counts
+
+
+def apply_retention(store_root, keep_last=None, keep_versions=(), max_age_days=None):
+    # Drops manifests per artifact: everything but the newest keep_last versions and/or everything older than
+    # max_age_days. Versions in keep_versions are always kept. Returns the removed (artifact, version) pairs;
+    # call collect_garbage() afterwards to free their chunks.
+    removed = []
+    now = time.time()
+    for artifact, versions in list_versions(store_root).items():
+        for index, version in enumerate(versions):
+            if version in keep_versions:
+                continue
+            too_many = keep_last is not None and index < len(versions) - keep_last
+            too_old = False
+            if max_age_days is not None:
+                too_old = now - load_manifest(store_root, artifact, version)["created"] > max_age_days * 86400
+            if too_many or too_old:
+                os.remove(_manifest_path(store_root, artifact, version))
+                removed.append((artifact, version))
+    return removed
+
+
+def collect_garbage(store_root):
+    # Mark and sweep: deletes chunks no manifest references. Returns (chunks removed, bytes freed).
+    referenced = set()
+    for artifact, versions in list_versions(store_root).items():
+        for version in versions:
+            for entry in load_manifest(store_root, artifact, version)["files"]:
+                referenced.update(entry["chunks"])
+    removed = 0
+    freed = 0
+    chunks_root = os.path.join(store_root, "chunks")
+    for root, _, files in os.walk(chunks_root):
+        for name in files:
+            if name not in referenced:
+                path = os.path.join(root, name)
+                freed += os.path.getsize(path)
+                os.remove(path)
+                removed += 1
+    return removed, freed
+
+
+def store_stats(store_root):
+    # Logical bytes are what full per-version folders would take; physical bytes are the chunks on disk.
+    logical = 0
+    versions_count = 0
+    for artifact, versions in list_versions(store_root).items():
+        for version in versions:
+            versions_count += 1
+            logical += sum(entry["size"] for entry in load_manifest(store_root, artifact, version)["files"])
+    physical = 0
+    chunk_count = 0
+    for root, _, files in os.walk(os.path.join(store_root, "chunks")):
+        for name in files:
+            physical += os.path.getsize(os.path.join(root, name))
+            chunk_count += 1
+    return {"versions": versions_count, "chunks": chunk_count, "logical_bytes": logical, "physical_bytes": physical,
+            "dedup_ratio": logical / physical if physical else 1.0}
+
+
+def register_build_outputs(store_root, project_path):
+    # Ingests every Builds/AlphaTest/<Platform>/<Project>_v<version> folder not in the store yet.
+    results = []
+    builds_dir = os.path.join(project_path, "Builds", "AlphaTest")
+    if not os.path.isdir(builds_dir):
+        return results
+    for platform in sorted(os.listdir(builds_dir)):
+        platform_dir = os.path.join(builds_dir, platform)
+        if not os.path.isdir(platform_dir):
+            continue
+        for name in sorted(os.listdir(platform_dir)):
+            match = VERSION_DIR_PATTERN.match(name)
+            if not match or not os.path.isdir(os.path.join(platform_dir, name)):
+                continue
+            artifact = f"{match.group('project')}/{platform}"
+            if os.path.exists(_manifest_path(store_root, artifact, match.group("version"))):
+                continue
+            results.append(ingest(store_root, os.path.join(platform_dir, name), artifact, match.group("version")))
+    return results
+
+
+def format_bytes(count):
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if count < 1024 or unit == "GiB":
+            return f"{count:.1f} {unit}" if unit != "B" else f"{count} B"
+        count /= 1024.0
+
+
+def print_ingest_report(results, stats):
+    for result in results:
+        print(f"  stored {result['artifact']} v{result['version']}: {result['files']} files, {format_bytes(result['bytes'])}, "
+              f"{format_bytes(result['new_bytes'])} new ({result['new_chunks']} chunks), {format_bytes(result['reused_bytes'])} deduplicated")
+    print(f"  store: {stats['versions']} versions, {format_bytes(stats['logical_bytes'])} logical, "
+          f"{format_bytes(stats['physical_bytes'])} on disk, dedup ratio {stats['dedup_ratio']:.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Content-addressed, deduplicating store for alpha build outputs.")
+    parser.add_argument("--store", required=True, help="Store directory.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    ingest_parser = subparsers.add_parser("ingest", help="Add a build folder as ARTIFACT@VERSION.")
+    ingest_parser.add_argument("source_dir")
+    ingest_parser.add_argument("artifact", help="e.g. RubeGoldbergVR/Windows")
+    ingest_parser.add_argument("version")
+    register_parser = subparsers.add_parser("register", help="Add all versioned Builds/AlphaTest folders of a project.")
+    register_parser.add_argument("project_path")
+    materialize_parser = subparsers.add_parser("materialize", help="Recreate ARTIFACT@VERSION in DEST_DIR without copying data where possible.")
+    materialize_parser.add_argument("artifact")
+    materialize_parser.add_argument("version")
+    materialize_parser.add_argument("dest_dir")
+    materialize_parser.add_argument("--writable", action="store_true", help="Don't hardlink; reflink or copy so files can be modified.")
+    subparsers.add_parser("list", help="List stored versions.")
+    retain_parser = subparsers.add_parser("retain", help="Apply a retention policy and collect unreferenced chunks.")
+    retain_parser.add_argument("--keep-last", type=int, default=None, help="Versions to keep per artifact.")
+    retain_parser.add_argument("--max-age-days", type=float, default=None, help="Drop versions older than this.")
+    retain_parser.add_argument("--keep-version", action="append", default=[], help="Never drop this version. Can be repeated.")
+    subparsers.add_parser("gc", help="Delete chunks no manifest references.")
+    subparsers.add_parser("stats", help="Print logical/physical size and dedup ratio.")
+    args = parser.parse_args()
+
+    if args.command == "ingest":
+        results = [ingest(args.store, args.source_dir, args.artifact, args.version)]
+        print_ingest_report(results, store_stats(args.store))
+    elif args.command == "register":
+        print_ingest_report(register_build_outputs(args.store, os.path.abspath(args.project_path)), store_stats(args.store))
+    elif args.command == "materialize":
+        counts = materialize(args.store, args.artifact, args.version, args.dest_dir, hardlinks=not args.writable)
+        print(f"Materialized {args.artifact} v{args.version} into {args.dest_dir}: " + ", ".join(f"{count} {method}" for method, count in counts.items()))
+    elif args.command == "list":
+        for artifact, versions in list_versions(args.store).items():
+            print(f"{artifact}: {', '.join(versions)}")
+    elif args.command == "retain":
+        if args.keep_last is None and args.max_age_days is None:
+            parser.error("retain needs --keep-last and/or --max-age-days")
+        removed = apply_retention(args.store, args.keep_last, args.keep_version, args.max_age_days)
+        chunks, freed = collect_garbage(args.store)
+        print(f"Dropped {len(removed)} version(s), freed {chunks} chunks ({format_bytes(freed)}).")
+    elif args.command == "gc":
+        chunks, freed = collect_garbage(args.store)
+        print(f"Freed {chunks} chunks ({format_bytes(freed)}).")
+    elif args.command == "stats":
+        json.dump(store_stats(args.store), sys.stdout, indent=2)
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+import hashlib
+import json
+import os
+import re
+import time
+
+# Fingerprint index of the assets JulesBuildAutomation's import optimizers touch (textures, models, audio),
+# so PerformAlphaTestBuild only has to reprocess new or changed assets instead of the whole project. Every
+# entry records the asset's size, mtime and content hash plus the hash of its .meta file (which holds the
+# import settings the optimizers write). Unchanged size and mtime reuse the recorded hash, so a rescan only
+# reads files that were actually touched.
+#
+# Before a build the orchestrator compares a fresh scan with the index and passes the changed paths to Unity
+# via -julesChangedAssets <file>. The index is rewritten after the build succeeds, i.e. after the optimizers
+# have updated the .meta files. A missing index, an index from a different automation script, or
+# --full-asset-optimization means no list is passed and the optimizers do a full pass.
+
+INDEX_PATH = os.path.join("Library", "jules_asset_index.json")
+CHANGED_ASSETS_PATH = os.path.join("Library", "jules_changed_assets.txt")
+INDEX_VERSION = 1
+CHANGED_ASSETS_ARG = "-julesChangedAssets"
+
+TEXTURE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".tga", ".psd", ".tif", ".tiff", ".bmp", ".gif", ".exr", ".hdr")
+MODEL_EXTENSIONS = (".fbx", ".obj", ".dae", ".3ds", ".blend", ".max", ".ma", ".mb")
+AUDIO_EXTENSIONS = (".wav", ".mp3", ".ogg", ".aif", ".aiff", ".flac", ".mod", ".it", ".s3m", ".xm")
+OPTIMIZED_EXTENSIONS = TEXTURE_EXTENSIONS + MODEL_EXTENSIONS + AUDIO_EXTENSIONS
+# The version string changes with every release but does not affect what the optimizers do.
+BUILD_VERSION_PATTERN = re.compile(rb'public static string buildVersion = "[^"]*";')
+
+
+def _sha256_file(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def script_fingerprint(cs_script_path):
+    # The optimizer code and flags live in the automation script; any other change there means a full pass.
+    with open(cs_script_path, "rb") as f:
+        return hashlib.sha256(BUILD_VERSION_PATTERN.sub(b"", f.read())).hexdigest()
+
+
+def _fingerprint(path, previous):
+    # Returns (size, mtime_ns, sha256); reuses the previous hash when size and mtime are unchanged.
+    file_stat = os.stat(path)
+    if previous and previous[0] == file_stat.st_size and previous[1] == file_stat.st_mtime_ns:
+        return previous
+    return [file_stat.st_size, file_stat.st_mtime_ns, _sha256_file(path)]
+
+
+def scan_assets(project_path, previous_assets=None):
+    # Returns {"Assets/...": {"file": [size, mtime_ns, sha256], "meta": [...] or None}}.
+    previous_assets = previous_assets or {}
+    assets = {}
+    assets_dir = os.path.join(project_path, "Assets")
+    for root, dirs, files in os.walk(assets_dir):
+        dirs.sort()
+        for name in sorted(files):
+            if not name.lower().endswith(OPTIMIZED_EXTENSIONS):
+                continue
+            path = os.path.join(root, name)
+            rel_path = os.path.relpath(path, project_path).replace(os.sep, "/")
+            previous = previous_assets.get(rel_path, {})
+            meta_path = path + ".meta"
+            assets[rel_path] = {
+                "file": _fingerprint(path, previous.get("file")),
+                "meta": _fingerprint(meta_path, previous.get("meta")) if os.path.isfile(meta_path) else None,
+            }
+    return assets
+
+
+def load_index(project_path):
+    try:
+        with open(os.path.join(project_path, INDEX_PATH), "r") as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return index if index.get("version") == INDEX_VERSION else None
+
+
+def _changed(previous, current):
+    if previous is None:
+        return True
+    if previous["file"][2] != current["file"][2]:
+        return True
+    meta_hashes = [entry[2] if entry else None for entry in (previous.get("meta"), current["meta"])]
+    return meta_hashes[0] != meta_hashes[1]
+
+
+def plan_optimization_pass(project_path, cs_script_path, force_full=False):
+    # Returns {"mode": "full"|"incremental", "reason", "changed": [...], "total", "scan_seconds"}.
+    start = time.monotonic()
+    index = load_index(project_path)
+    usable = index is not None and index.get("script") == script_fingerprint(cs_script_path)
+    assets = scan_assets(project_path, index["assets"] if usable else None)
+    plan = {"mode": "full", "changed": sorted(assets), "total": len(assets)}
+    if force_full:
+        plan["reason"] = "forced"
+    elif index is None:
+        plan["reason"] = "no asset index yet"
+    elif not usable:
+        plan["reason"] = "automation script changed since the last indexed build"
+    else:
+        plan["mode"] = "incremental"
+        plan["changed"] = [rel_path for rel_path, entry in sorted(assets.items()) if _changed(index["assets"].get(rel_path), entry)]
+        plan["reason"] = f"{len(plan['changed'])} of {len(assets)} asset(s) new or changed"
+    plan["scan_seconds"] = time.monotonic() - start
+    return plan
+
+
+def unity_args(project_path, plan):
+    # Extra Unity arguments for the build. An incremental pass passes the changed paths via a file, since
+    # large lists would exceed command-line limits; a full pass passes nothing.
+    if plan["mode"] != "incremental":
+        return []
+    list_path = os.path.join(project_path, CHANGED_ASSETS_PATH)
+    os.makedirs(os.path.dirname(list_path), exist_ok=True)
+    with open(list_path, "w") as f:
+        f.write("".join(rel_path + "\n" for rel_path in plan["changed"]))
+    return [CHANGED_ASSETS_ARG, list_path]
+
+
+def save_index(project_path, cs_script_path):
+    # Rescans after a successful build so the index includes the .meta files the optimizers just wrote.
+    index = load_index(project_path)
+    usable = index is not None and index.get("script") == script_fingerprint(cs_script_path)
+    assets = scan_assets(project_path, index["assets"] if usable else None)
+    path = os.path.join(project_path, INDEX_PATH)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + ".tmp", "w") as f:
+        json.dump({"version": INDEX_VERSION, "script": script_fingerprint(cs_script_path), "assets": assets}, f)
+    os.replace(path + ".tmp", path)
+    return len(assets)
+
+
+def print_plan(plan):
+    if plan["mode"] == "incremental":
+        print(f"Asset optimization: incremental pass, {plan['reason']} (scan {plan['scan_seconds']:.2f}s).")
+        for rel_path in plan["changed"][:10]:
+            print(f"  {rel_path}")
+        if len(plan["changed"]) > 10:
+            print(f"  ... and {len(plan['changed']) - 10} more")
+    else:
+        print(f"Asset optimization: full pass over {plan['total']} asset(s) ({plan['reason']}).")
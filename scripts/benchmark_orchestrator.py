@@ -0,0 +1,278 @@
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+import pipeline_trace
+
+# Benchmark harness for the create_unity_project.py orchestrator. Runs the pipeline repeatedly against
+# dummy_unity.sh, whose startup time, per-method runtime, output volume and failure rate are set through its
+# DUMMY_UNITY_* environment variables, and reports p50/p95 wall time, the orchestrator's own CPU time and
+# peak RSS. Results can be stored as a baseline and later runs compared against it, so slowdowns on the
+# Python side show up even though the (fake) Unity time dominates the wall clock.
+#
+# In "cold" mode (the default) every run starts from nothing: besides the project, the state create_unity_project.py
+# keeps next to it (BenchProject_LibraryCache, _ArtifactStore, _LogArchive, _BuildHistory.sqlite, the build and
+# smoke test workspaces) is removed, so runs are comparable. "warm" mode only removes the project, so later
+# runs restore Library/ from a snapshot and append to the stores, like a CI machine that keeps its caches.
+#
+# Settings come from, in increasing priority: DUMMY_UNITY_* variables already in the environment, the JSON
+# --config file, and command-line options. Example:
+#   python scripts/benchmark_orchestrator.py --config benchmarks/orchestrator_benchmark.json --save-baseline benchmarks/orchestrator_baseline.json
+#   python scripts/benchmark_orchestrator.py --config benchmarks/orchestrator_benchmark.json --baseline benchmarks/orchestrator_baseline.json
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.realpath(__file__)), os.path.pardir))
+PROJECT_NAME = "BenchProject"
+MODES = ("cold", "warm")
+DEFAULT_CONFIG = {
+    "iterations": 10,
+    "warmup": 1,
+    "mode": "cold",
+    "create_unity_project_args": ["--run-alpha-build", "--increment-version-after-build", "--run-smoke-tests", "--distribute-alpha-builds"],
+    "dummy": {},
+}
+# Config keys under "dummy" and the dummy_unity.sh variables they set.
+DUMMY_SETTINGS = {
+    "startup_seconds": "DUMMY_UNITY_STARTUP_SECONDS",
+    "method_seconds": "DUMMY_UNITY_METHOD_SECONDS",
+    "log_lines": "DUMMY_UNITY_LOG_LINES",
+    "stdout_lines": "DUMMY_UNITY_STDOUT_LINES",
+    "failure_rate": "DUMMY_UNITY_FAILURE_RATE",
+    "seed": "DUMMY_UNITY_SEED",
+}
+# Metric name -> (absolute slack) added on top of the relative tolerance, so timer noise on tiny values
+# is not reported as a regression.
+COMPARED_METRICS = {
+    "wall_p50": 0.05,
+    "wall_p95": 0.10,
+    "orchestrator_cpu_p50": 0.02,
+    "orchestrator_cpu_p95": 0.04,
+    "orchestrator_max_rss_kib": 2048,
+}
+DEFAULT_TOLERANCE = 0.15
+
+
+def percentile(values, pct):
+    # Linear interpolation between closest ranks, like numpy's default.
+    if not values:
+        return None
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * pct / 100.0
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def load_config(config_path, args):
+    config = json.loads(json.dumps(DEFAULT_CONFIG))
+    if config_path:
+        with open(config_path, "r") as f:
+            file_config = json.load(f)
+        config["dummy"].update(file_config.pop("dummy", {}))
+        config.update(file_config)
+    if args.iterations is not None:
+        config["iterations"] = args.iterations
+    if args.warmup is not None:
+        config["warmup"] = args.warmup
+    if args.mode is not None:
+        config["mode"] = args.mode
+    if config["mode"] not in MODES:
+        raise ValueError(f"Unknown benchmark mode '{config['mode']}'; use {' or '.join(MODES)}.")
+    if args.create_unity_project_args:
+        config["create_unity_project_args"] = args.create_unity_project_args
+    for key in DUMMY_SETTINGS:
+        value = getattr(args, key)
+        if value is not None:
+            config["dummy"][key] = value
+    for key in config["dummy"]:
+        if key not in DUMMY_SETTINGS and not key.startswith("method_seconds_"):
+            raise ValueError(f"Unknown dummy setting '{key}' in benchmark config.")
+    return config
+
+
+def dummy_environment(config):
+    env = dict(os.environ)
+    for key, value in config["dummy"].items():
+        if key.startswith("method_seconds_"):
+            # e.g. "method_seconds_PerformAlphaTestBuild": 2.5
+            env["DUMMY_UNITY_METHOD_SECONDS_" + key[len("method_seconds_"):]] = str(value)
+        else:
+            env[DUMMY_SETTINGS[key]] = str(value)
+    return env
+
+
+def reset_state(work_dir, mode):
+    # Removes the project and, in cold mode, the caches and stores kept next to it (BenchProject_*).
+    names = [PROJECT_NAME] + ([name for name in os.listdir(work_dir) if name.startswith(PROJECT_NAME + "_")] if mode == "cold" else [])
+    for name in names:
+        path = os.path.join(work_dir, name)
+        if os.path.isdir(path) and not os.path.islink(path):
+            shutil.rmtree(path)
+        elif os.path.lexists(path):
+            os.remove(path)
+
+
+def run_once(config, env, work_dir, iteration):
+    # One full pipeline run in a fresh project. Returns a sample dict.
+    reset_state(work_dir, config["mode"])
+    rusage_path = os.path.join(work_dir, "orchestrator_rusage.json")
+    if os.path.exists(rusage_path):
+        os.remove(rusage_path)
+    command = [sys.executable, os.path.join(REPO_ROOT, "scripts", "create_unity_project.py"),
+               "--project-name", PROJECT_NAME,
+               "--unity-editor-path", os.path.join(REPO_ROOT, "dummy_unity.sh"),
+               "--cs-script-source", os.path.join(REPO_ROOT, "JulesBuildAutomation.cs")] + list(config["create_unity_project_args"])
+    env = dict(env, **{pipeline_trace.RUSAGE_FILE_ENV: rusage_path})
+    if "DUMMY_UNITY_SEED" in env:
+        # Different dice per run, but the same sequence of runs for the same seed.
+        env["DUMMY_UNITY_SEED"] = str(int(env["DUMMY_UNITY_SEED"]) + 1000 * iteration)
+    children_before = resource.getrusage(resource.RUSAGE_CHILDREN) if resource else None
+    start = time.perf_counter()
+    completed = subprocess.run(command, cwd=work_dir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    wall = time.perf_counter() - start
+    sample = {"wall": wall, "returncode": completed.returncode, "orchestrator_cpu": None,
+              "orchestrator_max_rss_kib": None, "total_cpu": None}
+    if children_before is not None:
+        # Includes every process the orchestrator waited for, i.e. the fake Unity runs as well.
+        children_after = resource.getrusage(resource.RUSAGE_CHILDREN)
+        sample["total_cpu"] = (children_after.ru_utime - children_before.ru_utime) + (children_after.ru_stime - children_before.ru_stime)
+    if os.path.exists(rusage_path):
+        with open(rusage_path, "r") as f:
+            usage = json.load(f)
+        sample["orchestrator_cpu"] = usage["user_cpu"] + usage["system_cpu"]
+        sample["orchestrator_max_rss_kib"] = usage["max_rss_kib"]
+    return sample
+
+
+def summarize(samples):
+    walls = [sample["wall"] for sample in samples]
+    cpus = [sample["orchestrator_cpu"] for sample in samples if sample["orchestrator_cpu"] is not None]
+    total_cpus = [sample["total_cpu"] for sample in samples if sample["total_cpu"] is not None]
+    rss = [sample["orchestrator_max_rss_kib"] for sample in samples if sample["orchestrator_max_rss_kib"] is not None]
+    return {
+        "runs": len(samples),
+        "failures": sum(1 for sample in samples if sample["returncode"] != 0),
+        "wall_p50": percentile(walls, 50),
+        "wall_p95": percentile(walls, 95),
+        "orchestrator_cpu_p50": percentile(cpus, 50),
+        "orchestrator_cpu_p95": percentile(cpus, 95),
+        "total_cpu_p50": percentile(total_cpus, 50),
+        "orchestrator_max_rss_kib": max(rss) if rss else None,
+    }
+
+
+def compare_to_baseline(summary, baseline, tolerance):
+    # Returns a list of (metric, baseline value, current value, limit, regressed) tuples.
+    rows = []
+    for metric, slack in COMPARED_METRICS.items():
+        old = baseline["summary"].get(metric)
+        new = summary.get(metric)
+        if old is None or new is None:
+            continue
+        limit = old * (1 + tolerance) + slack
+        rows.append((metric, old, new, limit, new > limit))
+    return rows
+
+
+def format_value(metric, value):
+    if value is None:
+        return "-"
+    if metric.endswith("_kib"):
+        return f"{value / 1024:.1f} MiB"
+    if isinstance(value, float):
+        return f"{value:.3f}s"
+    return str(value)
+
+
+def print_summary(summary):
+    print("Orchestrator benchmark results:")
+    for metric, value in summary.items():
+        print(f"  {metric:<26} {format_value(metric, value)}")
+
+
+def print_comparison(rows):
+    print("Comparison with baseline:")
+    for metric, old, new, limit, regressed in rows:
+        change = f"{100.0 * (new - old) / old:+.1f}%" if old else "n/a"
+        status = "REGRESSION" if regressed else "ok"
+        print(f"  {metric:<26} {format_value(metric, old):>12} -> {format_value(metric, new):>12} {change:>8} (limit {format_value(metric, limit)}) {status}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark create_unity_project.py against a latency-configurable fake Unity (dummy_unity.sh).")
+    parser.add_argument("--config", type=str, default=None, help="JSON benchmark config (iterations, warmup, create_unity_project_args, dummy settings).")
+    parser.add_argument("--iterations", type=int, default=None, help="Measured runs.")
+    parser.add_argument("--warmup", type=int, default=None, help="Unmeasured runs before measuring.")
+    parser.add_argument("--mode", choices=MODES, default=None, help="cold: every run starts without caches or stores (default); warm: they are kept between runs.")
+    parser.add_argument("--startup-seconds", dest="startup_seconds", type=float, default=None, help="Fake editor startup time.")
+    parser.add_argument("--method-seconds", dest="method_seconds", type=float, default=None, help="Fake runtime of every executeMethod step.")
+    parser.add_argument("--log-lines", dest="log_lines", type=int, default=None, help="Filler lines the fake editor writes to its log per method.")
+    parser.add_argument("--stdout-lines", dest="stdout_lines", type=int, default=None, help="Filler lines the fake editor writes to stdout per method.")
+    parser.add_argument("--failure-rate", dest="failure_rate", type=float, default=None, help="Probability (0-1) that a fake method fails.")
+    parser.add_argument("--seed", type=int, default=None, help="Seed for the fake editor's failure dice.")
+    parser.add_argument("--work-dir", type=str, default=None, help="Directory for the benchmark project (default: a temporary directory).")
+    parser.add_argument("--output-json", type=str, default=None, help="Write samples and summary to this file.")
+    parser.add_argument("--baseline", type=str, default=None, help="Compare against this stored result and exit 1 on a regression.")
+    parser.add_argument("--save-baseline", type=str, default=None, help="Store this run's result as the baseline.")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="Allowed relative slowdown against the baseline (default 0.15).")
+    parser.add_argument("create_unity_project_args", nargs=argparse.REMAINDER, help="Arguments for create_unity_project.py after '--' (replaces the config's).")
+    args = parser.parse_args()
+    if args.create_unity_project_args and args.create_unity_project_args[0] == "--":
+        args.create_unity_project_args = args.create_unity_project_args[1:]
+
+    config = load_config(args.config, args)
+    env = dummy_environment(config)
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix="orchestrator_bench_")
+    os.makedirs(work_dir, exist_ok=True)
+    print(f"Benchmarking create_unity_project.py {' '.join(config['create_unity_project_args'])}")
+    print(f"  {config['warmup']} warmup + {config['iterations']} measured {config['mode']} runs in {work_dir}, dummy settings: {json.dumps(config['dummy'], sort_keys=True)}")
+
+    samples = []
+    try:
+        for i in range(config["warmup"] + config["iterations"]):
+            sample = run_once(config, env, work_dir, i)
+            measured = i >= config["warmup"]
+            if measured:
+                samples.append(sample)
+            label = f"run {i - config['warmup'] + 1}" if measured else "warmup"
+            print(f"  {label:<8} exit {sample['returncode']}  wall {sample['wall']:.3f}s  "
+                  f"orchestrator cpu {format_value('cpu', sample['orchestrator_cpu'])}  rss {format_value('rss_kib', sample['orchestrator_max_rss_kib'])}")
+    finally:
+        if not args.work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    summary = summarize(samples)
+    print_summary(summary)
+    result = {"config": config, "summary": summary, "samples": samples,
+              "python": sys.version.split()[0], "recorded": time.strftime("%Y-%m-%dT%H:%M:%S")}
+    if args.output_json:
+        with open(args.output_json, "w") as f:
+            json.dump(result, f, indent=2)
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"Baseline saved to {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)
+        if baseline.get("config") != config:
+            print("Warning: baseline was recorded with a different benchmark config; comparison may be meaningless.")
+        rows = compare_to_baseline(summary, baseline, args.tolerance)
+        print_comparison(rows)
+        if any(regressed for _, _, _, _, regressed in rows):
+            print("Orchestrator benchmark regressed against the baseline.")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
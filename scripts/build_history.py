@@ -0,0 +1,270 @@
+import argparse
+import os
+import re
+import sqlite3
+import time
+
+import step_cache
+import unity_log_analyzer
+
+# Build-size and build-time history of the alpha builds, in a local SQLite database (default
+# <project>_BuildHistory.sqlite next to the project). After PerformAlphaTestBuild, create_unity_project.py
+# reads the BuildReport lines from the build's Unity log (player size and build time per platform, and the
+# build version the build started with) and appends one row per version and platform, together with the error
+# count of the log and the seven optimization flags main_script.py baked into JulesBuildAutomation.cs.
+#
+# Budgets (--build-budget PLATFORM:METRIC:LIMIT, PLATFORM may be *) fail the run when a new build exceeds them:
+#   Android:size:+5%      the player may grow at most 5% over the previous version's build
+#   *:seconds:900         no platform may take more than 900 seconds to build
+#   Windows:size:300MB    absolute limit (KB, MB and GB suffixes are understood for size)
+# Metrics are size (bytes), seconds (build time) and errors (BuildReport errors plus the other errors of the
+# log the build ran in, which platforms built in one editor launch share). A growth budget compares
+# with the latest earlier version of the same project and platform built with the same optimization flags,
+# since turning a flag off is expected to change the size.
+#
+# Query with:
+#   python scripts/build_history.py RubeGoldbergVR_BuildHistory.sqlite versions [--platform Android]
+#   python scripts/build_history.py RubeGoldbergVR_BuildHistory.sqlite flags [--metric size]
+
+# JulesBuildAutomation.cs flag -> column.
+FLAG_COLUMNS = {
+    "enableTextureOptimization": "texture_optimization",
+    "enableMeshOptimization": "mesh_optimization",
+    "enableAudioOptimization": "audio_optimization",
+    "enableBatching": "batching",
+    "enableLightBakingSetup": "light_baking_setup",
+    "enablePhysicsLayerCullingSetup": "physics_layer_culling_setup",
+    "enableBuildSettingsOptimization": "build_settings_optimization",
+}
+METRICS = {"size": "size_bytes", "seconds": "build_seconds", "errors": "errors"}
+SIZE_SUFFIXES = {"KB": 1024, "MB": 1024 ** 2, "GB": 1024 ** 3}
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS builds (
+    id INTEGER PRIMARY KEY,
+    recorded REAL NOT NULL,
+    project TEXT NOT NULL,
+    version TEXT,
+    platform TEXT NOT NULL,
+    result TEXT NOT NULL,
+    size_bytes INTEGER,
+    build_seconds REAL,
+    step_seconds REAL,
+    build_errors INTEGER NOT NULL,
+    log_errors INTEGER NOT NULL,
+    errors INTEGER NOT NULL,
+    """ + ",\n    ".join(f"{column} INTEGER" for column in FLAG_COLUMNS.values()) + """
+);
+CREATE INDEX IF NOT EXISTS builds_by_platform ON builds (project, platform, id);
+"""
+DatabaseError = sqlite3.Error
+# Build matrix jobs can share one database (main_script.py --build-history) and append at the same time.
+LOCK_TIMEOUT = 30
+
+
+def default_history_path(project_path):
+    return os.path.join(os.path.dirname(project_path), os.path.basename(project_path) + "_BuildHistory.sqlite")
+
+
+def connect(path):
+    connection = sqlite3.connect(path, timeout=LOCK_TIMEOUT)
+    connection.row_factory = sqlite3.Row
+    connection.executescript(SCHEMA)
+    return connection
+
+
+def parse_budgets(values):
+    # "--build-budget Android:size:+5%" values -> [{"platform", "metric", "growth_percent" or "limit", "text"}].
+    budgets = []
+    for value in values:
+        parts = value.split(":")
+        if len(parts) != 3:
+            raise ValueError(f"Expected PLATFORM:METRIC:LIMIT, got '{value}'.")
+        platform, metric, limit = (part.strip() for part in parts)
+        if metric not in METRICS:
+            raise ValueError(f"Unknown metric '{metric}' in '{value}'; use {', '.join(METRICS)}.")
+        budget = {"platform": platform, "metric": metric, "text": value}
+        match = re.fullmatch(r"\+(\d+(?:\.\d+)?)%", limit)
+        if match:
+            budget["growth_percent"] = float(match.group(1))
+        else:
+            match = re.fullmatch(r"(\d+(?:\.\d+)?)\s*(KB|MB|GB)?", limit, re.IGNORECASE)
+            if not match or (match.group(2) and metric != "size"):
+                raise ValueError(f"Expected +PERCENT% or a number as the limit in '{value}'.")
+            budget["limit"] = float(match.group(1)) * SIZE_SUFFIXES.get((match.group(2) or "").upper(), 1)
+        budgets.append(budget)
+    return budgets
+
+
+def collect_builds(log_paths, cs_script_path, step_seconds=None):
+    # One record per BuildReport line in the given Unity logs.
+    with open(cs_script_path, "r", errors="replace") as f:
+        _, flags = step_cache.parse_cs_inputs(f.read())
+    flag_values = {column: int(flags[name]) if name in flags else None for name, column in FLAG_COLUMNS.items()}
+    records = []
+    for log_path in log_paths:
+        if not os.path.isfile(log_path):
+            continue
+        summary = unity_log_analyzer.analyze_log(log_path)
+        # The analyzer also counts the "Build failed" lines themselves as errors; those are build_errors here.
+        log_errors = max(0, summary["errors"]["count"] - sum(1 for build in summary["builds"] if build["result"] == "failed"))
+        for build in summary["builds"]:
+            records.append({"version": build["version"], "platform": build["platform"], "result": build["result"], "size_bytes": build["total_size"],
+                            "build_seconds": build["seconds"], "step_seconds": step_seconds, "build_errors": build["total_errors"],
+                            "log_errors": log_errors, "errors": build["total_errors"] + log_errors, **flag_values})
+    return records
+
+
+def _previous(connection, project, record):
+    # The latest earlier successful build of another version, same platform and optimization flags.
+    flag_filter = " AND ".join(f"{column} IS ?" for column in FLAG_COLUMNS.values())
+    return connection.execute(
+        f"SELECT * FROM builds WHERE project = ? AND platform = ? AND result = 'succeeded' AND version IS NOT ? AND {flag_filter} "
+        "ORDER BY id DESC LIMIT 1",
+        [project, record["platform"], record["version"]] + [record[column] for column in FLAG_COLUMNS.values()]).fetchone()
+
+
+def record_builds(path, project, records):
+    # Appends the records; each gets "previous" (the baseline row as a dict, or None) for reporting and budgets.
+    connection = connect(path)
+    try:
+        with connection:
+            for record in records:
+                previous = _previous(connection, project, record)
+                record["previous"] = dict(previous) if previous is not None else None
+                columns = ["recorded", "project"] + [key for key in record if key != "previous"]
+                values = [time.time(), project] + [record[key] for key in columns[2:]]
+                connection.execute(f"INSERT INTO builds ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})", values)
+    finally:
+        connection.close()
+    return records
+
+
+def _format_value(value):
+    # Sizes are bytes; "{:g}" would print 80000000 as 8e+07.
+    return f"{value:.1f}" if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+def _growth_percent(value, previous):
+    return 100.0 * (value - previous) / previous if previous else None
+
+
+def check_budgets(records, budgets):
+    # Returns one message per exceeded budget.
+    violations = []
+    for record in records:
+        if record["result"] != "succeeded":
+            continue
+        for budget in budgets:
+            if budget["platform"] not in ("*", record["platform"]):
+                continue
+            column = METRICS[budget["metric"]]
+            value = record[column]
+            if value is None:
+                continue
+            if "limit" in budget and value > budget["limit"]:
+                violations.append(f"{record['platform']} v{record['version']} {budget['metric']} is {_format_value(value)}, over the limit of {_format_value(budget['limit'])} ({budget['text']})")
+            elif "growth_percent" in budget and record["previous"] and record["previous"][column] is not None:
+                previous = record["previous"][column]
+                growth = _growth_percent(value, previous)
+                # From a zero baseline (no errors last version) any increase is over a percentage budget.
+                exceeded = growth > budget["growth_percent"] if growth is not None else value > previous
+                if exceeded:
+                    change = f"grew {growth:+.1f}%" if growth is not None else "went up from zero"
+                    violations.append(f"{record['platform']} v{record['version']} {budget['metric']} {change} over "
+                                      f"v{record['previous']['version']} ({_format_value(previous)} -> {_format_value(value)}), budget +{budget['growth_percent']:g}% ({budget['text']})")
+    return violations
+
+
+def _format_change(value, previous):
+    growth = _growth_percent(value, previous) if value is not None and previous is not None else None
+    return f" ({growth:+.1f}% vs previous)" if growth is not None else ""
+
+
+def print_history_report(records, path):
+    print(f"Build history ({path}):")
+    for record in records:
+        if record["result"] != "succeeded":
+            print(f"  {record['platform']:<8} v{record['version']} FAILED ({record['build_errors']} build errors, {record['log_errors']} log errors)")
+            continue
+        previous = record["previous"] or {}
+        seconds = f"{record['build_seconds']:.1f}s" if record["build_seconds"] is not None else "time not logged"
+        print(f"  {record['platform']:<8} v{record['version']} {record['size_bytes']} bytes{_format_change(record['size_bytes'], previous.get('size_bytes'))}, "
+              f"{seconds}{_format_change(record['build_seconds'], previous.get('build_seconds'))}, {record['errors']} errors"
+              + (f"; baseline v{previous['version']}" if previous else "; no earlier version with these flags"))
+
+
+def _flags_label(row):
+    # Compact label of the disabled flags, e.g. "-batching -audio_optimization", or "all on".
+    off = [column for column in FLAG_COLUMNS.values() if row[column] == 0]
+    return " ".join("-" + column for column in off) if off else "all on"
+
+
+def print_versions(connection, project=None, platform=None, limit=50):
+    query = "SELECT * FROM builds WHERE (? IS NULL OR project = ?) AND (? IS NULL OR platform = ?) ORDER BY id DESC LIMIT ?"
+    rows = list(reversed(connection.execute(query, [project, project, platform, platform, limit]).fetchall()))
+    print(f"{'recorded':<17} {'project':<18} {'version':<9} {'platform':<8} {'result':<9} {'size':>12} {'change':>8} {'seconds':>8} {'errors':>6}  flags")
+    last = {}
+    for row in rows:
+        key = (row["project"], row["platform"], _flags_label(row))
+        change = ""
+        if row["result"] == "succeeded" and key in last and last[key]["version"] != row["version"]:
+            growth = _growth_percent(row["size_bytes"], last[key]["size_bytes"])
+            change = f"{growth:+.1f}%" if growth is not None else ""
+        if row["result"] == "succeeded":
+            last[key] = row
+        seconds = f"{row['build_seconds']:.1f}" if row["build_seconds"] is not None else "-"
+        size = row["size_bytes"] if row["size_bytes"] is not None else "-"
+        print(f"{time.strftime('%Y-%m-%d %H:%M', time.localtime(row['recorded'])):<17} {row['project']:<18} {row['version'] or '-':<9} {row['platform']:<8} "
+              f"{row['result']:<9} {size:>12} {change:>8} {seconds:>8} {row['errors']:>6}  {_flags_label(row)}")
+
+
+def _format_mean(value):
+    return "-" if value is None else f"{value:,.0f}" if value >= 1000 else f"{value:.1f}"
+
+
+def print_flag_trends(connection, metric="size", project=None):
+    # For every platform and flag: the metric's mean over successful builds with the flag on versus off.
+    column = METRICS[metric]
+    platforms = [row[0] for row in connection.execute("SELECT DISTINCT platform FROM builds WHERE (? IS NULL OR project = ?) ORDER BY platform", [project, project])]
+    print(f"Mean {metric} per optimization flag (successful builds{f' of {project}' if project else ''}):")
+    print(f"  {'platform':<8} {'flag':<28} {'on':>14} {'builds':>6} {'off':>14} {'builds':>6} {'off vs on':>10}")
+    for platform in platforms:
+        for flag in FLAG_COLUMNS.values():
+            stats = {}
+            for value, mean, count in connection.execute(
+                    f"SELECT {flag}, AVG({column}), COUNT(*) FROM builds WHERE platform = ? AND result = 'succeeded' AND {column} IS NOT NULL "
+                    f"AND {flag} IS NOT NULL AND (? IS NULL OR project = ?) GROUP BY {flag}", [platform, project, project]):
+                stats[value] = (mean, count)
+            on_mean, on_count = stats.get(1, (None, 0))
+            off_mean, off_count = stats.get(0, (None, 0))
+            change = _growth_percent(off_mean, on_mean) if on_mean is not None and off_mean is not None else None
+            print(f"  {platform:<8} {flag:<28} {_format_mean(on_mean):>14} {on_count:>6} {_format_mean(off_mean):>14} {off_count:>6} "
+                  f"{f'{change:+.1f}%' if change is not None else '-':>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query the alpha build size and time history.")
+    parser.add_argument("history_path", help="History database, e.g. RubeGoldbergVR_BuildHistory.sqlite.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    versions_parser = commands.add_parser("versions", help="Builds per version, oldest first, with the size change against the previous version.")
+    versions_parser.add_argument("--project", default=None)
+    versions_parser.add_argument("--platform", default=None)
+    versions_parser.add_argument("--limit", type=int, default=50, help="Show the most recent this many builds.")
+    flags_parser = commands.add_parser("flags", help="How each of the seven optimization flags relates to a metric.")
+    flags_parser.add_argument("--project", default=None)
+    flags_parser.add_argument("--metric", choices=list(METRICS), default="size")
+    args = parser.parse_args()
+    if not os.path.isfile(args.history_path):
+        parser.error(f"{args.history_path} does not exist.")
+    connection = connect(args.history_path)
+    try:
+        if args.command == "versions":
+            print_versions(connection, args.project, args.platform, args.limit)
+        else:
+            print_flag_trends(connection, args.metric, args.project)
+    finally:
+        connection.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,349 @@
+import collections
+import contextvars
+import json
+import os
+import re
+import signal
+import subprocess
+import sys
+import threading
+import time
+
+import resource_profiler
+
+# Streaming subprocess runner used by run_command() in create_unity_project.py.
+# Output is written to the command log line by line as it arrives and only a bounded tail is kept in
+# memory, so a Unity player build printing hundreds of MB neither inflates the orchestrator's RSS nor
+# stays invisible until the process exits. Unity writes most of its output to its -logFile rather than
+# stdout, so that file is followed as well and its lines go through the same line handlers.
+#
+# A line handler is a callable taking (line, source) where source is "stdout" or "unity_log". It may
+# return a non-empty string to abort the run: the process tree is killed and the string becomes the
+# abort reason.
+#
+# Processes started while a ProcessScope is set in PROCESS_SCOPE are registered in it, so a caller that
+# only owns the scope (step_graph cancelling a step on timeout) can kill them from another thread. Python
+# work cannot be killed that way: long loops (artifact hashing, delta distribution) call check_cancelled(),
+# which raises Cancelled once the scope is cancelled.
+#
+# With a sample_interval, the process tree's CPU, memory, I/O and threads are sampled from /proc while it
+# runs (see resource_profiler); the result then carries "resources" (summary) and "resource_samples".
+#
+# A watchdog thread guards against hangs, which a Unity batchmode run hits on package resolution or a modal
+# dialog and never recovers from: with a timeout the process tree is killed once the command has run that
+# long, with a stall_timeout once neither its output nor its -logFile has grown for that long. The result's
+# "watchdog" then describes what fired (kind "timeout" or "stall", elapsed and idle seconds, the last output
+# lines), so the caller can record the event and retry; a hang is usually not deterministic, a failure is.
+
+DEFAULT_TAIL_LINES = 200
+MAX_LINE_CHARS = 64 * 1024
+LOG_FOLLOW_INTERVAL = 0.1
+LOG_READ_BLOCK = 1024 * 1024
+WATCHDOG_INTERVAL = 0.5
+# Unity logs asset imports, compilation and build progress as it goes; a quarter of an hour of silence is a hang.
+DEFAULT_STALL_TIMEOUT = 900
+WATCHDOG_EVENTS_FILE_NAME = "watchdog_events.jsonl"
+WATCHDOG_EVENT_LINES = 30
+
+DEFAULT_FAILURE_PATTERNS = (
+    r"Aborting batchmode due to failure",
+    r"Scripts have compiler errors",
+    r"error CS\d{4}",
+    r"JulesBuildAutomation: .*Build failed",
+)
+PROGRESS_MARKERS = ("JulesBuildAutomation:", "Jules:")
+
+
+def find_unity_log_path(command_list):
+    # The file Unity was told to log to via -logFile, if any ("-" means stdout).
+    for i, arg in enumerate(command_list[:-1]):
+        if arg == "-logFile" and command_list[i + 1] != "-":
+            return command_list[i + 1]
+    return None
+
+
+def make_failure_handler(patterns=DEFAULT_FAILURE_PATTERNS):
+    compiled = [re.compile(pattern) for pattern in patterns]
+
+    def failure_handler(line, source):
+        for pattern in compiled:
+            if pattern.search(line):
+                return f"failure pattern '{pattern.pattern}' matched in {source}: {line.strip()}"
+        return None
+    return failure_handler
+
+
+def make_progress_printer(prefix=""):
+    # Echo stdout as it arrives; from the (much noisier) Unity log only echo the automation's own messages.
+    # The prefix tells concurrent commands apart, e.g. "[Android] ".
+    def print_progress(line, source):
+        if source == "stdout":
+            print(f"  {prefix}| {line.rstrip()}")
+        elif any(marker in line for marker in PROGRESS_MARKERS):
+            print(f"  {prefix}> {line.rstrip()}")
+        sys.stdout.flush()
+        return None
+    return print_progress
+
+
+print_progress = make_progress_printer()
+
+
+def kill_process_tree(process):
+    # Processes are started in their own session, so the group id equals the child's pid and the
+    # whole tree (Unity plus its helper processes) can be signalled at once.
+    if process.poll() is not None:
+        return
+    try:
+        if hasattr(os, "killpg"):
+            os.killpg(process.pid, signal.SIGKILL)
+        else:
+            process.kill()
+    except ProcessLookupError:
+        pass
+
+
+class ProcessScope:
+    # A nested scope also registers its processes in the parent, so cancelling either one kills them.
+    def __init__(self, parent=None):
+        self.parent = parent
+        self.processes = set()
+        self.cancel_reason = None
+        self.lock = threading.Lock()
+
+    def add(self, process):
+        if self.parent is not None:
+            self.parent.add(process)
+        with self.lock:
+            self.processes.add(process)
+            cancelled = self.cancel_reason is not None
+        if cancelled:  # Started after cancel(); don't let it run.
+            kill_process_tree(process)
+
+    def discard(self, process):
+        if self.parent is not None:
+            self.parent.discard(process)
+        with self.lock:
+            self.processes.discard(process)
+
+    def cancel(self, reason):
+        with self.lock:
+            if self.cancel_reason is None:
+                self.cancel_reason = reason
+            processes = list(self.processes)
+        for process in processes:
+            kill_process_tree(process)
+
+
+PROCESS_SCOPE = contextvars.ContextVar("command_runner_process_scope", default=None)
+
+
+class _LogFollower(threading.Thread):
+    # Tails a log file written by the child process and hands complete lines to a callback.
+    def __init__(self, path, on_line):
+        super().__init__(daemon=True)
+        self.path = path
+        self.on_line = on_line
+        self.offset = 0
+        self.pending = ""
+        self.last_growth = time.monotonic()
+        self.stop_event = threading.Event()
+
+    def _read_new_lines(self):
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            return
+        if size < self.offset:
+            self.offset = 0
+            self.pending = ""
+        if size == self.offset:
+            return
+        self.last_growth = time.monotonic()  # Also counts partial lines, e.g. a progress line without newline yet.
+        # Read in bounded blocks so a burst of log output doesn't get materialised in memory all at once.
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            while self.offset < size:
+                chunk = f.read(min(LOG_READ_BLOCK, size - self.offset))
+                if not chunk:
+                    break
+                self.offset += len(chunk)
+                lines = (self.pending + chunk.decode("utf-8", errors="replace")).split("\n")
+                self.pending = lines.pop()[-MAX_LINE_CHARS:]
+                for line in lines:
+                    self.on_line(line + "\n")
+
+    def run(self):
+        while not self.stop_event.wait(LOG_FOLLOW_INTERVAL):
+            self._read_new_lines()
+
+    def finish(self):
+        self.stop_event.set()
+        self.join()
+        self._read_new_lines()
+        if self.pending:
+            self.on_line(self.pending + "\n")
+            self.pending = ""
+
+
+class _Watchdog(threading.Thread):
+    # Kills the process tree once it has run for timeout seconds, or once the last activity (see
+    # run_streaming_command) is stall_timeout seconds ago. Either limit may be None.
+    def __init__(self, abort, last_activity, timeout=None, stall_timeout=None):
+        super().__init__(daemon=True, name="watchdog")
+        self.abort = abort
+        self.last_activity = last_activity
+        self.timeout = timeout
+        self.stall_timeout = stall_timeout
+        self.started = time.monotonic()
+        self.stop_event = threading.Event()
+        limits = [limit for limit in (timeout, stall_timeout) if limit]
+        self.interval = min([WATCHDOG_INTERVAL] + [limit / 4 for limit in limits])
+
+    def run(self):
+        while not self.stop_event.wait(self.interval):
+            now = time.monotonic()
+            elapsed, idle = now - self.started, now - self.last_activity()
+            if self.timeout and elapsed >= self.timeout:
+                self.abort("timeout", f"killed by the watchdog after {elapsed:.0f}s (command timeout {self.timeout:g}s)", elapsed, idle)
+                return
+            if self.stall_timeout and idle >= self.stall_timeout:
+                self.abort("stall", f"killed by the watchdog: no output or log growth for {idle:.0f}s (stall timeout {self.stall_timeout:g}s)", elapsed, idle)
+                return
+
+    def finish(self):
+        self.stop_event.set()
+        self.join()
+
+
+def cancel_reason():
+    # Why the caller's ProcessScope (or an enclosing one) was cancelled, or None.
+    scope = PROCESS_SCOPE.get()
+    while scope is not None:
+        if scope.cancel_reason is not None:
+            return scope.cancel_reason
+        scope = scope.parent
+    return None
+
+
+class Cancelled(Exception):
+    pass
+
+
+def check_cancelled():
+    reason = cancel_reason()
+    if reason is not None:
+        raise Cancelled(reason)
+
+
+def retry_delay(attempt, backoff):
+    # Exponential backoff: backoff seconds before the first retry, doubling for each one after it.
+    return backoff * 2 ** (attempt - 1)
+
+
+def append_watchdog_event(path, event):
+    # One JSON object per line, appended across runs, so recurring hangs of a step show up side by side.
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "a") as f:
+        f.write(json.dumps(event) + "\n")
+
+
+def wait_before_retry(seconds):
+    # Sleeps, but returns False as soon as the caller's scope is cancelled (another step failed, Ctrl+C).
+    deadline = time.monotonic() + seconds
+    while cancel_reason() is None:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return True
+        time.sleep(min(WATCHDOG_INTERVAL, remaining))
+    return False
+
+
+def run_streaming_command(command_list, log_file_path=None, cwd=None, line_handlers=(), tail_lines=DEFAULT_TAIL_LINES, sample_interval=None,
+                          timeout=None, stall_timeout=None):
+    # Returns a dict with succeeded, returncode, abort_reason, error and the last tail_lines lines of output.
+    tail = collections.deque(maxlen=tail_lines)
+    lock = threading.Lock()
+    state = {"abort_reason": None, "process": None, "last_activity": time.monotonic(), "watchdog": None}
+
+    def handle_line(line, source):
+        with lock:
+            state["last_activity"] = time.monotonic()
+            tail.append(line if source == "stdout" else f"[unity log] {line}")
+            for handler in line_handlers:
+                reason = handler(line, source)
+                if reason and state["abort_reason"] is None:
+                    state["abort_reason"] = reason
+                    kill_process_tree(state["process"])
+
+    def last_activity():
+        return max(state["last_activity"], follower.last_growth if follower else 0.0)
+
+    def watchdog_abort(kind, reason, elapsed, idle):
+        with lock:
+            if state["abort_reason"] is not None:
+                return
+            state["abort_reason"] = reason
+            state["watchdog"] = {"kind": kind, "reason": reason, "elapsed": round(elapsed, 1), "idle": round(idle, 1),
+                                 "last_lines": list(tail)[-WATCHDOG_EVENT_LINES:]}
+            kill_process_tree(state["process"])
+
+    unity_log_path = find_unity_log_path(command_list)
+    if unity_log_path and os.path.exists(unity_log_path):
+        os.remove(unity_log_path)  # Unity truncates it on startup anyway; don't replay a previous run's log.
+
+    try:
+        process = subprocess.Popen(command_list, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                   text=True, errors="replace", bufsize=1, start_new_session=True)
+    except FileNotFoundError:
+        return {"succeeded": False, "returncode": None, "abort_reason": None, "error": "not_found", "tail": [],
+                "resources": None, "resource_samples": [], "watchdog": None}
+    state["process"] = process
+    sampler = resource_profiler.start_sampler(process.pid, sample_interval) if sample_interval else None
+    scope = PROCESS_SCOPE.get()
+    if scope is not None:
+        scope.add(process)
+
+    follower = None
+    if unity_log_path:
+        follower = _LogFollower(unity_log_path, lambda line: handle_line(line, "unity_log"))
+        follower.start()
+    watchdog = None
+    if timeout or stall_timeout:
+        watchdog = _Watchdog(watchdog_abort, last_activity, timeout, stall_timeout)
+        watchdog.start()
+
+    log_file = open(log_file_path, "w", buffering=1) if log_file_path else None
+    try:
+        for line in iter(lambda: process.stdout.readline(MAX_LINE_CHARS), ""):
+            if log_file:
+                log_file.write(line)
+            handle_line(line, "stdout")
+        returncode = process.wait()
+    except KeyboardInterrupt:
+        kill_process_tree(process)
+        process.wait()
+        raise
+    finally:
+        if watchdog:
+            watchdog.finish()
+        resources, resource_samples = sampler.finish() if sampler else (None, [])
+        process.stdout.close()
+        if scope is not None:
+            scope.discard(process)
+        if follower:
+            follower.finish()
+        if log_file:
+            log_file.close()
+
+    abort_reason = state["abort_reason"] or cancel_reason()
+    return {
+        "succeeded": returncode == 0 and abort_reason is None,
+        "returncode": returncode,
+        "abort_reason": abort_reason,
+        "error": None,
+        "tail": list(tail),
+        "resources": resources,
+        "resource_samples": resource_samples,
+        "watchdog": state["watchdog"],
+    }
@@ -1,149 +1,551 @@
-import subprocess
 import os
 import argparse
-import time
 import shutil
+import time
+import artifact_store
+import asset_index
+import build_history
+import command_runner
+import delta_distribution
+import library_cache
+import log_archive
+import package_manifest
+import pipeline_trace
+import platform_builds
+import resource_profiler
+import rube_goldberg_sim
+import smoke_tests
+import step_cache
+import step_graph
+import unity_log_analyzer
+import unity_pipeline
+import unity_readiness
 
-# This script automates the creation of a new Unity project (if it doesn't already exist)
-# and then sets up the project for VR development by executing the JulesBuildAutomation.SetupVRProject method.
-# The SetupVRProject method, defined in JulesBuildAutomation.cs, handles:
-# 1. Installation of XR packages (OpenXR, XR Interaction Toolkit).
-# 2. Configuration of XR settings for Standalone (Windows) and Android.
-# 3. Automatic execution of JulesBuildAutomation.SetupRubeGoldbergGame, which includes:
-#    - Basic VR scene setup (XR Origin, controllers, ground plane).
-#    - Addition of interactable physics objects.
-#    - Creation of Rube Goldberg machine prefabs (Ramp, Lever, Domino).
-
-parser = argparse.ArgumentParser(description="Create and setup a Unity project for VR development, including Rube Goldberg game elements.")
-parser.add_argument("--unity-editor-path", type=str, default="dummy_unity.sh",
-                    help="Path to the Unity Editor executable (e.g., 'C:/Program Files/Unity/Editor/Unity.exe' or 'dummy_unity.sh')")
-parser.add_argument("--project-name", type=str, default="RubeGoldbergVR",
-                    help="Name of the Unity project to create.")
-parser.add_argument("--unity-version", type=str, default="2023.2.14f1",
-                    help="Unity LTS version to use (e.g., 2023.2.14f1)")
-
+parser = argparse.ArgumentParser(description="Create and setup a Unity project for VR development, with an option to run Alpha Test builds.")
+parser.add_argument("--unity-editor-path", type=str, default="dummy_unity.sh", help="Path to the Unity Editor executable")
+parser.add_argument("--project-name", type=str, default="RubeGoldbergVR", help="Name of the Unity project to create.")
+parser.add_argument("--unity-version", type=str, default="2023.2.14f1", help="Unity LTS version to use")
 script_dir = os.path.dirname(os.path.realpath(__file__))
-# Assumes JulesBuildAutomation.cs is in the parent directory of this script's directory (i.e., the repository root)
 default_cs_script_source = os.path.abspath(os.path.join(script_dir, os.path.pardir, "JulesBuildAutomation.cs"))
-parser.add_argument("--cs-script-source", type=str, default=default_cs_script_source,
-                    help="Source path of the C# Editor script (JulesBuildAutomation.cs) to be deployed.")
-
+parser.add_argument("--cs-script-source", type=str, default=default_cs_script_source, help="Source path of the C# Editor script")
+parser.add_argument("--run-alpha-build", action="store_true", help="Run Alpha Test builds after project setup.")
+parser.add_argument("--increment-version-after-build", action="store_true", help="Increment build version via Unity after a successful build.")
+parser.add_argument("--run-smoke-tests", action="store_true", help="Run smoke tests after a successful alpha build.")
+parser.add_argument("--distribute-alpha-builds", action="store_true", help="Distribute alpha builds after successful smoke tests.")
+parser.add_argument("--pipeline-mode", action="store_true", help="Run SetupVRProject and all requested alpha build steps in a single Unity launch via JulesBuildAutomation.RunPipeline.")
+parser.add_argument("--script-ready-timeout", type=float, default=unity_readiness.DEFAULT_TIMEOUT, help="Maximum seconds to wait for Unity to pick up the deployed C# script.")
+parser.add_argument("--unity-log-path", type=str, default=None, help="Log file of an already running editor to watch for recompilation (defaults to the platform Editor.log).")
+parser.add_argument("--fail-pattern", action="append", default=[], help="Extra regex that stops a Unity step early when it appears in its output or log. Can be repeated.")
+parser.add_argument("--output-tail-lines", type=int, default=command_runner.DEFAULT_TAIL_LINES, help="Number of trailing output lines kept in memory and shown when a step fails.")
+parser.add_argument("--parallel-platform-builds", action="store_true", help="Build each platform concurrently in its own workspace copy and Unity process instead of one PerformAlphaTestBuild run.")
+parser.add_argument("--build-platforms", type=lambda value: value.split(","), default=list(platform_builds.PLATFORM_BUILDS), help="Comma-separated platforms for --parallel-platform-builds (default: Windows,Android).")
+parser.add_argument("--max-parallel-builds", type=int, default=None, help="Maximum number of concurrent platform builds (default: one per platform).")
+parser.add_argument("--workspace-root", type=str, default=None, help="Directory for per-platform workspace copies (default: <project>_BuildWorkspaces next to the project).")
+parser.add_argument("--force", action="store_true", help="Ignore the step cache and re-run every step.")
+parser.add_argument("--force-step", action="append", default=[], choices=step_cache.CACHEABLE_STEPS, help="Ignore the step cache for this step. Can be repeated.")
+parser.add_argument("--trace-dir", type=str, default=None, help="Directory for the Chrome trace JSON and timeline summary (default: <project>/Logs).")
+parser.add_argument("--no-trace", action="store_true", help="Do not record a timeline trace of this run.")
+parser.add_argument("--no-log-analysis", action="store_true", help="Do not summarise each Unity log into <log>.metrics.json after its step.")
+parser.add_argument("--full-asset-optimization", action="store_true", help="Run the texture/mesh/audio import optimizers over every asset instead of only new or changed ones.")
+parser.add_argument("--artifact-store", type=str, default=None, help="Deduplicating store that successful alpha builds are registered in (default: <project>_ArtifactStore next to the project).")
+parser.add_argument("--no-artifact-store", action="store_true", help="Do not register alpha build outputs in the artifact store.")
+parser.add_argument("--sync-version-file", type=str, default=None, help="After the version increment, copy the project's new build version into this file (e.g. the repository's build_version.txt).")
+parser.add_argument("--build-history", type=str, default=None, help="SQLite database that every alpha build's size, build time and error count is appended to, per version and platform (default: <project>_BuildHistory.sqlite next to the project).")
+parser.add_argument("--no-build-history", action="store_true", help="Do not record alpha builds in the build history.")
+parser.add_argument("--build-budget", action="append", default=[], help="Fail the run when an alpha build exceeds this budget, as PLATFORM:METRIC:LIMIT with METRIC size, seconds or errors and LIMIT +PERCENT%% (growth over the previous version) or an absolute value, e.g. Android:size:+5%% or *:seconds:900. Can be repeated.")
+parser.add_argument("--step-timeout", action="append", default=[], help="Per-step timeout as STEP=SECONDS, e.g. alpha_build=3600. A step that runs over is cancelled and its Unity processes killed. Can be repeated.")
+parser.add_argument("--default-step-timeout", type=float, default=None, help="Timeout in seconds for steps without their own --step-timeout (default: none).")
+parser.add_argument("--command-timeout", type=float, default=None, help="Hard wall-clock limit in seconds for each Unity launch; its process group is killed when it runs over (default: none).")
+parser.add_argument("--stall-timeout", type=float, default=command_runner.DEFAULT_STALL_TIMEOUT, help="Kill a Unity launch whose output and -logFile have not grown for this many seconds (0 disables).")
+parser.add_argument("--hang-retries", type=int, default=1, help="How often a Unity launch killed by --command-timeout or --stall-timeout is retried.")
+parser.add_argument("--hang-retry-backoff", type=float, default=30.0, help="Seconds to wait before the first hang retry; doubles with every further retry.")
+parser.add_argument("--artifact-keep-last", type=int, default=None, help="After registering, keep only this many versions per platform in the artifact store.")
+parser.add_argument("--smoke-tests", type=lambda value: value.split(","), default=None, help="Comma-separated smoke test cases to run (default: all).")
+parser.add_argument("--smoke-test-spec", type=str, default=None, help="JSON list of {\"name\", \"platforms\"} smoke test cases to use instead of the built-in ones.")
+parser.add_argument("--smoke-shards", type=int, default=smoke_tests.DEFAULT_SHARDS_PER_PLATFORM, help="Number of concurrent smoke test processes per platform.")
+parser.add_argument("--smoke-player", type=str, default=None, help="Run smoke tests with this headless player executable instead of editor processes; {build_dir}, {platform} and {project} are substituted.")
+parser.add_argument("--smoke-keep-going", action="store_true", help="Run every smoke test even after one has failed, instead of stopping all shards early.")
+parser.add_argument("--distribution-dir", type=str, default=None, help="Where --distribute-alpha-builds puts the newest build of each platform (default: <project>/Distribution).")
+parser.add_argument("--distribution-workers", type=int, default=delta_distribution.DEFAULT_WORKERS, help="Files distributed concurrently.")
+parser.add_argument("--library-cache", type=str, default=None, help="Directory of compressed Library/ snapshots used to seed fresh projects (default: <project>_LibraryCache next to the project).")
+parser.add_argument("--no-library-cache", action="store_true", help="Neither seed Library/ from nor add snapshots to the Library/ cache.")
+parser.add_argument("--library-cache-max-gb", type=float, default=library_cache.DEFAULT_MAX_BYTES / 1024 ** 3, help="Size cap of the Library/ cache; least recently used snapshots are evicted beyond it.")
+parser.add_argument("--package-cache", type=str, default=None, help="Directory of <name>-<version>.tgz package tarballs: cached packages are installed from it instead of downloaded, and packages resolved during setup are added to it.")
+parser.add_argument("--package-registry", type=str, default=None, help="URL of a local or mirrored registry added as a scoped registry for the XR packages.")
+parser.add_argument("--no-package-manifest", action="store_true", help="Leave Packages/manifest.json alone and let SetupVRProject install the XR packages itself.")
+parser.add_argument("--log-archive", type=str, default=None, help="Directory of the compressed, indexed archive every run's logs are streamed into (default: <project>_LogArchive next to the project).")
+parser.add_argument("--no-log-archive", action="store_true", help="Do not archive this run's logs.")
+parser.add_argument("--log-archive-keep-runs", type=int, default=log_archive.DEFAULT_KEEP_RUNS, help="Number of most recent runs the log archive keeps.")
+parser.add_argument("--log-archive-max-gb", type=float, default=log_archive.DEFAULT_MAX_BYTES / 1024 ** 3, help="Size cap of the log archive; the oldest runs are removed beyond it.")
+parser.add_argument("--resource-sample-interval", type=float, default=resource_profiler.DEFAULT_INTERVAL, help="Seconds between /proc samples of each Unity process tree's CPU, memory, I/O and threads.")
+parser.add_argument("--no-resource-profile", action="store_true", help="Do not sample the resource usage of Unity processes.")
+parser.add_argument("--rube-goldberg-layout", action="append", default=[], help="Rube Goldberg layout JSON to simulate headlessly before anything opens Unity; the run stops if no layout in it is accepted. Can be repeated.")
+parser.add_argument("--layout-max-seconds", type=float, default=rube_goldberg_sim.DEFAULT_BUDGET["max_seconds"], help="Longest acceptable chain reaction for --rube-goldberg-layout.")
+parser.add_argument("--layout-max-bodies", type=int, default=rube_goldberg_sim.DEFAULT_BUDGET["max_bodies"], help="Most rigidbodies a --rube-goldberg-layout may use.")
+parser.add_argument("--layout-max-peak-awake", type=int, default=rube_goldberg_sim.DEFAULT_BUDGET["max_peak_awake"], help="Most rigidbodies a --rube-goldberg-layout may have awake at once.")
 args = parser.parse_args()
+STEP_NAMES = ("simulate_layouts", "create_project", "prepare_packages", "restore_library", "deploy_script", "cache_packages", "snapshot_library", "setup_vr_project", "pipeline", "alpha_build", "save_asset_index", "register_artifacts",
+              "record_build_history", "increment_version", "sync_version_file", "smoke_tests", "distribute")
+if args.parallel_platform_builds and args.pipeline_mode:
+    parser.error("--parallel-platform-builds needs one Unity process per platform and cannot be combined with --pipeline-mode.")
+for platform_name in args.build_platforms:
+    if platform_name not in platform_builds.PLATFORM_BUILDS:
+        parser.error(f"Unknown platform '{platform_name}' in --build-platforms.")
+try:
+    step_timeouts = step_graph.parse_timeouts(args.step_timeout)
+except ValueError as e:
+    parser.error(f"--step-timeout: {e}")
+try:
+    build_budgets = build_history.parse_budgets(args.build_budget)
+except ValueError as e:
+    parser.error(f"--build-budget: {e}")
+if build_budgets and args.no_build_history:
+    parser.error("--build-budget needs the build history; drop --no-build-history.")
+if args.stall_timeout < 0 or (args.command_timeout is not None and args.command_timeout <= 0):
+    parser.error("--stall-timeout must not be negative and --command-timeout must be positive.")
+if args.hang_retries < 0 or args.hang_retry_backoff < 0:
+    parser.error("--hang-retries and --hang-retry-backoff must not be negative.")
+if args.log_archive_keep_runs < 1:
+    parser.error("--log-archive-keep-runs must be at least 1.")
+if args.resource_sample_interval <= 0:
+    parser.error("--resource-sample-interval must be positive.")
+if args.smoke_shards < 1:
+    parser.error("--smoke-shards must be at least 1.")
+try:
+    smoke_test_cases = smoke_tests.load_cases(args.smoke_test_spec, args.smoke_tests)
+except (OSError, ValueError) as e:
+    parser.error(f"--smoke-tests: {e}")
+for step_name in step_timeouts:
+    if step_name not in STEP_NAMES:
+        parser.error(f"Unknown step '{step_name}' in --step-timeout. Steps: {', '.join(STEP_NAMES)}")
 
+print(f"CREATE_UNITY_PROJECT.PY: Received project_name: {args.project_name}")
+print(f"CREATE_UNITY_PROJECT.PY: Received run_alpha_build: {args.run_alpha_build}")
 project_path = os.path.abspath(args.project_name)
 unity_editor_path = args.unity_editor_path
 cs_script_source_path = args.cs_script_source
 cs_script_dest_path = os.path.join(project_path, "Assets", "Editor", "JulesBuildAutomation.cs")
+pipeline_trace.record_rusage_at_exit()
+if not args.no_trace:
+    pipeline_trace.start_tracing(args.trace_dir or os.path.join(project_path, "Logs"))
+library_cache_path = os.path.abspath(args.library_cache) if args.library_cache else library_cache.default_cache_path(project_path)
+library_snapshot_key = {}  # Inputs SetupVRProject started from, captured when it actually runs.
+artifact_store_path = os.path.abspath(args.artifact_store) if args.artifact_store else artifact_store.default_store_path(project_path)
+build_history_path = os.path.abspath(args.build_history) if args.build_history else build_history.default_history_path(project_path)
+# Steps run as a dependency graph: independent ones overlap, and steps that open the project in Unity hold
+# the "unity_project" resource so only one editor uses it at a time.
+graph = step_graph.StepGraph(default_timeout=args.default_step_timeout, timeouts=step_timeouts)
+UNITY_PROJECT = ("unity_project",)
+run_log_archive = None
+if not args.no_log_archive:
+    try:
+        run_log_archive = log_archive.RunArchive(os.path.abspath(args.log_archive) if args.log_archive else log_archive.default_archive_path(project_path), info={"project": args.project_name})
+    except OSError as e:
+        print(f"Warning: could not open the log archive, this run's logs are not archived: {e}")
+resource_records = []  # One {"step", "command", "summary"} per profiled command, in completion order.
 
-def run_command(command_list, log_file_name=None, cwd=None):
-    print(f"Executing command: {{ ' '.join(command_list) }}")
+def run_command(command_list, log_file_name=None, cwd=None, line_handlers=None):
+    print(f"Executing command: { ' '.join(command_list) }")
     log_file_path = None
     if log_file_name:
-        log_dir = os.path.join(project_path, "Logs")
-        os.makedirs(log_dir, exist_ok=True)
+        log_dir = os.path.join(project_path, "Logs"); os.makedirs(log_dir, exist_ok=True)
         log_file_path = os.path.join(log_dir, log_file_name)
-        print(f"Command output will be logged to: {{log_file_path}}")
+    if line_handlers is None:
+        failure_patterns = command_runner.DEFAULT_FAILURE_PATTERNS + tuple(args.fail_pattern)
+        line_handlers = [command_runner.print_progress, command_runner.make_failure_handler(failure_patterns)]
+    unity_log_path = command_runner.find_unity_log_path(command_list)
+    # Only a launch the watchdog killed is retried: a hang is usually transient, a build error is not.
+    for attempt in range(1, args.hang_retries + 2):
+        attempt_handlers = list(line_handlers)
+        log_spans = pipeline_trace.make_unity_log_spans()
+        if log_spans:
+            attempt_handlers.append(log_spans)
+        archive_handler = None
+        if run_log_archive:
+            stream_names = {"stdout": log_file_name or pipeline_trace.describe_command(command_list), "unity_log": os.path.basename(unity_log_path or "unity_log")}
+            archive_handler = log_archive.ArchiveHandler(run_log_archive, stream_names, step=step_graph.CURRENT_STEP.get(), attempt=attempt)
+            attempt_handlers.append(archive_handler)
+        with pipeline_trace.span(pipeline_trace.describe_command(command_list), "subprocess") as span_args:
+            result = command_runner.run_streaming_command(command_list, log_file_path, cwd=cwd, line_handlers=attempt_handlers, tail_lines=args.output_tail_lines,
+                                                          sample_interval=None if args.no_resource_profile else args.resource_sample_interval,
+                                                          timeout=args.command_timeout, stall_timeout=args.stall_timeout or None)
+            if log_spans: log_spans.finish()
+            if archive_handler: archive_handler.finish()
+            span_args["returncode"] = result["returncode"]
+            if attempt > 1: span_args["attempt"] = attempt
+            if result["resources"]:
+                record_resources(command_list, log_file_path, result, span_args)
+            if result["watchdog"]: span_args["watchdog"] = result["watchdog"]["kind"]
+            span_args["status"] = "ok" if result["succeeded"] else "failed"
+        if not result["watchdog"]:
+            break
+        retrying = attempt <= args.hang_retries and command_runner.cancel_reason() is None
+        record_watchdog_event(command_list, unity_log_path, result["watchdog"], attempt, retrying)
+        if not retrying:
+            break
+        delay = command_runner.retry_delay(attempt, args.hang_retry_backoff)
+        print(f"Retrying in {delay:g}s (attempt {attempt + 1} of {args.hang_retries + 1})...")
+        if not command_runner.wait_before_retry(delay):
+            break
+    if result["error"] == "not_found":
+        print(f"Error: Executable not found: {command_list[0]}"); return False
+    if result["abort_reason"]:
+        print(f"Stopped early: {result['abort_reason']}")
+    if not result["succeeded"]:
+        print(f"Error executing command (exit code {result['returncode']}). Last {len(result['tail'])} output lines:")
+        print("".join(result["tail"]), end="")
+    if not args.no_log_analysis and unity_log_path and os.path.isfile(unity_log_path):
+        # Runs in the background, overlapping with whatever step comes next.
+        graph.spawn(f"analyze {os.path.basename(unity_log_path)}", lambda: analyze_unity_log(unity_log_path))
+    return result["succeeded"]
+
+def record_watchdog_event(command_list, unity_log_path, watchdog, attempt, retrying):
+    # The hung attempt's Unity log is kept next to the next attempt's for the post-mortem.
+    if retrying and unity_log_path and os.path.isfile(unity_log_path):
+        kept_log_path = f"{unity_log_path}.attempt{attempt}"
+        os.replace(unity_log_path, kept_log_path)
+        unity_log_path = kept_log_path
+    event = {"time": time.strftime("%Y-%m-%dT%H:%M:%S"), "step": step_graph.CURRENT_STEP.get(), "command": pipeline_trace.describe_command(command_list),
+             "attempt": attempt, "retrying": retrying, "unity_log": unity_log_path, **watchdog}
+    command_runner.append_watchdog_event(os.path.join(project_path, "Logs", command_runner.WATCHDOG_EVENTS_FILE_NAME), event)
+    print(f"Watchdog: {watchdog['reason']}. Last {len(watchdog['last_lines'])} output lines:")
+    print("".join(watchdog["last_lines"]), end="")
+
+def record_resources(command_list, log_file_path, result, span_args):
+    summary = result["resources"]
+    span_args.update(cpu_seconds=summary["cpu_seconds"], peak_rss_mb=round(summary["peak_rss_bytes"] / 1024 ** 2, 1))
+    if log_file_path:
+        resource_profiler.write_command_profile(log_file_path + ".resources.json", command_list, summary, result["resource_samples"])
+    resource_records.append({"step": step_graph.CURRENT_STEP.get() or "(no step)", "command": pipeline_trace.describe_command(command_list), "summary": summary})
+
+def analyze_unity_log(unity_log_path):
+    with pipeline_trace.span("Analyze Unity log", "analysis"):
+        metrics_path, log_summary = unity_log_analyzer.write_metrics(unity_log_path)
+    print(f"Log metrics ({os.path.basename(metrics_path)}): {unity_log_analyzer.format_brief(log_summary)}")
+    for message in log_summary["errors"]["messages"][:5]:
+        print(f"  {message}")
+    return True
+
+step_cache_manifest = step_cache.load_manifest(project_path)
+step_cache_report = []
+
+def step_is_cached(step, inputs):
+    hit, reason = step_cache.check_step(step_cache_manifest, step, inputs, project_path, forced=args.force or step in args.force_step)
+    step_cache_report.append((step, hit, reason))
+    return hit
+
+def unity_method_command(method, log_name):
+    return [unity_editor_path, "-batchmode", "-quit", "-projectPath", project_path, "-executeMethod", f"JulesBuildAutomation.{method}", "-logFile", os.path.join(project_path, "Logs", log_name)]
+
+def simulate_layouts():
+    # Cheap enough to run before every build; a layout that never completes is not worth a scene build.
+    print(f"Step 0: Simulating Rube Goldberg layouts from {', '.join(args.rube_goldberg_layout)}...")
+    try:
+        layouts = rube_goldberg_sim.load_layouts(args.rube_goldberg_layout)
+    except (OSError, ValueError) as e:
+        print(f"Error loading Rube Goldberg layouts: {e}"); return False
+    budget = {"max_seconds": args.layout_max_seconds, "max_bodies": args.layout_max_bodies, "max_peak_awake": args.layout_max_peak_awake}
+    with pipeline_trace.span("Simulate Rube Goldberg layouts", "simulation") as span_args:
+        results = rube_goldberg_sim.evaluate_layouts(layouts, budget)
+        span_args["layouts"] = len(results)
+        span_args["accepted"] = sum(1 for result in results if result["accepted"])
+    rube_goldberg_sim.print_layout_report(results)
+    if not span_args["accepted"]: print("No Rube Goldberg layout passed the simulation."); return False
+    return True
+
+def create_project():
+    print(f"Step 1: Creating Unity project '{args.project_name}'...")
+    create_project_command = [unity_editor_path, "-quit", "-batchmode", "-createProject", project_path, "-logFile", os.path.join(project_path, "Logs", "unity_create_project.log"), "-version", args.unity_version]
+    return run_command(create_project_command, "cmd_unity_create_project.log")
+
+def deploy_script():
+    print("Step 2: Deploying JulesBuildAutomation.cs...")
+    os.makedirs(os.path.dirname(cs_script_dest_path), exist_ok=True)
+    if not os.path.exists(cs_script_source_path): print(f"Error: Source C# script not found: {cs_script_source_path}"); return False
+    deploy_inputs = step_cache.compute_step_inputs("DeployScript", project_path, cs_script_source_path, args.unity_version)
+    if step_is_cached("DeployScript", deploy_inputs):
+        print("JulesBuildAutomation.cs is unchanged since the last deploy (step cache hit). Skipping deploy and readiness wait.")
+        return True
+    try:
+        shutil.copy(cs_script_source_path, cs_script_dest_path)
+        print(f"JulesBuildAutomation.cs deployed to {cs_script_dest_path}.")
+    except Exception as e: print(f"Error deploying C# script: {e}"); return False
+    step_cache.record_step(step_cache_manifest, "DeployScript", deploy_inputs, project_path)
+    with pipeline_trace.span("Wait for script ready", "wait") as span_args:
+        readiness = unity_readiness.wait_for_script_ready(project_path, cs_script_dest_path, unity_log_path=args.unity_log_path, timeout=args.script_ready_timeout)
+        span_args["method"] = readiness["method"]
+        span_args["status"] = "ok" if readiness["ready"] else "timed out"
+    unity_readiness.print_wait_report(readiness)
+    return True
+
+def record_setup_step():
+    # Recomputed after the run because SetupVRProject itself changes inputs such as Packages/manifest.json.
+    step_cache.record_step(step_cache_manifest, "SetupVRProject", step_cache.compute_step_inputs("SetupVRProject", project_path, cs_script_source_path, args.unity_version), project_path)
 
+def prepare_packages():
+    with open(cs_script_source_path, "r", errors="replace") as f:
+        xr_packages, _ = step_cache.parse_cs_inputs(f.read())
     try:
-        process = subprocess.run(command_list, check=True, capture_output=True, text=True, cwd=cwd)
-        if log_file_path:
-            with open(log_file_path, "w") as f:
-                f.write("STDOUT:\n")
-                f.write(process.stdout)
-                f.write("\nSTDERR:\n")
-                f.write(process.stderr)
-        print("STDOUT:", process.stdout)
-        if process.stderr:
-            print("STDERR:", process.stderr)
+        result = package_manifest.update_manifest(project_path, xr_packages, package_cache=args.package_cache, registry=args.package_registry)
+    except (OSError, ValueError) as e:
+        print(f"Warning: could not update Packages/manifest.json, SetupVRProject will install the XR packages itself: {e}"); return False
+    package_manifest.print_manifest_report(result)
+    return True
+
+def cache_packages():
+    try:
+        harvested = package_manifest.harvest_packages(project_path, args.package_cache)
+    except (OSError, ValueError) as e:
+        print(f"Warning: could not add resolved packages to {args.package_cache}: {e}"); return False
+    print(f"Package cache: added {', '.join(harvested)}." if harvested else "Package cache: every resolved package is already cached.")
+    return True
+
+def restore_library():
+    # Seeds a fresh project's Library/ before Unity first opens it, so the setup does not start from scratch.
+    if not (project_created or library_cache.needs_seed(project_path)):
+        print("Library cache: project already has an imported Library/, not seeding.")
+        return True
+    with pipeline_trace.span("Restore Library snapshot", "cache") as span_args:
+        key_info = library_cache.compute_key(project_path, cs_script_source_path, args.unity_version)
+        metadata, reason = library_cache.find_closest(library_cache_path, key_info)
+        span_args["match"] = reason
+        if metadata is None: print(f"Library cache: nothing to seed Library/ from ({reason})."); return True
+        try:
+            seconds = library_cache.restore(library_cache_path, project_path, metadata)
+        except Exception as e:
+            span_args["status"] = "failed"
+            print(f"Warning: could not restore Library/ snapshot {metadata['key']}: {e}"); return False
+    print(f"Library cache: seeded Library/ from snapshot {metadata['key']}, {reason} ({metadata['bytes'] / 1024 ** 2:.1f} MiB in {seconds:.1f}s).")
+    return True
+
+def capture_library_snapshot_key():
+    if not args.no_library_cache:
+        library_snapshot_key.update(library_cache.compute_key(project_path, cs_script_source_path, args.unity_version))
+
+def snapshot_library():
+    if not library_snapshot_key: print("Library cache: SetupVRProject did not run, no new snapshot needed."); return True
+    with pipeline_trace.span("Snapshot Library", "cache") as span_args:
+        try:
+            result = library_cache.snapshot(library_cache_path, project_path, library_snapshot_key, max_bytes=int(args.library_cache_max_gb * 1024 ** 3))
+        except Exception as e:
+            span_args["status"] = "failed"
+            print(f"Warning: could not snapshot Library/: {e}"); return False
+        span_args["created"] = result["created"]
+    action = f"stored snapshot {result['key']} ({result['bytes'] / 1024 ** 2:.1f} MiB in {result['seconds']:.1f}s)" if result["created"] else f"snapshot {result['key']} already cached"
+    print(f"Library cache: {action}" + (f", evicted {len(result['evicted'])} least recently used snapshot(s)." if result["evicted"] else "."))
+    return True
+
+def setup_vr_project():
+    if step_is_cached("SetupVRProject", step_cache.compute_step_inputs("SetupVRProject", project_path, cs_script_source_path, args.unity_version)):
+        print("Step 3: JulesBuildAutomation.SetupVRProject inputs are unchanged (step cache hit). Skipping.")
+        return True
+    capture_library_snapshot_key()
+    print("Step 3: Executing JulesBuildAutomation.SetupVRProject...")
+    if not run_command(unity_method_command("SetupVRProject", "unity_setup_vr_and_game_log.txt"), "cmd_unity_setup_vr_and_game_log.txt"): print("Execution of JulesBuildAutomation.SetupVRProject failed."); return False
+    record_setup_step()
+    print("JulesBuildAutomation.SetupVRProject completed.")
+    return True
+
+def run_pipeline():
+    # Same steps and failure semantics as the serial flow, but one editor launch for all of them.
+    setup_cached = step_is_cached("SetupVRProject", step_cache.compute_step_inputs("SetupVRProject", project_path, cs_script_source_path, args.unity_version))
+    pipeline_steps = [] if setup_cached else [("SetupVRProject", False)]
+    if not setup_cached: capture_library_snapshot_key()
+    if args.run_alpha_build:
+        pipeline_steps.append(("PerformAlphaTestBuild", False))
+        if args.increment_version_after_build: pipeline_steps.append(("IncrementBuildVersion", True))
+        if args.run_smoke_tests:
+            pipeline_steps.append(("PerformSmokeTests", False))
+    if not pipeline_steps:
+        print("Step 3: Nothing to run in pipeline mode; all steps were cached.")
+        return True
+    print("Step 3: Executing " + ", ".join(name for name, _ in pipeline_steps) + " in a single Unity launch (pipeline mode)...")
+    pipeline_log_path = os.path.join(project_path, "Logs", "unity_pipeline_log.txt")
+    pipeline_command = unity_pipeline.build_pipeline_command(unity_editor_path, project_path, pipeline_steps, pipeline_log_path)
+    if args.run_alpha_build:
+        asset_plan = asset_index.plan_optimization_pass(project_path, cs_script_dest_path, force_full=args.full_asset_optimization)
+        asset_index.print_plan(asset_plan)
+        pipeline_command += asset_index.unity_args(project_path, asset_plan)
+    pipeline_command_succeeded = run_command(pipeline_command, "cmd_unity_pipeline_log.txt")
+    pipeline_results = unity_pipeline.parse_pipeline_log(pipeline_log_path, pipeline_steps)
+    step_log_paths = unity_pipeline.write_step_logs(pipeline_results, os.path.join(project_path, "Logs"))
+    unity_pipeline.print_pipeline_report(pipeline_results, step_log_paths)
+    if any(result["name"] == "SetupVRProject" and result["status"] == "SUCCEEDED" for result in pipeline_results):
+        record_setup_step()
+    if not pipeline_command_succeeded or not unity_pipeline.pipeline_succeeded(pipeline_results):
+        print("Execution of JulesBuildAutomation.RunPipeline failed."); return False
+    return True
+
+def alpha_build():
+    if args.parallel_platform_builds:
+        # Workspaces are recloned from the project every run, so the optimizers' .meta changes never persist there.
+        print("Asset optimization: full pass in each platform workspace (parallel builds do not keep an asset index).")
+        print("Step 4: Building " + ", ".join(args.build_platforms) + " in parallel from per-platform workspaces...")
+        platform_results = platform_builds.run_parallel_platform_builds(unity_editor_path, project_path, run_command, platforms=args.build_platforms, max_parallel=args.max_parallel_builds, workspace_root=args.workspace_root)
+        platform_builds.print_platform_report(platform_results)
+        if not all(result["succeeded"] for result in platform_results): print("Parallel platform builds failed for: " + ", ".join(result["platform"] for result in platform_results if not result["succeeded"])); return False
+        print("Parallel platform builds completed.")
         return True
-    except subprocess.CalledProcessError as e:
-        print(f"Error executing command: {{e}}")
-        print("STDOUT:", e.stdout)
-        print("STDERR:", e.stderr)
-        if log_file_path:
-            with open(log_file_path, "w") as f:
-                f.write("STDOUT (Error):\n")
-                f.write(e.stdout)
-                f.write("\nSTDERR (Error):\n")
-                f.write(e.stderr)
-        return False
-    except FileNotFoundError:
-        print(f"Error: Executable '{{command_list[0]}}' not found. Ensure it's in your PATH or provide the full path via --unity-editor-path.")
-        return False
-
-# Step 1: Create the Unity project (if it doesn't exist)
-if not os.path.exists(project_path):
-    print(f"Step 1: Creating Unity project '{{args.project_name}}' at '{{project_path}}' using Unity version '{{args.unity_version}}'.")
-    # Define the log path for Unity's own creation log
-    unity_create_log_path = os.path.join(project_path, "Logs", "unity_editor_create_project.log") # Specific log for Unity process
-    os.makedirs(os.path.dirname(unity_create_log_path), exist_ok=True)
-
-    create_project_command = [
-        unity_editor_path,
-        "-quit",
-        "-batchmode",
-        "-createProject",
-        project_path,
-        "-logFile",
-        unity_create_log_path, # Use the specific Unity log path here
-        "-version",
-        args.unity_version
-    ]
-    # The run_command function will create a separate log for the stdout/stderr of the create_project_command itself.
-    if not run_command(create_project_command, "cmd_unity_create_project.log"): # Log for the subprocess call
-        print(f"Unity project creation failed. Check logs in '{{os.path.join(project_path, 'Logs')}}'.")
-        exit(1)
-    print(f"Unity project '{{args.project_name}}' created successfully.")
+    asset_plan = asset_index.plan_optimization_pass(project_path, cs_script_dest_path, force_full=args.full_asset_optimization)
+    asset_index.print_plan(asset_plan)
+    print(f"Step 4: Executing JulesBuildAutomation.PerformAlphaTestBuild...")
+    alpha_build_command = unity_method_command("PerformAlphaTestBuild", "unity_alpha_build_log.txt") + asset_index.unity_args(project_path, asset_plan)
+    if not run_command(alpha_build_command, "cmd_unity_alpha_build_log.txt"): print("Execution of JulesBuildAutomation.PerformAlphaTestBuild failed."); return False
+    print("JulesBuildAutomation.PerformAlphaTestBuild completed.")
+    return True
+
+def save_asset_index():
+    asset_count = asset_index.save_index(project_path, cs_script_dest_path)
+    print(f"Asset index updated ({asset_count} asset(s)).")
+    return True
+
+def register_alpha_build_outputs():
+    # Successful builds only; a failed build may have left a partial folder behind.
+    with pipeline_trace.span("Register build artifacts", "analysis") as span_args:
+        print(f"Registering alpha build outputs in artifact store {artifact_store_path}...")
+        try:
+            results = artifact_store.register_build_outputs(artifact_store_path, project_path)
+            if args.artifact_keep_last is not None:
+                removed = artifact_store.apply_retention(artifact_store_path, keep_last=args.artifact_keep_last)
+                chunks_removed, bytes_freed = artifact_store.collect_garbage(artifact_store_path)
+                if removed: print("Artifact store retention dropped " + ", ".join(f"{name} v{version}" for name, version in removed) + f" ({bytes_freed} bytes freed).")
+            stats = artifact_store.store_stats(artifact_store_path)
+        except OSError as e:
+            span_args["status"] = "failed"
+            print(f"Warning: could not register build outputs in the artifact store: {e}"); return False
+        artifact_store.print_ingest_report(results, stats)
+        span_args["new_bytes"] = sum(result["new_bytes"] for result in results)
+        span_args["dedup_ratio"] = round(stats["dedup_ratio"], 2)
+    return True
+
+def record_build_history(check_budgets=True):
+    # The BuildReport lines of this run's build log(s); with budgets, a regression fails the run before distribution.
+    logs_dir = os.path.join(project_path, "Logs")
+    if args.pipeline_mode: log_paths = [os.path.join(logs_dir, "unity_pipeline_log.txt")]
+    elif args.parallel_platform_builds: log_paths = [os.path.join(logs_dir, f"unity_alpha_build_{platform_name.lower()}_log.txt") for platform_name in args.build_platforms]
+    else: log_paths = [os.path.join(logs_dir, "unity_alpha_build_log.txt")]
+    step_seconds = None if args.pipeline_mode else graph.steps["alpha_build"].result["duration"]
+    with pipeline_trace.span("Record build history", "analysis") as span_args:
+        try:
+            records = build_history.collect_builds(log_paths, cs_script_source_path, step_seconds=step_seconds)
+            build_history.record_builds(build_history_path, args.project_name, records)
+        except (OSError, build_history.DatabaseError) as e:
+            span_args["status"] = "failed"
+            print(f"Warning: could not record the build history: {e}"); return not build_budgets
+        span_args["builds"] = len(records)
+    if not records: print("Build history: no BuildReport lines in " + ", ".join(log_paths) + "."); return True
+    build_history.print_history_report(records, build_history_path)
+    violations = build_history.check_budgets(records, build_budgets) if check_budgets else []
+    for violation in violations:
+        print(f"Build budget exceeded: {violation}")
+    return not violations
+
+def increment_version():
+    print(f"Step 5: Executing JulesBuildAutomation.IncrementBuildVersion...")
+    if not run_command(unity_method_command("IncrementBuildVersion", "unity_increment_version_log.txt"), "cmd_unity_increment_version_log.txt"): print("Execution of JulesBuildAutomation.IncrementBuildVersion failed."); return False
+    print("JulesBuildAutomation.IncrementBuildVersion completed.")
+    return True
+
+def sync_version_file():
+    project_version_file = os.path.join(project_path, "Assets", "Resources", "build_version.txt")
+    if not os.path.isfile(project_version_file): print(f"Warning: {project_version_file} not found; {args.sync_version_file} not updated."); return False
+    with open(project_version_file, "r") as f:
+        new_version = f.read().strip()
+    if not new_version: print(f"Warning: {project_version_file} is empty; {args.sync_version_file} not updated."); return False
+    with open(args.sync_version_file, "w") as f:
+        f.write(new_version)
+    print(f"Updated {args.sync_version_file} with version '{new_version}'.")
+    return True
+
+def run_smoke_tests():
+    # Sharded across editor (or player) processes; the project itself is only read to clone the shard workspaces.
+    platforms = args.build_platforms if args.parallel_platform_builds else list(platform_builds.PLATFORM_BUILDS)
+    runner = f"'{args.smoke_player}'" if args.smoke_player else "JulesBuildAutomation.RunSmokeTestShard"
+    print(f"Step 6: Running {len(smoke_test_cases)} smoke test(s) on " + ", ".join(platforms) + f" in up to {args.smoke_shards} shard(s) per platform via {runner}...")
+    results, shards = smoke_tests.run_smoke_tests(project_path, unity_editor_path, run_command, smoke_test_cases, platforms, shards_per_platform=args.smoke_shards, player=args.smoke_player, keep_going=args.smoke_keep_going)
+    junit_path = smoke_tests.write_junit(results, os.path.join(project_path, "Logs", smoke_tests.JUNIT_FILE_NAME))
+    smoke_tests.print_report(results, shards, junit_path)
+    if not smoke_tests.all_passed(results): print("Smoke tests failed."); return False
+    print("Smoke tests completed.")
+    return True
+
+def distribute():
+    # Python-side, so only data that changed since the previously distributed version is copied.
+    distribution_path = os.path.abspath(args.distribution_dir) if args.distribution_dir else delta_distribution.default_distribution_path(project_path)
+    platforms = args.build_platforms if args.parallel_platform_builds else list(platform_builds.PLATFORM_BUILDS)
+    print(f"Step 7: Distributing the newest alpha builds to {distribution_path}...")
+    with pipeline_trace.span("Distribute alpha builds", "distribution") as span_args:
+        try:
+            results = delta_distribution.distribute_builds(project_path, distribution_path, platforms, workers=args.distribution_workers)
+        except OSError as e:
+            span_args["status"] = "failed"
+            print(f"Distribution of alpha builds failed: {e}"); return False
+        span_args["bytes_total"] = sum(result["bytes_total"] for result in results)
+        span_args["bytes_transferred"] = sum(result["bytes_transferred"] for result in results)
+    if not results: print("Distribution of alpha builds failed: no alpha builds found."); return False
+    delta_distribution.print_distribution_report(results)
+    print("Alpha builds distributed.")
+    return True
+
+# --- Step graph ---
+ready = [graph.add("simulate_layouts", simulate_layouts)] if args.rube_goldberg_layout else []
+project_created = not os.path.exists(project_path)
+if project_created: ready = [graph.add("create_project", create_project, deps=ready, resources=UNITY_PROJECT)]
+else: print(f"Unity project '{args.project_name}' already exists. Skipping project creation.")
+# Both are best effort: without them SetupVRProject installs the packages and Unity rebuilds Library/ itself.
+# The manifest is written first because the Library/ snapshot key covers it.
+prepared = [] if args.no_package_manifest else [graph.add("prepare_packages", prepare_packages, deps=ready, critical=False, resources=UNITY_PROJECT)]
+restored = [] if args.no_library_cache else [graph.add("restore_library", restore_library, deps=ready, after=prepared, critical=False, resources=UNITY_PROJECT)]
+ready = [graph.add("deploy_script", deploy_script, deps=ready, after=prepared + restored)]
+if args.pipeline_mode:
+    built = [graph.add("pipeline", run_pipeline, deps=ready, resources=UNITY_PROJECT)]
+    recorded = [graph.add("record_build_history", record_build_history, deps=built, critical=bool(build_budgets))] if args.run_alpha_build and not args.no_build_history else []
+    if not args.no_library_cache: graph.add("snapshot_library", snapshot_library, deps=built, critical=False, resources=UNITY_PROJECT)
+    if args.package_cache: graph.add("cache_packages", cache_packages, deps=built, critical=False)
+    if args.run_alpha_build and args.increment_version_after_build and args.sync_version_file:
+        graph.add("sync_version_file", sync_version_file, deps=built, critical=False)
+    if args.run_alpha_build and args.run_smoke_tests and args.distribute_alpha_builds:
+        graph.add("distribute", distribute, deps=built + recorded)
 else:
-    print(f"Unity project '{{args.project_name}}' already exists at '{{project_path}}'. Skipping project creation.")
+    ready = [graph.add("setup_vr_project", setup_vr_project, deps=ready, resources=UNITY_PROJECT)]
+    if args.package_cache: graph.add("cache_packages", cache_packages, deps=ready, critical=False)
+    snapshotted = [] if args.no_library_cache else [graph.add("snapshot_library", snapshot_library, deps=ready, critical=False, resources=UNITY_PROJECT)]
+    built = [graph.add("alpha_build", alpha_build, deps=ready, after=snapshotted, resources=UNITY_PROJECT)] if args.run_alpha_build else []
+    recorded = [graph.add("record_build_history", record_build_history, deps=built, critical=bool(build_budgets))] if args.run_alpha_build and not args.no_build_history else []
+if args.run_alpha_build:
+    # Bookkeeping on the finished build overlaps with the remaining Unity steps.
+    if not args.parallel_platform_builds: graph.add("save_asset_index", save_asset_index, deps=built, critical=False)
+    if not args.no_artifact_store: graph.add("register_artifacts", register_alpha_build_outputs, deps=built, critical=False)
+if args.pipeline_mode: pass
+elif args.run_alpha_build:
+    previous_unity_step = []
+    if args.increment_version_after_build:
+        # A failed increment is reported but does not fail the run. It waits for the history, so an exceeded build
+        # budget stops the run before the bump rather than killing the editor while it writes the version.
+        previous_unity_step = [graph.add("increment_version", increment_version, deps=built, after=recorded, critical=False, resources=UNITY_PROJECT)]
+        if args.sync_version_file: graph.add("sync_version_file", sync_version_file, deps=previous_unity_step, critical=False)
+    else: print("Skipping version increment.")
+    if args.run_smoke_tests:
+        graph.add("smoke_tests", run_smoke_tests, deps=built, after=previous_unity_step, resources=UNITY_PROJECT)
+        if args.distribute_alpha_builds: graph.add("distribute", distribute, deps=["smoke_tests"] + recorded)
+    elif args.distribute_alpha_builds: print("Skipping distribution of Alpha Builds due to previous step failure or config.")
+else: print("Skipping Alpha Test Builds as --run-alpha-build flag was not set.")
 
-# Step 2: Deploy the C# Editor script (JulesBuildAutomation.cs)
-print(f"Step 2: Deploying C# automation script '{{os.path.basename(cs_script_source_path)}}' to '{{cs_script_dest_path}}'...")
-os.makedirs(os.path.dirname(cs_script_dest_path), exist_ok=True)
-try:
-    if not os.path.exists(cs_script_source_path):
-        print(f"Error: Source C# script not found at '{{cs_script_source_path}}'.")
-        print(f"Please ensure 'JulesBuildAutomation.cs' is in the repository root or specify its path via --cs-script-source.")
-        exit(1)
-
-    shutil.copy(cs_script_source_path, cs_script_dest_path)
-    print(f"C# automation script deployed successfully.")
-except Exception as e:
-    print(f"Error deploying C# script: {{e}}")
-    exit(1)
-
-print("Waiting a moment for Unity to detect script changes before execution...")
-time.sleep(5) # Increased sleep time slightly to give Unity more time to compile.
-
-# Step 3: Execute JulesBuildAutomation.SetupVRProject within Unity.
-# This single method call triggers the entire sequence:
-# XR Package Installation -> XR Settings Configuration -> Rube Goldberg Game Setup.
-print(f"Step 3: Initiating Unity automation sequence by executing 'JulesBuildAutomation.SetupVRProject' in project '{{args.project_name}}'.")
-print("This will configure VR, set up the scene, and create Rube Goldberg elements.")
-
-# Define the log path for Unity's own execution log for this step
-unity_exec_log_path = os.path.join(project_path, "Logs", "unity_editor_setup_vr_project.log")
-os.makedirs(os.path.dirname(unity_exec_log_path), exist_ok=True)
-
-setup_command = [
-    unity_editor_path,
-    "-batchmode",
-    "-quit", # Unity will exit automatically via EditorApplication.Exit(0) in JulesBuildAutomation.cs
-    "-projectPath",
-    project_path,
-    "-executeMethod",
-    "JulesBuildAutomation.SetupVRProject",
-    "-logFile",
-    unity_exec_log_path # Use the specific Unity log path here
-]
-# The run_command function will create its own log for the stdout/stderr of the setup_command.
-if not run_command(setup_command, "cmd_unity_setup_vr_project.log"): # Log for the subprocess call
-    print("Execution of 'JulesBuildAutomation.SetupVRProject' failed. Check logs for details.")
-    exit(1)
-print("'JulesBuildAutomation.SetupVRProject' execution successfully initiated. Check Unity logs for detailed progress.")
-print(f"Primary Unity execution log for this step: {{unity_exec_log_path}}")
-print(f"Command execution log: {{os.path.join(project_path, 'Logs', 'cmd_unity_setup_vr_project.log')}}")
-
-
-print(f"Python script '{{os.path.basename(__file__)}}' completed its tasks.")
-print(f"The Unity project '{{args.project_name}}' should now be created and fully configured for VR with Rube Goldberg elements.")
+run_succeeded = graph.run()
+if args.run_alpha_build and not args.no_build_history and graph.steps[built[0]].result["status"] == step_graph.FAILED:
+    record_build_history(check_budgets=False)  # Failed builds go into the history too, with their error counts.
+step_graph.print_step_report(graph)
+step_cache.print_cache_report(step_cache_report)
+if resource_records:
+    resource_summary_path = os.path.join(project_path, "Logs", resource_profiler.SUMMARY_FILE_NAME)
+    resource_profiler.print_step_report(resource_profiler.write_step_summary(resource_summary_path, resource_records), resource_summary_path)
+if run_log_archive:
+    try:
+        run_log_archive.close()
+        removed_runs = log_archive.apply_retention(os.path.dirname(run_log_archive.data_path), keep_runs=args.log_archive_keep_runs,
+                                                   max_bytes=int(args.log_archive_max_gb * 1024 ** 3), keep={run_log_archive.run_id})
+    except OSError as e:
+        print(f"Warning: could not finish the log archive: {e}"); removed_runs = []
+    log_archive.print_archive_report(run_log_archive, removed_runs)
+if not run_succeeded: exit(1)
+print("All automation steps initiated by create_unity_project.py completed successfully.")
@@ -0,0 +1,312 @@
+import argparse
+import concurrent.futures
+import contextvars
+import errno
+import hashlib
+import json
+import mmap
+import os
+import shutil
+import time
+import zlib
+
+import artifact_store
+import command_runner
+import platform_builds
+
+# Delta distribution of alpha builds for create_unity_project.py's distribute step. DistributeAlphaBuilds
+# copied the whole Builds/AlphaTest tree every time; here only the newest build of each platform is
+# distributed, to <dest>/AlphaTest/<Platform>/<Project>_v<version>, and it is assembled from the previously
+# distributed version wherever the data is the same:
+# - files whose SHA-256 matches the previous version are hardlinked to it (nothing transferred);
+# - changed files are diffed rsync-style: the previous version's block signatures (Adler-32 plus a strong
+#   hash per DELTA_BLOCK_SIZE block) are matched against the new file with a rolling checksum, and the file
+#   is rebuilt from matching blocks of the old file plus literal ranges of the new one;
+# - new files are copied whole.
+# All data moves with os.copy_file_range (in-kernel, and reflinked or server-side on filesystems that
+# support it), falling back to sendfile and then to a userspace copy. Files are processed on a thread pool.
+#
+# Each distributed version gets a sidecar manifest, <version dir>.manifest.json, with per-file hashes and
+# block signatures, so the next distribution does not have to read the old files to diff against them.
+
+DELTA_BLOCK_SIZE = 64 * 1024
+# A run of unmatched blocks gets a rolling search on its first two blocks (enough to find data shifted by an
+# insertion of up to one block) and then only on every RESYNC_INTERVAL-th block, so a completely rewritten
+# file does not cost a per-byte Python loop over all of it.
+RESYNC_INTERVAL = 16
+ADLER_MOD = 65521
+DEFAULT_WORKERS = min(32, (os.cpu_count() or 1) * 2)
+MANIFEST_SUFFIX = ".manifest.json"
+MANIFEST_VERSION = 1
+# Errors meaning "this copy mechanism does not work for these files", not "the copy failed".
+UNSUPPORTED_ERRNOS = (errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.EBADF)
+
+
+def default_distribution_path(project_path):
+    return os.path.join(project_path, "Distribution")
+
+
+def _strong_hash(data):
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def _fingerprint(path, size):
+    # Returns (sha256, block signatures); files up to one block have no signature, they are copied whole.
+    digest = hashlib.sha256()
+    signature = []
+    if size == 0:
+        return digest.hexdigest(), signature
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        for offset in range(0, size, DELTA_BLOCK_SIZE):
+            block = data[offset:offset + DELTA_BLOCK_SIZE]
+            digest.update(block)
+            if size > DELTA_BLOCK_SIZE:
+                signature.append([zlib.adler32(block), _strong_hash(block)])
+    return digest.hexdigest(), signature
+
+
+def _find_block(data, start, length, weak, index):
+    for block_index, strong in index.get((weak, length), ()):
+        if _strong_hash(data[start:start + length]) == strong:
+            return block_index
+    return None
+
+
+def _rolling_search(data, start, weak, index):
+    # Slides a DELTA_BLOCK_SIZE window one byte at a time from start, updating the Adler-32 of the window in
+    # O(1) per byte. Returns (offset, block index) of the first window matching a block of the old file.
+    a, b = weak & 0xFFFF, weak >> 16
+    end = min(start + DELTA_BLOCK_SIZE, len(data) - DELTA_BLOCK_SIZE + 1)
+    for offset in range(start + 1, end):
+        removed, added = data[offset - 1], data[offset + DELTA_BLOCK_SIZE - 1]
+        a = (a - removed + added) % ADLER_MOD
+        b = (b - DELTA_BLOCK_SIZE * removed + a - 1) % ADLER_MOD
+        if ((b << 16) | a, DELTA_BLOCK_SIZE) in index:
+            block_index = _find_block(data, offset, DELTA_BLOCK_SIZE, (b << 16) | a, index)
+            if block_index is not None:
+                return offset, block_index
+    return None, None
+
+
+def _append_op(ops, source, offset, length):
+    # Ops are (source, offset, length) with source "base" (old file) or "new"; contiguous ranges are merged.
+    if ops and ops[-1][0] == source and ops[-1][1] + ops[-1][2] == offset:
+        ops[-1] = (source, ops[-1][1], ops[-1][2] + length)
+    else:
+        ops.append((source, offset, length))
+
+
+def compute_delta(data, size, base_signature, base_size):
+    # Returns the ops that rebuild the new file (data, an mmap of size bytes) from the old file, in order.
+    index = {}
+    for block_index, (weak, strong) in enumerate(base_signature):
+        length = min(DELTA_BLOCK_SIZE, base_size - block_index * DELTA_BLOCK_SIZE)
+        index.setdefault((weak, length), []).append((block_index, strong))
+    ops = []
+    pos = literal_start = 0
+    misses = 0
+    while pos < size:
+        length = min(DELTA_BLOCK_SIZE, size - pos)
+        weak = zlib.adler32(data[pos:pos + length])
+        block_index = _find_block(data, pos, length, weak, index)
+        if block_index is None and length == DELTA_BLOCK_SIZE and (misses < 2 or misses % RESYNC_INTERVAL == 0):
+            offset, block_index = _rolling_search(data, pos, weak, index)
+            if block_index is not None:
+                pos = offset
+        if block_index is None:
+            misses += 1
+            pos += length
+            continue
+        if literal_start < pos:
+            _append_op(ops, "new", literal_start, pos - literal_start)
+        _append_op(ops, "base", block_index * DELTA_BLOCK_SIZE, length)
+        pos += length
+        literal_start = pos
+        misses = 0
+    if literal_start < size:
+        _append_op(ops, "new", literal_start, size - literal_start)
+    return ops
+
+
+def _copy_range(source_fd, dest_fd, offset, length, dest_offset, state):
+    # Copies length bytes from source_fd at offset to dest_fd at dest_offset. state remembers which
+    # mechanisms turned out not to work so they are not retried for every range.
+    while length > 0:
+        if state["copy_file_range"]:
+            try:
+                copied = os.copy_file_range(source_fd, dest_fd, length, offset, dest_offset)
+            except OSError as e:
+                if e.errno not in UNSUPPORTED_ERRNOS:
+                    raise
+                state["copy_file_range"] = False
+                continue
+        elif state["sendfile"]:
+            try:
+                os.lseek(dest_fd, dest_offset, os.SEEK_SET)
+                copied = os.sendfile(dest_fd, source_fd, offset, length)
+            except OSError as e:
+                if e.errno not in UNSUPPORTED_ERRNOS:
+                    raise
+                state["sendfile"] = False
+                continue
+        else:
+            copied = os.pwrite(dest_fd, os.pread(source_fd, min(length, DELTA_BLOCK_SIZE * 16), offset), dest_offset)
+        if copied == 0:
+            raise OSError(errno.EIO, f"unexpected end of file copying {length} bytes at offset {offset}")
+        offset += copied
+        dest_offset += copied
+        length -= copied
+
+
+def _write_file(dest_path, ops, sources, state):
+    # sources maps an op source ("base"/"new") to an open file descriptor.
+    dest_fd = os.open(dest_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        dest_offset = 0
+        for source, offset, length in ops:
+            command_runner.check_cancelled()
+            _copy_range(sources[source], dest_fd, offset, length, dest_offset, state)
+            dest_offset += length
+    finally:
+        os.close(dest_fd)
+
+
+def _distribute_file(source_path, dest_path, base_path, base_entry, state):
+    # Returns (method, manifest entry, bytes transferred).
+    command_runner.check_cancelled()
+    size = os.path.getsize(source_path)
+    sha256, signature = _fingerprint(source_path, size)
+    entry = {"size": size, "sha256": sha256, "signature": signature}
+    base_usable = base_entry is not None and os.path.isfile(base_path) and os.path.getsize(base_path) == base_entry["size"]
+    unchanged = base_usable and base_entry["sha256"] == sha256
+    if unchanged:
+        try:
+            os.link(base_path, dest_path)
+            return "unchanged", entry, 0
+        except OSError:
+            pass  # e.g. a different filesystem; copy it from the old version instead.
+    method, ops = "copied", ([("new", 0, size)] if size else [])
+    source_fd = os.open(source_path, os.O_RDONLY)
+    base_fd = None
+    try:
+        if unchanged:
+            method, ops, base_fd = "unchanged", [("base", 0, size)], os.open(base_path, os.O_RDONLY)
+        elif base_usable and base_entry["signature"] and signature:
+            with mmap.mmap(source_fd, 0, access=mmap.ACCESS_READ) as data:
+                ops = compute_delta(data, size, base_entry["signature"], base_entry["size"])
+            method, base_fd = "delta", os.open(base_path, os.O_RDONLY)
+        _write_file(dest_path, ops, {"new": source_fd, "base": base_fd}, state)
+    finally:
+        os.close(source_fd)
+        if base_fd is not None:
+            os.close(base_fd)
+    shutil.copymode(source_path, dest_path)
+    return method, entry, sum(length for source, _, length in ops if source == "new")
+
+
+def _manifest_path(version_dir):
+    return version_dir.rstrip(os.sep) + MANIFEST_SUFFIX
+
+
+def load_manifest(version_dir):
+    try:
+        with open(_manifest_path(version_dir), "r") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return manifest if manifest.get("version") == MANIFEST_VERSION else None
+
+
+def find_base_version(platform_dir, name):
+    # The version to diff against: the same version if it was distributed before, else the one distributed last.
+    candidates = []
+    if os.path.isdir(platform_dir):
+        for candidate in os.listdir(platform_dir):
+            path = os.path.join(platform_dir, candidate)
+            if artifact_store.VERSION_DIR_PATTERN.match(candidate) and os.path.isdir(path) and os.path.isfile(_manifest_path(path)):
+                candidates.append(path)
+    same_version = os.path.join(platform_dir, name)
+    if same_version in candidates:
+        return same_version
+    return max(candidates, key=lambda path: os.path.getmtime(_manifest_path(path)), default=None)
+
+
+def distribute_build(build_dir, platform_dir, workers=DEFAULT_WORKERS):
+    # Distributes one build folder into platform_dir/<folder name>. Returns a result dict.
+    start = time.monotonic()
+    name = os.path.basename(build_dir.rstrip(os.sep))
+    dest_dir = os.path.join(platform_dir, name)
+    base_dir = find_base_version(platform_dir, name)
+    base_manifest = load_manifest(base_dir) if base_dir else None
+    base_files = base_manifest["files"] if base_manifest else {}
+    temp_dir = dest_dir + ".partial"
+    if os.path.exists(temp_dir):
+        shutil.rmtree(temp_dir)
+    os.makedirs(temp_dir)
+    jobs = []
+    for root, dirs, files in os.walk(build_dir):
+        dirs.sort()
+        rel_root = os.path.relpath(root, build_dir)
+        for dir_name in dirs:
+            os.makedirs(os.path.join(temp_dir, rel_root, dir_name), exist_ok=True)
+        for file_name in sorted(files):
+            rel_path = os.path.normpath(os.path.join(rel_root, file_name)).replace(os.sep, "/")
+            jobs.append(rel_path)
+    state = {"copy_file_range": hasattr(os, "copy_file_range"), "sendfile": hasattr(os, "sendfile")}
+    result = {"name": name, "source": build_dir, "dest": dest_dir, "base": os.path.basename(base_dir) if base_dir else None,
+              "files": len(jobs), "unchanged": 0, "delta": 0, "copied": 0, "bytes_total": 0, "bytes_transferred": 0}
+    files = {}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        # Copies of the caller's context, so a cancelled step stops the remaining files.
+        futures = {rel_path: executor.submit(contextvars.copy_context().run, _distribute_file, os.path.join(build_dir, *rel_path.split("/")), os.path.join(temp_dir, *rel_path.split("/")),
+                                             os.path.join(base_dir, *rel_path.split("/")) if base_dir else None, base_files.get(rel_path), state)
+                   for rel_path in jobs}
+        for rel_path, future in futures.items():
+            method, entry, transferred = future.result()
+            files[rel_path] = entry
+            result[method] += 1
+            result["bytes_total"] += entry["size"]
+            result["bytes_transferred"] += transferred
+    # Swap the new folder in; the base may be the folder being replaced, so it is only removed afterwards.
+    if os.path.exists(dest_dir):
+        shutil.rmtree(dest_dir)
+    os.replace(temp_dir, dest_dir)
+    with open(_manifest_path(dest_dir) + ".tmp", "w") as f:
+        json.dump({"version": MANIFEST_VERSION, "source": build_dir, "files": files}, f)
+    os.replace(_manifest_path(dest_dir) + ".tmp", _manifest_path(dest_dir))
+    result["seconds"] = time.monotonic() - start
+    return result
+
+
+def distribute_builds(project_path, dest_root, platforms, workers=DEFAULT_WORKERS):
+    # Distributes the newest build of each platform to <dest_root>/AlphaTest/<Platform>/. Returns one result per platform.
+    results = []
+    for platform, build_dir in sorted(platform_builds.find_build_dirs(project_path, platforms).items()):
+        result = distribute_build(build_dir, os.path.join(dest_root, "AlphaTest", platform), workers)
+        result["platform"] = platform
+        results.append(result)
+    return results
+
+
+def print_distribution_report(results):
+    print("Delta distribution results:")
+    for result in results:
+        saved = 1.0 - result["bytes_transferred"] / result["bytes_total"] if result["bytes_total"] else 0.0
+        print(f"  {result.get('platform', '-'):<10} {result['name']}: {result['files']} files "
+              f"({result['unchanged']} unchanged, {result['delta']} delta, {result['copied']} copied), "
+              f"transferred {artifact_store.format_bytes(result['bytes_transferred'])} of {artifact_store.format_bytes(result['bytes_total'])} "
+              f"({saved:.0%} saved) in {result['seconds']:.2f}s, base: {result['base'] or 'none'}")
+        print(f"    -> {result['dest']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Distribute a build folder, transferring only what changed since the previously distributed version.")
+    parser.add_argument("build_dir", help="Build folder, e.g. Builds/AlphaTest/Windows/RubeGoldbergVR_v0.1.3.")
+    parser.add_argument("platform_dir", help="Distribution folder for this platform, e.g. Distribution/AlphaTest/Windows.")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Files processed concurrently.")
+    args = parser.parse_args()
+    print_distribution_report([distribute_build(os.path.abspath(args.build_dir), os.path.abspath(args.platform_dir), args.workers)])
+
+
+if __name__ == "__main__":
+    main()
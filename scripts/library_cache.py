@@ -0,0 +1,236 @@
+import argparse
+import concurrent.futures
+import hashlib
+import json
+import os
+import shutil
+import tarfile
+import time
+
+import command_runner
+import step_cache
+
+# Compressed snapshots of a project's Library/ folder, so a fresh workspace does not spend its first Unity
+# launch resolving the XR packages and reimporting every asset. After a successful SetupVRProject the
+# orchestrator stores Library/ as a tar.gz, keyed on the inputs it was built from (captured before the setup
+# ran, i.e. as a fresh workspace would look):
+#   unity_version     the editor version (snapshots never cross editor versions)
+#   packages          the xrPackages list of the automation script plus Packages/manifest.json
+#   project_settings  everything under ProjectSettings/
+#   assets            a fingerprint of every file under Assets/
+# A new workspace without a Library/ is seeded before Unity starts from the snapshot with the same key or,
+# failing that, the closest one for the same editor version: matching packages count most, then project
+# settings, then the share of identical assets. Unity then only reimports what differs.
+#
+# Layout: <cache>/<key>.tar.gz plus <key>.json with the components and asset fingerprints. The cache is
+# kept under a size cap by evicting the least recently used snapshots (restoring counts as a use). The
+# orchestrator's own bookkeeping in Library/ (jules_* files such as the step cache) is not snapshotted.
+
+DEFAULT_MAX_BYTES = 10 * 1024 ** 3
+COMPRESS_LEVEL = 3
+HASH_WORKERS = 4
+EXCLUDED_PREFIX = "jules_"
+EXCLUDED_SUFFIXES = ("-lock", ".lock")
+# Weights for picking the closest snapshot; asset overlap adds up to 1.
+PACKAGES_WEIGHT = 4
+PROJECT_SETTINGS_WEIGHT = 2
+
+
+def default_cache_path(project_path):
+    return os.path.join(os.path.dirname(project_path), os.path.basename(project_path) + "_LibraryCache")
+
+
+def _sha256_file(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _sha256_json(value):
+    return hashlib.sha256(json.dumps(value, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def _file_hashes(project_path, rel_dir):
+    # {rel_path: sha256} for every file under rel_dir, hashed on a small thread pool.
+    paths = []
+    for root, dirs, files in os.walk(os.path.join(project_path, rel_dir)):
+        dirs.sort()
+        paths.extend(os.path.join(root, name) for name in sorted(files))
+    with concurrent.futures.ThreadPoolExecutor(max_workers=HASH_WORKERS) as executor:
+        hashes = executor.map(_sha256_file, paths)
+        return {os.path.relpath(path, project_path).replace(os.sep, "/"): digest for path, digest in zip(paths, hashes)}
+
+
+def compute_key(project_path, cs_script_path, unity_version):
+    # Returns {"key", "components", "assets"}; call it before SetupVRProject changes the project.
+    with open(cs_script_path, "r", errors="replace") as f:
+        xr_packages, _ = step_cache.parse_cs_inputs(f.read())
+    manifest_path = os.path.join(project_path, "Packages", "manifest.json")
+    assets = _file_hashes(project_path, "Assets")
+    # The deployed automation script changes with every build version but does not affect what gets imported.
+    for rel_path in ("Assets/Editor/JulesBuildAutomation.cs", "Assets/Editor/JulesBuildAutomation.cs.meta"):
+        assets.pop(rel_path, None)
+    components = {
+        "unity_version": unity_version,
+        "packages": _sha256_json([xr_packages, _sha256_file(manifest_path) if os.path.isfile(manifest_path) else None]),
+        "project_settings": _sha256_json(_file_hashes(project_path, "ProjectSettings")),
+        "assets": _sha256_json(assets),
+    }
+    return {"key": _sha256_json(components)[:32], "components": components, "assets": assets}
+
+
+def _snapshot_paths(cache_path, key):
+    return os.path.join(cache_path, key + ".tar.gz"), os.path.join(cache_path, key + ".json")
+
+
+def list_snapshots(cache_path):
+    snapshots = []
+    if not os.path.isdir(cache_path):
+        return snapshots
+    for name in sorted(os.listdir(cache_path)):
+        if not name.endswith(".json"):
+            continue
+        try:
+            with open(os.path.join(cache_path, name), "r") as f:
+                metadata = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if os.path.isfile(_snapshot_paths(cache_path, metadata["key"])[0]):
+            snapshots.append(metadata)
+    return snapshots
+
+
+def _write_metadata(cache_path, metadata):
+    metadata_path = _snapshot_paths(cache_path, metadata["key"])[1]
+    with open(metadata_path + ".tmp", "w") as f:
+        json.dump(metadata, f)
+    os.replace(metadata_path + ".tmp", metadata_path)
+
+
+def _score(metadata, key_info):
+    # None for snapshots of another editor version, which Unity would rebuild from scratch anyway.
+    components = metadata["components"]
+    if components["unity_version"] != key_info["components"]["unity_version"]:
+        return None
+    current = set(key_info["assets"].items())
+    snapshot = set(metadata["assets"].items())
+    overlap = len(current & snapshot) / len(current | snapshot) if current | snapshot else 1.0
+    return (PACKAGES_WEIGHT * (components["packages"] == key_info["components"]["packages"])
+            + PROJECT_SETTINGS_WEIGHT * (components["project_settings"] == key_info["components"]["project_settings"])
+            + overlap)
+
+
+def find_closest(cache_path, key_info):
+    # Returns (metadata, reason) of the best snapshot to seed from, or (None, reason).
+    candidates = []
+    for metadata in list_snapshots(cache_path):
+        if metadata["key"] == key_info["key"]:
+            return metadata, "exact match"
+        score = _score(metadata, key_info)
+        if score is not None:
+            candidates.append((score, metadata["last_used"], metadata))
+    if not candidates:
+        return None, f"no snapshot for Unity {key_info['components']['unity_version']}"
+    score, _, metadata = max(candidates, key=lambda candidate: candidate[:2])
+    differing = [name for name in ("packages", "project_settings", "assets") if metadata["components"][name] != key_info["components"][name]]
+    return metadata, f"closest match (score {score:.2f} of {PACKAGES_WEIGHT + PROJECT_SETTINGS_WEIGHT + 1}, differs in {', '.join(differing)})"
+
+
+def _include(tar_info):
+    command_runner.check_cancelled()  # Called for every member, so a cancelled step stops archiving.
+    name = os.path.basename(tar_info.name)
+    if name.startswith(EXCLUDED_PREFIX) or name.endswith(EXCLUDED_SUFFIXES):
+        return None
+    return tar_info
+
+
+def snapshot(cache_path, project_path, key_info, max_bytes=DEFAULT_MAX_BYTES):
+    # Stores Library/ under key_info's key unless that snapshot exists already. Returns a result dict.
+    start = time.monotonic()
+    archive_path, _ = _snapshot_paths(cache_path, key_info["key"])
+    result = {"key": key_info["key"], "created": False, "bytes": 0, "evicted": []}
+    existing = {metadata["key"]: metadata for metadata in list_snapshots(cache_path)}.get(key_info["key"])
+    if existing is None:
+        os.makedirs(cache_path, exist_ok=True)
+        temp_path = f"{archive_path}.{os.getpid()}.tmp"
+        try:
+            with tarfile.open(temp_path, "w:gz", compresslevel=COMPRESS_LEVEL) as archive:
+                archive.add(os.path.join(project_path, "Library"), arcname="Library", filter=_include)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+        os.replace(temp_path, archive_path)
+        existing = {"key": key_info["key"], "components": key_info["components"], "assets": key_info["assets"],
+                    "bytes": os.path.getsize(archive_path), "created": time.time()}
+        result["created"] = True
+    existing["last_used"] = time.time()
+    _write_metadata(cache_path, existing)
+    result["bytes"] = existing["bytes"]
+    result["evicted"] = evict(cache_path, max_bytes)
+    result["seconds"] = time.monotonic() - start
+    return result
+
+
+def restore(cache_path, project_path, metadata):
+    # Replaces the project's Library/ with the snapshot. Returns the seconds it took.
+    start = time.monotonic()
+    archive_path, _ = _snapshot_paths(cache_path, metadata["key"])
+    temp_dir = os.path.join(project_path, "Library.restoring")
+    if os.path.exists(temp_dir):
+        shutil.rmtree(temp_dir)
+    with tarfile.open(archive_path, "r:gz") as archive:
+        if hasattr(tarfile, "data_filter"):
+            archive.extractall(temp_dir, filter="data")
+        else:
+            archive.extractall(temp_dir)
+    library_path = os.path.join(project_path, "Library")
+    if os.path.exists(library_path):
+        # Keep this project's own bookkeeping (step cache, asset index); the snapshot has none.
+        for name in os.listdir(library_path):
+            if name.startswith(EXCLUDED_PREFIX):
+                os.replace(os.path.join(library_path, name), os.path.join(temp_dir, "Library", name))
+        shutil.rmtree(library_path)
+    os.replace(os.path.join(temp_dir, "Library"), library_path)
+    shutil.rmtree(temp_dir)
+    metadata["last_used"] = time.time()
+    _write_metadata(cache_path, metadata)
+    return time.monotonic() - start
+
+
+def evict(cache_path, max_bytes):
+    # Deletes least recently used snapshots until the cache fits in max_bytes. Returns the evicted keys.
+    snapshots = sorted(list_snapshots(cache_path), key=lambda metadata: metadata["last_used"])
+    total = sum(metadata["bytes"] for metadata in snapshots)
+    evicted = []
+    while total > max_bytes and len(snapshots) > 1:  # Never evict the most recently used one.
+        metadata = snapshots.pop(0)
+        for path in _snapshot_paths(cache_path, metadata["key"]):
+            if os.path.exists(path):
+                os.remove(path)
+        total -= metadata["bytes"]
+        evicted.append(metadata["key"])
+    return evicted
+
+
+def needs_seed(project_path):
+    # A workspace whose Library/ has no imported assets yet.
+    return not os.path.isdir(os.path.join(project_path, "Library", "Artifacts"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect and trim the Library/ snapshot cache.")
+    parser.add_argument("cache_path", help="Cache directory, e.g. RubeGoldbergVR_LibraryCache.")
+    parser.add_argument("--max-gb", type=float, default=None, help="Evict least recently used snapshots down to this size.")
+    args = parser.parse_args()
+    if args.max_gb is not None:
+        for key in evict(args.cache_path, int(args.max_gb * 1024 ** 3)):
+            print(f"Evicted {key}")
+    for metadata in sorted(list_snapshots(args.cache_path), key=lambda metadata: metadata["last_used"], reverse=True):
+        print(f"{metadata['key']}  Unity {metadata['components']['unity_version']:<14} {metadata['bytes'] / 1024 ** 2:8.1f} MiB  "
+              f"{len(metadata['assets'])} assets  last used {time.strftime('%Y-%m-%d %H:%M', time.localtime(metadata['last_used']))}")
+
+
+if __name__ == "__main__":
+    main()
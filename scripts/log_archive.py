@@ -0,0 +1,395 @@
+import argparse
+import base64
+import fnmatch
+import json
+import os
+import re
+import threading
+import time
+import zlib
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Compressed, indexed archive of every log create_unity_project.py's commands produce. The files in
+# <project>/Logs are overwritten on every run; the archive keeps each run's output (command stdout and the
+# Unity -logFile, as the lines arrive) in <archive>/<run id>.log.gz, or .log.zst where the zstandard
+# package is installed. Every log of the run is a stream, cut into blocks of about BLOCK_BYTES that are
+# compressed independently (a gzip member or zstd frame each), so any block can be read on its own.
+#
+# <run id>.idx.jsonl is the sidecar index, one JSON record per line, appended as blocks are written (a run
+# that dies keeps everything up to its last block):
+#   {"type": "run", "run", "started", "codec", ...}             once, first
+#   {"type": "stream", "id", "name", "source", "step", ...}     when a log starts
+#   {"type": "block", "stream", "offset", "length", "first_line", "lines", "bytes", "bloom", "errors"}
+#   {"type": "end", "finished", "raw_bytes", "bytes"}           once, when the run closes the archive
+# "errors" lists [line, text] of lines that look like errors, so they can be listed without decompressing
+# anything. "bloom" is a bloom filter over the trigrams of the block's lower-cased words: a literal search
+# only decompresses the blocks whose filter has every trigram of the search text, which keeps a search over
+# months of runs ("when did this error first appear?") down to the few blocks that can match. Regular
+# expressions are matched against every block of the selected logs.
+#
+# Retention keeps the newest runs by count and total size (--log-archive-keep-runs, --log-archive-max-gb).
+
+BLOCK_BYTES = 256 * 1024
+GZIP_LEVEL = 3
+ZSTD_LEVEL = 3
+DATA_SUFFIXES = {"gzip": ".log.gz", "zstd": ".log.zst"}
+INDEX_SUFFIX = ".idx.jsonl"
+# Bloom filters: 4 bits and 2 hashes per trigram is a ~15% false positive rate per trigram, but a search
+# text has many trigrams and a block is only read when all of them hit.
+BLOOM_BITS_PER_TRIGRAM = 4
+BLOOM_MIN_BITS = 1024
+BLOOM_HASHES = 2
+WORD_PATTERN = re.compile(r"[a-z0-9_]{3,}")
+ERROR_WORDS = ("error", "exception", "fail", "abort")
+MAX_ERRORS_PER_BLOCK = 50
+MAX_ERROR_CHARS = 300
+DEFAULT_KEEP_RUNS = 50
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+
+
+def default_archive_path(project_path):
+    return os.path.join(os.path.dirname(project_path), os.path.basename(project_path) + "_LogArchive")
+
+
+def default_codec():
+    return "zstd" if zstandard is not None else "gzip"
+
+
+def _compress(codec, data):
+    if codec == "zstd":
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)  # wbits 31: a complete gzip member.
+    return compressor.compress(data) + compressor.flush()
+
+
+def _decompress(codec, data):
+    if codec == "zstd":
+        if zstandard is None:
+            raise ValueError("this run is zstd-compressed; install the zstandard package to read it")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return zlib.decompress(data, 31)
+
+
+def _trigrams(words):
+    # Numbers (timings, counters, line numbers) are left out on both sides: they are most of a Unity log's
+    # distinct words and rarely what is searched for.
+    return {word[i:i + 3] for word in words if not word.isdigit() for i in range(len(word) - 2)}
+
+
+def _bloom_positions(trigram, bits):
+    data = trigram.encode("utf-8")
+    h1, h2 = zlib.crc32(data), zlib.adler32(data) | 1
+    return [(h1 + i * h2) % bits for i in range(BLOOM_HASHES)]
+
+
+def _make_bloom(trigrams):
+    bits = max(BLOOM_MIN_BITS, len(trigrams) * BLOOM_BITS_PER_TRIGRAM)
+    bloom = bytearray((bits + 7) // 8)
+    for trigram in trigrams:
+        for position in _bloom_positions(trigram, len(bloom) * 8):
+            bloom[position >> 3] |= 1 << (position & 7)
+    return base64.b64encode(bytes(bloom)).decode("ascii")
+
+
+def _bloom_has_all(bloom, trigrams):
+    bits = len(bloom) * 8
+    return all(bloom[position >> 3] & (1 << (position & 7)) for trigram in trigrams for position in _bloom_positions(trigram, bits))
+
+
+class LogStream:
+    # One log of the run. Lines are buffered and written as a compressed block every BLOCK_BYTES; words and
+    # error lines are only looked for per block, over the joined text, which is much cheaper than per line.
+    def __init__(self, archive, stream_id):
+        self.archive = archive
+        self.stream_id = stream_id
+        self.lines = []
+        self.size = 0
+        self.first_line = 1
+
+    def write(self, line):
+        if not line.endswith("\n"):
+            line += "\n"  # Keeps line numbers exact; long lines arrive in chunks.
+        self.lines.append(line)
+        self.size += len(line)
+        if self.size >= self.archive.block_bytes:
+            self.flush()
+
+    def _errors(self, lowered):
+        if not any(word in lowered for word in ERROR_WORDS):
+            return []
+        errors = []
+        for number, line in enumerate(self.lines, self.first_line):
+            if any(word in line.lower() for word in ERROR_WORDS):
+                errors.append([number, line.strip()[:MAX_ERROR_CHARS]])
+                if len(errors) == MAX_ERRORS_PER_BLOCK:
+                    break
+        return errors
+
+    def flush(self):
+        if not self.lines:
+            return
+        text = "".join(self.lines)
+        lowered = text.lower()
+        data = text.encode("utf-8", errors="replace")
+        self.archive.write_block({"type": "block", "stream": self.stream_id, "first_line": self.first_line, "lines": len(self.lines), "bytes": len(data),
+                                  "bloom": _make_bloom(_trigrams(set(WORD_PATTERN.findall(lowered)))), "errors": self._errors(lowered)}, data)
+        self.first_line += len(self.lines)
+        self.lines, self.size = [], 0
+
+
+class RunArchive:
+    def __init__(self, archive_path, codec=None, block_bytes=BLOCK_BYTES, info=None):
+        os.makedirs(archive_path, exist_ok=True)
+        self.codec = codec or default_codec()
+        self.block_bytes = block_bytes
+        self.run_id = time.strftime("%Y%m%d-%H%M%S") + f"-{os.getpid()}"
+        self.data_path = os.path.join(archive_path, self.run_id + DATA_SUFFIXES[self.codec])
+        self.index_path = os.path.join(archive_path, self.run_id + INDEX_SUFFIX)
+        self.data_file = open(self.data_path, "wb")
+        self.index_file = open(self.index_path, "w")
+        self.offset = 0
+        self.raw_bytes = 0
+        self.streams = []
+        self.lock = threading.Lock()
+        self._append_index({"type": "run", "run": self.run_id, "started": time.time(), "codec": self.codec, **(info or {})})
+
+    def _append_index(self, record):
+        self.index_file.write(json.dumps(record) + "\n")
+        self.index_file.flush()
+
+    def open_stream(self, name, **info):
+        with self.lock:
+            stream = LogStream(self, len(self.streams))
+            self.streams.append(stream)
+            self._append_index({"type": "stream", "id": stream.stream_id, "name": name, **info})
+        return stream
+
+    def write_block(self, record, data):
+        compressed = _compress(self.codec, data)  # Outside the lock, so concurrent commands compress in parallel.
+        with self.lock:
+            self.data_file.write(compressed)
+            self.data_file.flush()
+            record.update(offset=self.offset, length=len(compressed))
+            self.offset += len(compressed)
+            self.raw_bytes += len(data)
+            self._append_index(record)
+
+    def close(self):
+        for stream in self.streams:
+            stream.flush()
+        with self.lock:
+            self._append_index({"type": "end", "finished": time.time(), "raw_bytes": self.raw_bytes, "bytes": self.offset})
+            self.data_file.close()
+            self.index_file.close()
+
+
+class ArchiveHandler:
+    # Line handler for command_runner: archives each source ("stdout", "unity_log") of one command as a stream
+    # named names[source]. A failing archive (disk full) only stops archiving, never the command.
+    def __init__(self, archive, names, **info):
+        self.archive = archive
+        self.names = names
+        self.info = info
+        self.streams = {}
+        self.failed = False
+
+    def __call__(self, line, source):
+        if self.failed:
+            return None
+        try:
+            stream = self.streams.get(source)
+            if stream is None:
+                stream = self.streams[source] = self.archive.open_stream(self.names.get(source, source), source=source, **self.info)
+            stream.write(line)
+        except (OSError, ValueError) as e:
+            self.failed = True
+            print(f"Warning: log archiving stopped for this command: {e}")
+        return None
+
+    def finish(self):
+        if self.failed:
+            return
+        try:
+            for stream in self.streams.values():
+                stream.flush()
+        except (OSError, ValueError) as e:
+            print(f"Warning: could not archive the end of this command's logs: {e}")
+
+
+def load_run(index_path):
+    # The run's index as {"run", "started", "codec", "streams": {id: stream with "blocks"}, "end"}.
+    run = {"streams": {}, "end": None}
+    with open(index_path, "r") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:  # A torn last line of a run that died mid-write.
+                continue
+            kind = record.pop("type")
+            if kind == "run":
+                run.update(record)
+            elif kind == "stream":
+                record["blocks"] = []
+                run["streams"][record["id"]] = record
+            elif kind == "block":
+                run["streams"][record["stream"]]["blocks"].append(record)
+            elif kind == "end":
+                run["end"] = record
+    run["data_path"] = index_path[:-len(INDEX_SUFFIX)] + DATA_SUFFIXES.get(run.get("codec"), DATA_SUFFIXES["gzip"])
+    return run
+
+
+def list_runs(archive_path):
+    # Oldest first.
+    runs = []
+    if not os.path.isdir(archive_path):
+        return runs
+    for name in os.listdir(archive_path):
+        if name.endswith(INDEX_SUFFIX):
+            try:
+                run = load_run(os.path.join(archive_path, name))
+            except OSError:
+                continue
+            if "run" in run:
+                runs.append(run)
+    return sorted(runs, key=lambda run: run["started"])
+
+
+def _run_bytes(run):
+    index_path = run["data_path"][:-len(DATA_SUFFIXES[run["codec"]])] + INDEX_SUFFIX
+    return sum(os.path.getsize(path) for path in (run["data_path"], index_path) if os.path.exists(path))
+
+
+def apply_retention(archive_path, keep_runs=DEFAULT_KEEP_RUNS, max_bytes=DEFAULT_MAX_BYTES, keep=()):
+    # Deletes the oldest runs beyond keep_runs or max_bytes; runs in keep (the current one) stay. Returns their ids.
+    runs = list_runs(archive_path)
+    sizes = {run["run"]: _run_bytes(run) for run in runs}
+    total = sum(sizes.values())
+    removed = []
+    for run in runs:
+        remaining = len(runs) - len(removed)
+        if run["run"] in keep or ((keep_runs is None or remaining <= keep_runs) and (max_bytes is None or total <= max_bytes)):
+            continue
+        index_path = run["data_path"][:-len(DATA_SUFFIXES[run["codec"]])] + INDEX_SUFFIX
+        for path in (run["data_path"], index_path):
+            if os.path.exists(path):
+                os.remove(path)
+        total -= sizes[run["run"]]
+        removed.append(run["run"])
+    return removed
+
+
+def _read_block(data_file, codec, block):
+    data_file.seek(block["offset"])
+    return _decompress(codec, data_file.read(block["length"])).decode("utf-8", errors="replace")
+
+
+def search(archive_path, pattern, regex=False, ignore_case=False, log_pattern=None, run_ids=None, since=None, errors_only=False, stats=None):
+    # Yields {"run", "started", "log", "line", "text"} for matching lines, oldest run first. stats, if given, is
+    # filled with the number of blocks and bytes looked at versus decompressed.
+    flags = re.IGNORECASE if ignore_case else 0
+    matcher = re.compile(pattern if regex else re.escape(pattern), flags)
+    # Every trigram of the search text is in any line it matches; regular expressions prune nothing.
+    required = set() if regex else _trigrams(WORD_PATTERN.findall(pattern.lower()))
+    stats = stats if stats is not None else {}
+    stats.update(runs=0, blocks=0, blocks_read=0, bytes=0, bytes_read=0)
+    for run in list_runs(archive_path):
+        if (run_ids and run["run"] not in run_ids) or (since is not None and run["started"] < since):
+            continue
+        stats["runs"] += 1
+        streams = [stream for stream in run["streams"].values() if log_pattern is None or fnmatch.fnmatch(stream["name"], log_pattern)]
+        if not streams:
+            continue
+        with open(run["data_path"], "rb") as data_file:
+            for stream in streams:
+                for block in stream["blocks"]:
+                    stats["blocks"] += 1
+                    stats["bytes"] += block["bytes"]
+                    candidates = None
+                    if errors_only:
+                        candidates = [(line, text) for line, text in block["errors"] if matcher.search(text)]
+                    elif required and not _bloom_has_all(base64.b64decode(block["bloom"]), required):
+                        continue
+                    else:
+                        stats["blocks_read"] += 1
+                        stats["bytes_read"] += block["bytes"]
+                        lines = _read_block(data_file, run["codec"], block).split("\n")[:block["lines"]]
+                        candidates = [(block["first_line"] + i, text) for i, text in enumerate(lines) if matcher.search(text)]
+                    for line, text in candidates:
+                        yield {"run": run["run"], "started": run["started"], "log": stream["name"], "step": stream.get("step"), "line": line, "text": text.rstrip()}
+
+
+def print_archive_report(archive, removed):
+    streams = len(archive.streams)
+    ratio = archive.raw_bytes / archive.offset if archive.offset else 0.0
+    print(f"Log archive: run {archive.run_id}, {streams} log(s), {archive.raw_bytes / 1024 ** 2:.1f} MiB stored as "
+          f"{archive.offset / 1024 ** 2:.1f} MiB ({archive.codec}, {ratio:.1f}x) in {os.path.basename(archive.data_path)}.")
+    if removed:
+        print(f"  Retention removed {len(removed)} old run(s): {', '.join(removed)}")
+    print(f"  Search with: python scripts/log_archive.py search {os.path.dirname(archive.data_path)} PATTERN")
+
+
+def _format_time(timestamp):
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(timestamp))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Search and trim the compressed log archive of create_unity_project.py runs.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    runs_parser = commands.add_parser("runs", help="List archived runs.")
+    runs_parser.add_argument("archive_path", help="Archive directory, e.g. RubeGoldbergVR_LogArchive.")
+    search_parser = commands.add_parser("search", help="Find lines across runs, oldest run first.")
+    search_parser.add_argument("archive_path")
+    search_parser.add_argument("pattern", help="Text to look for (a regular expression with --regex).")
+    search_parser.add_argument("--regex", action="store_true", help="Treat the pattern as a regular expression; every block of the selected logs is read.")
+    search_parser.add_argument("-i", "--ignore-case", action="store_true")
+    search_parser.add_argument("--log", default=None, help="Only logs whose name matches this glob, e.g. 'unity_alpha_build*'.")
+    search_parser.add_argument("--run", action="append", default=[], help="Only this run id. Can be repeated.")
+    search_parser.add_argument("--since-days", type=float, default=None, help="Only runs started in the last this many days.")
+    search_parser.add_argument("--errors-only", action="store_true", help="Only search the indexed error lines; nothing is decompressed.")
+    search_parser.add_argument("--first", action="store_true", help="Stop at the first match: the run in which the text first appeared.")
+    search_parser.add_argument("--max-matches", type=int, default=200, help="Stop after this many matching lines.")
+    prune_parser = commands.add_parser("prune", help="Delete the oldest runs.")
+    prune_parser.add_argument("archive_path")
+    prune_parser.add_argument("--keep-runs", type=int, default=DEFAULT_KEEP_RUNS)
+    prune_parser.add_argument("--max-gb", type=float, default=DEFAULT_MAX_BYTES / 1024 ** 3)
+    args = parser.parse_args()
+
+    if args.command == "runs":
+        for run in list_runs(args.archive_path):
+            blocks = [block for stream in run["streams"].values() for block in stream["blocks"]]
+            raw = sum(block["bytes"] for block in blocks)
+            errors = sum(len(block["errors"]) for block in blocks)
+            state = "" if run["end"] else "  (incomplete)"
+            print(f"{run['run']}  {_format_time(run['started'])}  {len(run['streams']):>3} logs  {raw / 1024 ** 2:8.1f} MiB raw  "
+                  f"{_run_bytes(run) / 1024 ** 2:8.1f} MiB stored  {errors:>5} error lines{state}")
+    elif args.command == "search":
+        since = time.time() - args.since_days * 86400 if args.since_days is not None else None
+        stats = {}
+        count = 0
+        for match in search(args.archive_path, args.pattern, regex=args.regex, ignore_case=args.ignore_case, log_pattern=args.log,
+                            run_ids=set(args.run), since=since, errors_only=args.errors_only, stats=stats):
+            count += 1
+            if args.first:
+                print(f"First seen in run {match['run']} ({_format_time(match['started'])}), {match['log']} line {match['line']}:")
+                print(f"  {match['text']}")
+                break
+            print(f"{match['run']}  {match['log']}:{match['line']}: {match['text']}")
+            if count >= args.max_matches:
+                print(f"Stopped after {count} matches (--max-matches).")
+                break
+        if not count:
+            print("No matches.")
+        print(f"Looked at {stats.get('blocks', 0)} block(s) of {stats.get('runs', 0)} run(s), decompressed {stats.get('blocks_read', 0)} "
+              f"({stats.get('bytes_read', 0) / 1024 ** 2:.1f} of {stats.get('bytes', 0) / 1024 ** 2:.1f} MiB).")
+    elif args.command == "prune":
+        for run_id in apply_retention(args.archive_path, keep_runs=args.keep_runs, max_bytes=int(args.max_gb * 1024 ** 3)):
+            print(f"Removed run {run_id}")
+
+
+if __name__ == "__main__":
+    main()
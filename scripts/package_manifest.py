@@ -0,0 +1,118 @@
+import json
+import os
+import tarfile
+
+# Writes the XR packages of JulesBuildAutomation's xrPackages list straight into Packages/manifest.json before
+# Unity opens the project, so the Package Manager resolves all of them in the one pass it does on startup
+# instead of SetupVRProject adding them one request (one resolve, one recompile) at a time.
+#
+# With a package cache directory (--package-cache) the setup also works offline:
+# - packages whose tarball <name>-<version>.tgz is in the cache are referenced as "file:<tarball>", and so
+#   are the cached dependencies they declare, so nothing is downloaded;
+# - after a successful setup, every package Unity resolved into Library/PackageCache that is not cached yet
+#   is packed into the cache (npm tarball layout, files under package/), so the next fresh project needs no
+#   network at all.
+# A local or mirrored registry (--package-registry) is added as a scoped registry for the XR packages.
+
+MANIFEST_PATH = os.path.join("Packages", "manifest.json")
+PACKAGE_CACHE_DIR = os.path.join("Library", "PackageCache")
+REGISTRY_NAME = "Jules local registry"
+REGISTRY_SCOPES = ("com.unity.xr",)
+
+
+def parse_package_id(package_id):
+    name, _, version = package_id.partition("@")
+    return name, version
+
+
+def tarball_path(package_cache, name, version):
+    return os.path.join(package_cache, f"{name}-{version}.tgz")
+
+
+def _tarball_dependencies(path):
+    with tarfile.open(path, "r:gz") as archive:
+        member = archive.extractfile("package/package.json")
+        return json.load(member).get("dependencies", {})
+
+
+def plan_dependencies(package_ids, package_cache=None):
+    # Returns {name: (spec, source)}: the XR packages plus, with a cache, the cached dependencies they pull in.
+    planned = {}
+    pending = [parse_package_id(package_id) + (True,) for package_id in package_ids]
+    while pending:
+        name, version, requested = pending.pop(0)
+        if name in planned:
+            continue
+        path = tarball_path(package_cache, name, version) if package_cache else None
+        if path and os.path.isfile(path):
+            planned[name] = ("file:" + os.path.abspath(path).replace(os.sep, "/"), "cache")
+            pending.extend((dep_name, dep_version, False) for dep_name, dep_version in sorted(_tarball_dependencies(path).items())
+                           if os.path.isfile(tarball_path(package_cache, dep_name, dep_version)))
+        elif requested:
+            planned[name] = (version, "registry")
+    return planned
+
+
+def update_manifest(project_path, package_ids, package_cache=None, registry=None):
+    # Merges the packages into Packages/manifest.json, leaving every other entry alone. The file is only
+    # rewritten when something changed, since any write makes Unity re-resolve. Returns a result dict.
+    path = os.path.join(project_path, MANIFEST_PATH)
+    try:
+        with open(path, "r") as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        manifest = {"dependencies": {}}
+    original = json.dumps(manifest, sort_keys=True)
+    planned = plan_dependencies(package_ids, package_cache)
+    dependencies = manifest.setdefault("dependencies", {})
+    for name, (spec, _) in planned.items():
+        dependencies[name] = spec
+    if registry:
+        registries = manifest.setdefault("scopedRegistries", [])
+        if not any(entry.get("url") == registry for entry in registries):
+            registries.append({"name": REGISTRY_NAME, "url": registry, "scopes": list(REGISTRY_SCOPES)})
+    changed = json.dumps(manifest, sort_keys=True) != original
+    if changed:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + ".tmp", "w") as f:
+            json.dump(manifest, f, indent=2)
+            f.write("\n")
+        os.replace(path + ".tmp", path)
+    return {"changed": changed, "packages": {name: source for name, (_, source) in planned.items()}}
+
+
+def harvest_packages(project_path, package_cache):
+    # Packs every package in Library/PackageCache that has no tarball in the cache yet. Returns their ids.
+    harvested = []
+    cache_dir = os.path.join(project_path, PACKAGE_CACHE_DIR)
+    if not os.path.isdir(cache_dir):
+        return harvested
+    os.makedirs(package_cache, exist_ok=True)
+    for entry in sorted(os.listdir(cache_dir)):
+        package_dir = os.path.join(cache_dir, entry)
+        try:
+            with open(os.path.join(package_dir, "package.json"), "r") as f:
+                package = json.load(f)
+        except (OSError, ValueError):
+            continue
+        path = tarball_path(package_cache, package["name"], package["version"])
+        if os.path.exists(path):
+            continue
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with tarfile.open(temp_path, "w:gz") as archive:
+            archive.add(package_dir, arcname="package")
+        os.replace(temp_path, path)
+        harvested.append(f"{package['name']}@{package['version']}")
+    return harvested
+
+
+def print_manifest_report(result):
+    sources = result["packages"]
+    from_cache = sorted(name for name, source in sources.items() if source == "cache")
+    from_registry = sorted(name for name, source in sources.items() if source == "registry")
+    state = "updated" if result["changed"] else "already up to date"
+    print(f"Packages/manifest.json {state}: {len(sources)} package(s) resolve in one pass on startup.")
+    if from_cache:
+        print(f"  from the local package cache: {', '.join(from_cache)}")
+    if from_registry:
+        print(f"  from the registry: {', '.join(from_registry)}")
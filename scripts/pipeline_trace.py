@@ -0,0 +1,231 @@
+import atexit
+import calendar
+import contextlib
+import json
+import os
+import re
+import sys
+import threading
+import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Timeline tracing for create_unity_project.py. Records a span for every orchestrator step (step_graph opens
+# one around each step) and every subprocess, plus sub-spans recovered from the Unity log (package install, XR
+# configuration, per-platform BuildPlayer calls, pipeline steps), and writes them as Chrome trace-event JSON
+# (load it in chrome://tracing or https://ui.perfetto.dev) together with a plain-text summary table.
+#
+# There is one tracer per process. The module-level functions are no-ops until start_tracing() is called,
+# so helper modules can emit spans without caring whether tracing is enabled.
+
+TRACE_FILE_NAME = "pipeline_trace.json"
+RUSAGE_FILE_ENV = "JULES_RUSAGE_FILE"
+SUMMARY_FILE_NAME = "pipeline_trace_summary.txt"
+
+# (span name, begin pattern, end pattern). A "{key}" in the name is filled from the begin pattern's first
+# group, and the end pattern's first group must match it. Both "Jules:" (dummy) and "JulesBuildAutomation:"
+# prefixes are accepted. An unmatched begin is closed when the command ends.
+UNITY_LOG_SPANS = (
+    ("Package install", r"(?:Queuing XR packages|Attempting to install package)()", r"packages? installation requests sent()"),
+    ("XR configuration", r"Starting XR (?:configuration|Plug-in Management)()", r"(?:XR configuration complete|OpenXR configuration complete)()"),
+    ("VR scene setup", r"Creating basic VR scene elements()", r"Basic VR scene elements created()"),
+    ("Interactable objects", r"Adding interactable physics objects()", r"Interactable physics objects added()"),
+    ("Prefab creation", r"Creating Rube Goldberg prefabs()", r"All Rube Goldberg prefabs created()"),
+    ("Asset optimizations", r"(?:Applying|Starting) Asset Optimizations()", r"(?:Finished applying Asset Optimizations|All Asset Optimizations)()"),
+    ("BuildPlayer {key}", r"Building for (\w+)", r"(\w+) Alpha Test Build (?:succeeded|failed)"),
+    ("Pipeline step {key}", r"PIPELINE_STEP_BEGIN (\w+)", r"PIPELINE_STEP_(?:END|SKIPPED) (\w+)"),
+)
+# Unity's -timestamps option prefixes log lines with e.g. "2024-05-01T12:34:56.789Z|0x1a2b|".
+UNITY_TIMESTAMP_PATTERN = re.compile(r"^(\d{4})-(\d\d)-(\d\d)T(\d\d):(\d\d):(\d\d)(?:\.(\d+))?Z\|")
+
+# Nesting depth per category, used to indent the summary table.
+CATEGORY_DEPTH = {"step": 0, "wait": 1, "workspace": 1, "subprocess": 1, "analysis": 1, "unity": 2}
+
+_active_tracer = None
+
+
+class Tracer:
+    def __init__(self):
+        self.start_monotonic = time.monotonic()
+        self.start_wall = time.time()
+        self.events = []
+        self.thread_ids = {}
+        self.lock = threading.Lock()
+
+    def now_us(self):
+        return int((time.monotonic() - self.start_monotonic) * 1e6)
+
+    def wall_to_us(self, wall_time):
+        return int((wall_time - self.start_wall) * 1e6)
+
+    def _thread_id(self, name=None):
+        # Keyed by thread name so concurrent platform builds show up as separate, named tracks.
+        name = name or threading.current_thread().name
+        if name not in self.thread_ids:
+            self.thread_ids[name] = len(self.thread_ids) + 1
+        return self.thread_ids[name]
+
+    def add_span(self, name, category, start_us, end_us, args=None, thread_name=None):
+        with self.lock:
+            self.events.append({
+                "name": name, "cat": category, "ph": "X", "ts": start_us, "dur": max(end_us - start_us, 0),
+                "pid": os.getpid(), "tid": self._thread_id(thread_name), "args": args or {},
+            })
+
+    @contextlib.contextmanager
+    def span(self, name, category, **args):
+        # Yields the args dict so callers can attach results (exit codes, byte counts) before the span closes.
+        start_us = self.now_us()
+        try:
+            yield args
+        except SystemExit as e:
+            args.setdefault("status", "ok" if e.code in (None, 0) else "failed")
+            raise
+        except BaseException:
+            args.setdefault("status", "failed")
+            raise
+        finally:
+            self.add_span(name, category, start_us, self.now_us(), args)
+
+    def chrome_trace(self):
+        with self.lock:
+            metadata = [{"name": "thread_name", "ph": "M", "pid": os.getpid(), "tid": tid, "args": {"name": name}}
+                        for name, tid in self.thread_ids.items()]
+            events = sorted(self.events, key=lambda event: (event["ts"], -event["dur"]))
+        return {"traceEvents": metadata + events, "displayTimeUnit": "ms",
+                "otherData": {"start_time": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.start_wall))}}
+
+
+class UnityLogSpans:
+    # Line handler for command_runner that turns UNITY_LOG_SPANS markers into "unity" sub-spans.
+    # Log lines arrive on the log follower's thread, so spans are attributed to the thread that ran the command.
+    def __init__(self, tracer):
+        self.tracer = tracer
+        self.thread_name = threading.current_thread().name
+        self.rules = [(name, re.compile(begin), re.compile(end)) for name, begin, end in UNITY_LOG_SPANS]
+        self.open_spans = {}
+        self.lock = threading.Lock()
+
+    def _line_time_us(self, line):
+        match = UNITY_TIMESTAMP_PATTERN.match(line)
+        if not match:
+            return self.tracer.now_us()  # Arrival time; the log follower polls every 100 ms.
+        year, month, day, hour, minute, second, fraction = match.groups()
+        wall_time = calendar.timegm((int(year), int(month), int(day), int(hour), int(minute), int(second)))
+        wall_time += float("0." + fraction) if fraction else 0.0
+        return self.tracer.wall_to_us(wall_time)
+
+    def __call__(self, line, source):
+        if "Jules" not in line:
+            return None
+        for name, begin, end in self.rules:
+            end_match = end.search(line)
+            if end_match:
+                span_name = name.format(key=end_match.group(1))
+                with self.lock:
+                    start_us = self.open_spans.pop(span_name, None)
+                if start_us is not None:
+                    self.tracer.add_span(span_name, "unity", start_us, self._line_time_us(line), {"source": source}, self.thread_name)
+                continue
+            begin_match = begin.search(line)
+            if begin_match:
+                span_name = name.format(key=begin_match.group(1))
+                with self.lock:
+                    self.open_spans.setdefault(span_name, self._line_time_us(line))
+        return None
+
+    def finish(self):
+        end_us = self.tracer.now_us()
+        with self.lock:
+            open_spans, self.open_spans = self.open_spans, {}
+        for span_name, start_us in open_spans.items():
+            self.tracer.add_span(span_name, "unity", start_us, end_us, {"status": "unfinished"}, self.thread_name)
+
+
+def describe_command(command_list):
+    # Short span name for a subprocess: the -executeMethod target, or the Unity action otherwise.
+    if "-executeMethod" in command_list:
+        return command_list[command_list.index("-executeMethod") + 1]
+    if "-createProject" in command_list:
+        return "Unity -createProject"
+    return os.path.basename(command_list[0])
+
+
+def format_summary(trace):
+    events = [event for event in trace["traceEvents"] if event["ph"] == "X"]
+    if not events:
+        return "No spans recorded.\n"
+    total_us = max(event["ts"] + event["dur"] for event in events) or 1
+    thread_names = {event["tid"]: event["args"]["name"] for event in trace["traceEvents"] if event["ph"] == "M"}
+    lines = [f"{'span':<52} {'category':<11} {'start s':>8} {'dur s':>8} {'% run':>6}  thread", "-" * 100]
+    for event in events:
+        name = "  " * CATEGORY_DEPTH.get(event["cat"], 1) + event["name"]
+        status = event["args"].get("status")
+        if status and status != "ok":
+            name += f" [{status}]"
+        lines.append(f"{name[:52]:<52} {event['cat']:<11} {event['ts'] / 1e6:>8.2f} {event['dur'] / 1e6:>8.2f} "
+                     f"{100.0 * event['dur'] / total_us:>5.1f}%  {thread_names.get(event['tid'], '')}")
+    lines.append("-" * 100)
+    lines.append(f"Total wall time: {total_us / 1e6:.2f}s")
+    return "\n".join(lines) + "\n"
+
+
+def write_trace(tracer, output_dir):
+    os.makedirs(output_dir, exist_ok=True)
+    trace = tracer.chrome_trace()
+    trace_path = os.path.join(output_dir, TRACE_FILE_NAME)
+    with open(trace_path, "w") as f:
+        json.dump(trace, f)
+    summary = format_summary(trace)
+    summary_path = os.path.join(output_dir, SUMMARY_FILE_NAME)
+    with open(summary_path, "w") as f:
+        f.write(summary)
+    return trace_path, summary_path, summary
+
+
+def start_tracing(output_dir):
+    # Starts the process-wide tracer; the trace is written when the process exits, including via exit(1).
+    global _active_tracer
+    _active_tracer = Tracer()
+    tracer = _active_tracer
+
+    def finish():
+        trace_path, summary_path, summary = write_trace(tracer, output_dir)
+        print("Pipeline timeline:")
+        print(summary, end="")
+        print(f"Trace written to {trace_path} (open in chrome://tracing or ui.perfetto.dev); summary in {summary_path}")
+    atexit.register(finish)
+    return tracer
+
+
+def span(name, category, **args):
+    if _active_tracer is None:
+        return contextlib.nullcontext(args)
+    return _active_tracer.span(name, category, **args)
+
+
+def make_unity_log_spans():
+    # Returns a line handler (with a finish() method) or None when tracing is off.
+    if _active_tracer is None:
+        return None
+    return UnityLogSpans(_active_tracer)
+
+
+def record_rusage_at_exit():
+    # When JULES_RUSAGE_FILE is set, writes this process's own CPU time and peak RSS there on exit.
+    # Lets the benchmark harness separate orchestrator overhead from the Unity processes it waits for.
+    path = os.environ.get(RUSAGE_FILE_ENV)
+    if not path or resource is None:
+        return
+
+    def write_rusage():
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        with open(path, "w") as f:
+            # ru_maxrss is in KiB on Linux and bytes on macOS.
+            max_rss_kib = usage.ru_maxrss // 1024 if sys.platform == "darwin" else usage.ru_maxrss
+            json.dump({"user_cpu": usage.ru_utime, "system_cpu": usage.ru_stime, "max_rss_kib": max_rss_kib}, f)
+    # Registered before start_tracing(), so it runs last and includes writing the trace.
+    atexit.register(write_rusage)
@@ -0,0 +1,176 @@
+import concurrent.futures
+import contextvars
+import errno
+import os
+import shutil
+import threading
+import time
+
+import command_runner
+import pipeline_trace
+
+try:
+    import fcntl
+except ImportError:  # Windows: no reflinks, fall back to hardlinks/copies.
+    fcntl = None
+
+# Parallel per-platform alpha builds for create_unity_project.py (--parallel-platform-builds).
+# PerformAlphaTestBuild builds Windows and then Android in one editor, and the Android half also pays for
+# SwitchActiveBuildTarget reimporting assets. Here every platform gets its own workspace copy of the project
+# and its own Unity process started with the matching -buildTarget, and the outputs are merged back into
+# <project>/Builds/AlphaTest/<Platform>/<ProjectName>_v<version> afterwards.
+#
+# Workspaces are cloned with reflinks (copy-on-write, safe for everything) where the filesystem supports
+# them. Otherwise only files Unity never rewrites in place are hardlinked: source assets (but not their
+# .meta files, which the import optimizers change) and the content-addressed Library/Artifacts and
+# Library/PackageCache entries. Everything else, including Library databases such as ArtifactDB, is copied.
+
+PLATFORM_BUILDS = {
+    "Windows": {"method": "JulesBuildAutomation.PerformAlphaTestBuildWindows", "build_target": "Win64"},
+    "Android": {"method": "JulesBuildAutomation.PerformAlphaTestBuildAndroid", "build_target": "Android"},
+}
+WORKSPACE_EXCLUDED_DIRS = ("Builds", "Distribution", "Logs", "Temp")
+HARDLINK_SAFE_PREFIXES = ("Assets" + os.sep, os.path.join("Library", "Artifacts") + os.sep,
+                          os.path.join("Library", "PackageCache") + os.sep)
+FICLONE = 0x40049409  # _IOW(0x94, 9, int) from linux/fs.h
+
+
+def default_workspace_root(project_path):
+    return os.path.join(os.path.dirname(project_path), os.path.basename(project_path) + "_BuildWorkspaces")
+
+
+def _reflink(source_path, dest_path):
+    if fcntl is None:
+        raise OSError(errno.EOPNOTSUPP, "reflinks are not supported on this platform")
+    with open(source_path, "rb") as source, open(dest_path, "wb") as dest:
+        fcntl.ioctl(dest.fileno(), FICLONE, source.fileno())
+
+
+def _hardlink_safe(rel_path):
+    return rel_path.startswith(HARDLINK_SAFE_PREFIXES) and not rel_path.endswith(".meta")
+
+
+def clone_workspace(project_path, workspace_path):
+    # Recreates workspace_path as a cheap copy of project_path. Returns counts of files per clone method.
+    if os.path.exists(workspace_path):
+        shutil.rmtree(workspace_path)
+    stats = {"reflink": 0, "hardlink": 0, "copy": 0}
+    reflink_supported = True
+    for root, dirs, files in os.walk(project_path):
+        rel_root = os.path.relpath(root, project_path)
+        if rel_root == os.curdir:
+            dirs[:] = [d for d in dirs if d not in WORKSPACE_EXCLUDED_DIRS]
+            rel_root = ""
+        os.makedirs(os.path.join(workspace_path, rel_root), exist_ok=True)
+        for name in files:
+            rel_path = os.path.join(rel_root, name)
+            source_path = os.path.join(project_path, rel_path)
+            dest_path = os.path.join(workspace_path, rel_path)
+            if reflink_supported:
+                try:
+                    _reflink(source_path, dest_path)
+                    shutil.copystat(source_path, dest_path)
+                    stats["reflink"] += 1
+                    continue
+                except OSError as e:
+                    if e.errno not in (errno.EOPNOTSUPP, errno.ENOTTY, errno.EXDEV, errno.EINVAL, errno.ENOSYS):
+                        raise
+                    reflink_supported = False  # Same filesystem for every file, so don't retry per file.
+                    os.remove(dest_path)
+            if _hardlink_safe(rel_path):
+                try:
+                    os.link(source_path, dest_path)
+                    stats["hardlink"] += 1
+                    continue
+                except OSError as e:
+                    if e.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK):
+                        raise
+            shutil.copy2(source_path, dest_path)
+            stats["copy"] += 1
+    return stats
+
+
+def merge_platform_output(workspace_path, project_path, platform):
+    # Moves Builds/AlphaTest/<platform>/* from the workspace into the main project, replacing older copies.
+    source_dir = os.path.join(workspace_path, "Builds", "AlphaTest", platform)
+    dest_dir = os.path.join(project_path, "Builds", "AlphaTest", platform)
+    merged = []
+    if not os.path.isdir(source_dir):
+        return merged
+    os.makedirs(dest_dir, exist_ok=True)
+    for name in sorted(os.listdir(source_dir)):
+        dest_path = os.path.join(dest_dir, name)
+        if os.path.isdir(dest_path) and not os.path.islink(dest_path):
+            shutil.rmtree(dest_path)
+        elif os.path.lexists(dest_path):
+            os.remove(dest_path)
+        shutil.move(os.path.join(source_dir, name), dest_path)
+        merged.append(dest_path)
+    return merged
+
+
+def find_build_dirs(project_path, platforms):
+    # Newest Builds/AlphaTest/<Platform>/<Project>_v<version> per platform; the version file may already
+    # have been incremented past the version that was just built.
+    build_dirs = {}
+    for platform in platforms:
+        platform_dir = os.path.join(project_path, "Builds", "AlphaTest", platform)
+        if not os.path.isdir(platform_dir):
+            continue
+        candidates = [os.path.join(platform_dir, name) for name in os.listdir(platform_dir) if os.path.isdir(os.path.join(platform_dir, name))]
+        if candidates:
+            build_dirs[platform] = max(candidates, key=os.path.getmtime)
+    return build_dirs
+
+
+def _build_platform(platform, unity_editor_path, project_path, workspace_root, run_command):
+    result = {"platform": platform, "succeeded": False, "clone_stats": None, "merged": [], "error": None}
+    start = time.monotonic()
+    workspace_path = os.path.join(workspace_root, platform)
+    threading.current_thread().name = f"build-{platform}"  # Names this platform's track in the trace.
+    try:
+        with pipeline_trace.span(f"Clone workspace {platform}", "workspace") as span_args:
+            result["clone_stats"] = clone_workspace(project_path, workspace_path)
+            span_args.update(result["clone_stats"])
+        build = PLATFORM_BUILDS[platform]
+        log_name = f"unity_alpha_build_{platform.lower()}_log.txt"
+        command = [unity_editor_path, "-batchmode", "-quit", "-projectPath", workspace_path,
+                   "-buildTarget", build["build_target"], "-executeMethod", build["method"],
+                   "-logFile", os.path.join(project_path, "Logs", log_name)]
+        line_handlers = [command_runner.make_progress_printer(f"[{platform}] "), command_runner.make_failure_handler()]
+        if run_command(command, "cmd_" + log_name, line_handlers=line_handlers):
+            with pipeline_trace.span(f"Merge output {platform}", "workspace"):
+                result["merged"] = merge_platform_output(workspace_path, project_path, platform)
+            result["succeeded"] = True
+        else:
+            result["error"] = f"{build['method']} failed"
+    except OSError as e:
+        result["error"] = f"workspace error: {e}"
+    result["duration"] = time.monotonic() - start
+    return result
+
+
+def run_parallel_platform_builds(unity_editor_path, project_path, run_command, platforms=None, max_parallel=None, workspace_root=None):
+    # run_command is create_unity_project.py's run_command(command_list, log_file_name, line_handlers=...).
+    # Returns one result dict per platform; a failing platform does not stop the others.
+    platforms = platforms or list(PLATFORM_BUILDS)
+    workspace_root = workspace_root or default_workspace_root(project_path)
+    max_parallel = max_parallel or len(platforms)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_parallel) as executor:
+        # Each build runs in a copy of the caller's context, so the Unity processes join the caller's ProcessScope.
+        futures = [executor.submit(contextvars.copy_context().run, _build_platform, platform, unity_editor_path, project_path, workspace_root, run_command)
+                   for platform in platforms]
+        return [future.result() for future in futures]
+
+
+def print_platform_report(results):
+    print("Per-platform alpha build results:")
+    for result in results:
+        status = "SUCCEEDED" if result["succeeded"] else "FAILED"
+        clone = result["clone_stats"] or {}
+        clone_summary = ", ".join(f"{count} {method}" for method, count in clone.items() if count) or "-"
+        print(f"  {result['platform']:<10} {status:<10} {result['duration']:.1f}s  workspace: {clone_summary}")
+        for merged_path in result["merged"]:
+            print(f"    output: {merged_path}")
+        if result["error"]:
+            print(f"    error: {result['error']}")
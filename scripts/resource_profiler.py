@@ -0,0 +1,232 @@
+import json
+import os
+import threading
+import time
+
+# Resource profiling of the Unity processes create_unity_project.py starts. While a command runs, a sampler
+# thread reads its process tree from /proc every interval seconds: CPU time (user + system), resident memory,
+# storage read/write bytes (/proc/<pid>/io) and thread count, summed over the tree. The tree is found through
+# /proc/<pid>/task/<tid>/children, or, where the kernel has no children files, through the session id (every
+# command is started in its own session). A process's CPU time includes its reaped children's (cutime and
+# cstime), so helpers that start and exit between two samples are counted once their parent waits for them;
+# a process without a live ancestor in the tree keeps the CPU time of its last sample. I/O counters of processes that
+# exit keep the value of their last sample.
+#
+# Cost per sample is a handful of small /proc reads per process in the tree, on one thread that sleeps in
+# between, so the profiler is on by default; the sampler's own CPU time is part of every summary. The time
+# series is bounded (older samples are thinned out once MAX_SAMPLES is reached), so a long build does not
+# grow it without limit. Without /proc (macOS, Windows) nothing is sampled and summaries are None.
+#
+# Each command's summary and time series go to <command log>.resources.json; create_unity_project.py also
+# aggregates them per step into Logs/resource_summary.json.
+
+DEFAULT_INTERVAL = 1.0
+MAX_SAMPLES = 3600
+SUMMARY_FILE_NAME = "resource_summary.json"
+PROC = "/proc"
+try:
+    CLOCK_TICKS = os.sysconf("SC_CLK_TCK")
+    PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+except (ValueError, OSError, AttributeError):
+    CLOCK_TICKS = PAGE_SIZE = None
+
+
+def available():
+    return CLOCK_TICKS is not None and os.path.isfile(os.path.join(PROC, "self", "stat"))
+
+
+def _read(path):
+    try:
+        with open(path, "r") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def _read_stat(pid):
+    # (session id, parent pid, cpu ticks including reaped children, threads, rss pages) or None if the process is gone.
+    stat = _read(f"{PROC}/{pid}/stat")
+    if stat is None:
+        return None
+    fields = stat[stat.rfind(")") + 2:].split()  # The command name may contain spaces and parentheses.
+    return int(fields[3]), int(fields[1]), sum(int(field) for field in fields[11:15]), int(fields[17]), int(fields[21])
+
+
+def _read_io(pid):
+    io = _read(f"{PROC}/{pid}/io")
+    if io is None:
+        return None
+    values = dict(line.split(": ", 1) for line in io.splitlines() if ": " in line)
+    return int(values.get("read_bytes", 0)), int(values.get("write_bytes", 0))
+
+
+class ProcessTreeSampler(threading.Thread):
+    def __init__(self, pid, interval=DEFAULT_INTERVAL):
+        super().__init__(daemon=True, name=f"resources-{pid}")
+        self.pid = pid
+        self.interval = interval
+        self.stop_event = threading.Event()
+        self.started = time.monotonic()
+        self.last_seen = {}  # pid -> (cpu ticks, read bytes, write bytes), cumulative per process
+        self.parents = {}
+        self.samples = []
+        self.stride = 1
+        self.sample_count = 0
+        self.sampler_seconds = 0.0
+        self.use_children = os.path.isfile(f"{PROC}/{pid}/task/{pid}/children")
+
+    def _tree(self):
+        if self.use_children:
+            pids, pending = [], [self.pid]
+            while pending:
+                pid = pending.pop()
+                try:
+                    tids = os.listdir(f"{PROC}/{pid}/task")
+                except OSError:  # Exited since its parent was read.
+                    continue
+                pids.append(pid)
+                for tid in tids:
+                    children = _read(f"{PROC}/{pid}/task/{tid}/children")
+                    if children:
+                        pending.extend(int(child) for child in children.split())
+            return pids
+        pids = []
+        for entry in os.listdir(PROC):
+            if entry.isdigit():
+                stat = _read_stat(int(entry))
+                if stat is not None and stat[0] == self.pid:
+                    pids.append(int(entry))
+        return pids
+
+    def _ancestor_alive(self, pid, alive):
+        seen = set()
+        while pid in self.parents and pid not in seen:
+            seen.add(pid)
+            pid = self.parents[pid]
+            if pid in alive:
+                return True
+        return False
+
+    def sample(self):
+        cpu_start = time.thread_time()
+        processes = threads = rss_pages = 0
+        alive = set()
+        for pid in self._tree():
+            stat = _read_stat(pid)
+            if stat is None:
+                continue
+            _, self.parents[pid], ticks, process_threads, process_rss = stat
+            io = _read_io(pid)
+            previous = self.last_seen.get(pid, (0, 0, 0))
+            self.last_seen[pid] = (ticks, io[0] if io else previous[1], io[1] if io else previous[2])
+            alive.add(pid)
+            processes += 1
+            threads += process_threads
+            rss_pages += process_rss
+        for pid, (ticks, read_bytes, write_bytes) in list(self.last_seen.items()):
+            if ticks and pid not in alive and self._ancestor_alive(pid, alive):
+                # Reaped within the tree: a live ancestor's cutime/cstime now include all of its CPU time.
+                self.last_seen[pid] = (0, read_bytes, write_bytes)
+        self.sample_count += 1
+        if self.sample_count % self.stride == 0:
+            totals = [sum(values) for values in zip(*self.last_seen.values())] or [0, 0, 0]
+            self.samples.append({"t": round(time.monotonic() - self.started, 3), "processes": processes, "threads": threads,
+                                 "rss_bytes": rss_pages * PAGE_SIZE, "cpu_seconds": round(totals[0] / CLOCK_TICKS, 3),
+                                 "read_bytes": totals[1], "write_bytes": totals[2]})
+            if len(self.samples) >= MAX_SAMPLES:
+                self.samples = self.samples[::2]
+                self.stride *= 2
+        self.sampler_seconds += time.thread_time() - cpu_start
+
+    def run(self):
+        while True:
+            try:
+                self.sample()
+            except OSError:
+                pass
+            if self.stop_event.wait(self.interval):
+                return
+
+    def finish(self):
+        # Stops sampling and returns (summary, time series).
+        self.stop_event.set()
+        self.join()
+        duration = time.monotonic() - self.started
+        totals = [sum(values) for values in zip(*self.last_seen.values())] or [0, 0, 0]
+        rss = [sample["rss_bytes"] for sample in self.samples if sample["processes"]]
+        summary = {
+            "duration": round(duration, 3),
+            "interval": self.interval,
+            "samples": self.sample_count,
+            "cpu_seconds": round(totals[0] / CLOCK_TICKS, 3),
+            "cpu_percent": round(100.0 * totals[0] / CLOCK_TICKS / duration, 1) if duration > 0 else 0.0,
+            "peak_rss_bytes": max(rss, default=0),
+            "avg_rss_bytes": int(sum(rss) / len(rss)) if rss else 0,
+            "read_bytes": totals[1],
+            "write_bytes": totals[2],
+            "peak_threads": max((sample["threads"] for sample in self.samples), default=0),
+            "peak_processes": max((sample["processes"] for sample in self.samples), default=0),
+            "sampler_cpu_seconds": round(self.sampler_seconds, 4),
+        }
+        return summary, self.samples
+
+
+def start_sampler(pid, interval=DEFAULT_INTERVAL):
+    # None where /proc is not available.
+    if not available() or not interval or interval <= 0:
+        return None
+    sampler = ProcessTreeSampler(pid, interval)
+    sampler.sample()  # One sample right away, so even sub-interval commands get one.
+    sampler.start()
+    return sampler
+
+
+def write_command_profile(path, command, summary, samples):
+    with open(path, "w") as f:
+        json.dump({"command": command, "summary": summary, "samples": samples}, f)
+
+
+def summarize_steps(records):
+    # records: [{"step", "command", "summary"}] -> {step: aggregate}. peak_rss_bytes is the largest single
+    # command; peak_rss_sum_bytes adds up every command's peak, the upper bound for steps whose commands run
+    # concurrently (parallel platform builds, smoke shards).
+    steps = {}
+    for record in records:
+        summary = record["summary"]
+        step = steps.setdefault(record["step"], {"commands": 0, "duration": 0.0, "cpu_seconds": 0.0, "peak_rss_bytes": 0, "peak_rss_sum_bytes": 0,
+                                                 "avg_rss_bytes": 0, "read_bytes": 0, "write_bytes": 0, "peak_threads": 0, "sampler_cpu_seconds": 0.0})
+        weighted_rss = step["avg_rss_bytes"] * step["duration"] + summary["avg_rss_bytes"] * summary["duration"]
+        step["commands"] += 1
+        step["duration"] = round(step["duration"] + summary["duration"], 3)
+        step["cpu_seconds"] = round(step["cpu_seconds"] + summary["cpu_seconds"], 3)
+        step["peak_rss_bytes"] = max(step["peak_rss_bytes"], summary["peak_rss_bytes"])
+        step["peak_rss_sum_bytes"] += summary["peak_rss_bytes"]
+        step["avg_rss_bytes"] = int(weighted_rss / step["duration"]) if step["duration"] else 0
+        step["read_bytes"] += summary["read_bytes"]
+        step["write_bytes"] += summary["write_bytes"]
+        step["peak_threads"] = max(step["peak_threads"], summary["peak_threads"])
+        step["sampler_cpu_seconds"] = round(step["sampler_cpu_seconds"] + summary["sampler_cpu_seconds"], 4)
+    return steps
+
+
+def write_step_summary(path, records):
+    steps = summarize_steps(records)
+    with open(path, "w") as f:
+        json.dump({"steps": steps, "commands": records}, f, indent=2)
+    return steps
+
+
+def _mib(value):
+    return f"{value / 1024 ** 2:.0f} MiB"
+
+
+def print_step_report(steps, path):
+    if not steps:
+        return
+    print("Resource usage per step:")
+    print(f"  {'step':<24} {'cmds':>4} {'cpu s':>8} {'peak RSS':>10} {'avg RSS':>10} {'read':>10} {'written':>10} {'threads':>7}")
+    for name, step in steps.items():
+        print(f"  {name:<24} {step['commands']:>4} {step['cpu_seconds']:>8.1f} {_mib(step['peak_rss_bytes']):>10} {_mib(step['avg_rss_bytes']):>10} "
+              f"{_mib(step['read_bytes']):>10} {_mib(step['write_bytes']):>10} {step['peak_threads']:>7}")
+    sampler = sum(step["sampler_cpu_seconds"] for step in steps.values())
+    print(f"  Sampling cost {sampler * 1000:.0f}ms CPU; details in {path} and <command log>.resources.json")
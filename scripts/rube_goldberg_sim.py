@@ -0,0 +1,447 @@
+import argparse
+import bisect
+import concurrent.futures
+import heapq
+import json
+import math
+import os
+import sys
+import time
+
+try:
+    import numpy
+except ImportError:  # Falls back to the (slower, sequential) pure Python chain model.
+    numpy = None
+
+# Headless pre-simulation of Rube Goldberg layouts built from the prefabs CreateRubeGoldbergPrefabs generates
+# (Ramp, Lever, Domino), so a broken or too expensive layout is rejected before anybody pays for a Unity scene
+# build. This is a coarse rigid-body approximation, not a replacement for PhysX: it answers "does the chain
+# reaction run to the end, when does each part fire, and how much physics does Unity have to simulate".
+#
+# A layout is JSON: {"name": ..., "start": [part ids], "parts": [...]}, every part {"id", "type", "targets"}:
+#   Ramp    a ball (the 1 kg Interactable_Sphere, "ball_mass") released at the top rolls down the 2 m board
+#           tilted 15 degrees, then "runout" metres across the floor into its targets.
+#   Lever   the 1 m, 0.5 kg Arm on its HingeJoint, struck "strike_distance" metres from the hinge: it has to
+#           swing from its lower limit (-45 degrees) to its upper one (+45) to hit its targets.
+#   Domino  a run of "count" dominoes (0.1 x 0.5 x 0.25 m, 1 kg), placed from "position" [x, z] along
+#           "heading" degrees every "spacing" metres, turning "turn" degrees per domino; or explicitly as
+#           "dominoes": [[x, z, heading], ...]. The last one falls onto the run's targets.
+# Dimensions and masses default to the prefabs' and can be overridden per part.
+#
+# Dominoes are modelled as rectangles toppling about their front edge. Each one needs enough angular speed
+# to lift its centre of mass over that edge, hits the next one once its top has crossed the gap, passes on
+# part of its angular momentum and keeps pushing with part of the energy it releases while falling onto it.
+# That recurrence is solved for all dominoes of a run at once (numpy): a Jacobi sweep updates every domino
+# from its predecessor's previous estimate and the chain settles to its terminal wave speed within a few
+# dozen sweeps regardless of length. The fall times are then integrated in one vectorized pass.
+#
+# Layouts are evaluated in a process pool (evaluate_layouts, or several layout files on the command line).
+# A layout is accepted when every part fires and it stays within the budget: total duration, rigidbody count
+# and the peak number of bodies awake at once (which is what the physics step actually pays for).
+
+GRAVITY = 9.81
+DOMINO = {"height": 0.5, "thickness": 0.1, "width": 0.25, "mass": 1.0, "spacing": 0.3}
+RAMP = {"length": 2.0, "angle": 15.0, "ball_mass": 1.0, "runout": 0.5}
+LEVER = {"arm_length": 1.0, "arm_mass": 0.5, "limit": 45.0, "strike_distance": 0.25}
+PART_TYPES = ("Ramp", "Lever", "Domino")
+# A domino hands on this fraction of its angular momentum when it hits the next one...
+IMPACT_EFFICIENCY = 0.7
+# ...and this fraction of the potential energy it releases while falling onto it.
+PUSH_EFFICIENCY = 0.5
+# Parts hit each other in partly elastic collisions: a ball, an Arm tip or a falling domino striking a Lever's
+# Arm or the first domino of a run.
+RESTITUTION = 0.5
+# External impulses hit a domino at this fraction of its height.
+STRIKE_HEIGHT = 0.8
+MAX_TURN_DEGREES = 30.0
+ROLLING_RESISTANCE = 0.02
+RAMP_RELEASE_MOMENTUM = 0.05
+# The push that starts the layout: a 1 kg hand at 1 m/s.
+START_SPEED = 1.0
+START_MASS = 1.0
+# Seconds a body stays awake after it came to rest on something.
+SETTLE_SECONDS = 1.0
+INTEGRATION_SAMPLES = 64
+CONVERGENCE_TOLERANCE = 1e-9
+DEFAULT_BUDGET = {"max_seconds": 120.0, "max_bodies": 5000, "max_peak_awake": 300}
+
+
+class LayoutError(ValueError):
+    pass
+
+
+def _domino_geometry(part):
+    # Returns (positions, headings, dims) with one extra "virtual" domino after the last one that stands for
+    # whatever the run falls onto, so its exit uses the same model as every other hit.
+    dims = {name: float(part.get(name, default)) for name, default in DOMINO.items()}
+    if "dominoes" in part:
+        placed = [(float(x), float(z), float(heading)) for x, z, heading in part["dominoes"]]
+        if not placed:
+            raise LayoutError(f"Domino part '{part['id']}' has an empty dominoes list.")
+        x, z, heading = placed[-1]
+        placed.append((x + dims["spacing"] * math.cos(math.radians(heading)), z + dims["spacing"] * math.sin(math.radians(heading)), heading))
+        return [(x, z) for x, z, _ in placed], [heading for _, _, heading in placed], dims
+    count = int(part.get("count", 1))
+    if count < 1:
+        raise LayoutError(f"Domino part '{part['id']}' needs a count of at least 1.")
+    x, z = (float(value) for value in part.get("position", (0.0, 0.0)))
+    heading0 = float(part.get("heading", 0.0))
+    turn = float(part.get("turn", 0.0))
+    if numpy is not None:
+        headings = heading0 + turn * numpy.arange(count + 1)
+        steps = dims["spacing"] * numpy.stack([numpy.cos(numpy.radians(headings[:-1])), numpy.sin(numpy.radians(headings[:-1]))], axis=1)
+        positions = numpy.concatenate([[[x, z]], [x, z] + numpy.cumsum(steps, axis=0)])
+        return positions, headings, dims
+    positions, headings = [(x, z)], [heading0]
+    for index in range(1, count + 1):
+        step = math.radians(headings[-1])
+        positions.append((positions[-1][0] + dims["spacing"] * math.cos(step), positions[-1][1] + dims["spacing"] * math.sin(step)))
+        headings.append(heading0 + turn * index)
+    return positions, headings, dims
+
+
+def _domino_constants(dims):
+    height, thickness, mass = dims["height"], dims["thickness"], dims["mass"]
+    radius = 0.5 * math.hypot(height, thickness)  # Centre of mass to the front edge it topples about.
+    inertia = mass * (height ** 2 + thickness ** 2) / 3.0
+    return {"radius": radius, "apex": math.atan2(thickness, height), "inertia": inertia, "k": mass * GRAVITY * radius / inertia}
+
+
+def _chain_numpy(positions, headings, dims, first_omega):
+    c = _domino_constants(dims)
+    height, thickness, width = dims["height"], dims["thickness"], dims["width"]
+    positions = numpy.asarray(positions, dtype=float)
+    headings = numpy.asarray(headings, dtype=float)
+    count = len(positions) - 1
+
+    # Pair geometry: domino i onto domino i + 1 (the last pair is the exit onto the targets).
+    directions = numpy.stack([numpy.cos(numpy.radians(headings[:-1])), numpy.sin(numpy.radians(headings[:-1]))], axis=1)
+    offsets = positions[1:] - positions[:-1]
+    along = numpy.einsum("ij,ij->i", offsets, directions)
+    lateral = numpy.abs(offsets[:, 0] * directions[:, 1] - offsets[:, 1] * directions[:, 0])
+    turn = numpy.abs((headings[1:] - headings[:-1] + 180.0) % 360.0 - 180.0)
+    gap = along - thickness
+    linked = (gap > 0) & (gap < height) & (lateral < width) & (turn <= MAX_TURN_DEGREES)
+    contact = numpy.where(linked, numpy.arcsin(numpy.clip(gap / height, 0.0, 1.0)), c["apex"])
+    rest = numpy.maximum(numpy.arccos(numpy.clip(thickness / numpy.maximum(along, thickness), 0.0, 1.0)), contact)
+    released = PUSH_EFFICIENCY * 2.0 * c["k"] * (numpy.cos(contact - c["apex"]) - numpy.cos(rest - c["apex"]))
+    # Squared angular speed needed to reach the contact angle (or to get over the edge at all).
+    needed = 2.0 * c["k"] * (numpy.cos(numpy.minimum(contact, c["apex"]) - c["apex"]) - math.cos(c["apex"]))
+    gained = 2.0 * c["k"] * (math.cos(c["apex"]) - numpy.cos(contact - c["apex"]))
+    impact = (IMPACT_EFFICIENCY * numpy.cos(contact)) ** 2
+
+    # Start every domino at the terminal speed of its predecessor's spacing; only the dominoes the chain
+    # actually reaches have to settle.
+    terminal_sq = (impact * gained + released) / (1.0 - impact)
+    omega_sq = numpy.concatenate([[first_omega ** 2], terminal_sq[:-1]])
+    reached = None
+    for _ in range(count + 1):
+        falls = omega_sq > needed
+        next_sq = numpy.where(falls & linked, impact * numpy.maximum(omega_sq + gained, 0.0) + released, 0.0)
+        updated = numpy.concatenate([[first_omega ** 2], next_sq[:-1]])
+        previous, reached = reached, numpy.cumprod(numpy.concatenate([[True], (falls & linked)[:-1]])).astype(bool)
+        converged = (previous is not None and numpy.array_equal(previous, reached)
+                     and numpy.allclose(updated[reached], omega_sq[reached], rtol=CONVERGENCE_TOLERANCE, atol=CONVERGENCE_TOLERANCE))
+        omega_sq = updated
+        if converged:
+            break
+    falls = omega_sq > needed
+    fired = numpy.cumprod(numpy.concatenate([[True], (falls & linked)[:-1]])).astype(bool) & falls
+
+    # Fall times to contact, midpoint rule over the angle for every domino at once.
+    samples = contact[:, None] * (numpy.arange(INTEGRATION_SAMPLES) + 0.5)[None, :] / INTEGRATION_SAMPLES
+    omega = numpy.sqrt(numpy.maximum(omega_sq[:, None] + 2.0 * c["k"] * (math.cos(c["apex"]) - numpy.cos(samples - c["apex"])), 1e-12))
+    durations = numpy.where(fired, contact * numpy.mean(1.0 / omega, axis=1), 0.0)
+    offsets_in_time = numpy.concatenate([[0.0], numpy.cumsum(durations[:-1])])
+    fallen = int(fired.sum())
+    exits = bool(fired[-1] and linked[-1])
+    exit_omega = math.sqrt(max(omega_sq[-1] + gained[-1], 0.0)) if exits else 0.0
+    return {"fired": fired, "offsets": offsets_in_time, "durations": durations, "fallen": fallen, "exits": exits,
+            "exit_omega": exit_omega, "inertia": c["inertia"]}
+
+
+def _chain_python(positions, headings, dims, first_omega):
+    # The same recurrence, solved domino by domino.
+    c = _domino_constants(dims)
+    height, thickness, width = dims["height"], dims["thickness"], dims["width"]
+    count = len(positions) - 1
+    fired, offsets, durations = [], [], []
+    omega_sq, elapsed, exit_omega = first_omega ** 2, 0.0, 0.0
+    for index in range(count):
+        heading = math.radians(headings[index])
+        dx, dz = positions[index + 1][0] - positions[index][0], positions[index + 1][1] - positions[index][1]
+        along = dx * math.cos(heading) + dz * math.sin(heading)
+        lateral = abs(dx * math.sin(heading) - dz * math.cos(heading))
+        turn = abs((headings[index + 1] - headings[index] + 180.0) % 360.0 - 180.0)
+        gap = along - thickness
+        linked = 0 < gap < height and lateral < width and turn <= MAX_TURN_DEGREES
+        contact = math.asin(min(gap / height, 1.0)) if linked else c["apex"]
+        needed = 2.0 * c["k"] * (math.cos(min(contact, c["apex"]) - c["apex"]) - math.cos(c["apex"]))
+        falls = omega_sq > needed
+        fired.append(falls)
+        offsets.append(elapsed)
+        if not falls:
+            durations.append(0.0)
+            break
+        duration = 0.0
+        for sample in range(INTEGRATION_SAMPLES):
+            angle = contact * (sample + 0.5) / INTEGRATION_SAMPLES
+            duration += 1.0 / math.sqrt(max(omega_sq + 2.0 * c["k"] * (math.cos(c["apex"]) - math.cos(angle - c["apex"])), 1e-12))
+        durations.append(contact * duration / INTEGRATION_SAMPLES)
+        elapsed += durations[-1]
+        if not linked:
+            break
+        rest = max(math.acos(min(thickness / max(along, thickness), 1.0)), contact)
+        released = PUSH_EFFICIENCY * 2.0 * c["k"] * (math.cos(contact - c["apex"]) - math.cos(rest - c["apex"]))
+        contact_sq = max(omega_sq + 2.0 * c["k"] * (math.cos(c["apex"]) - math.cos(contact - c["apex"])), 0.0)
+        omega_sq = (IMPACT_EFFICIENCY * math.cos(contact)) ** 2 * contact_sq + released
+        if index == count - 1:
+            exit_omega = math.sqrt(contact_sq)
+    fallen = sum(fired)
+    fired += [False] * (count - len(fired))
+    offsets += [elapsed] * (count - len(offsets))
+    durations += [0.0] * (count - len(durations))
+    return {"fired": fired, "offsets": offsets, "durations": durations, "fallen": fallen, "exits": exit_omega > 0.0,
+            "exit_omega": exit_omega, "inertia": c["inertia"]}
+
+
+def _strike(speed, mass, distance, inertia):
+    # Angular speed of a hinged body (moment of inertia about its pivot) hit "distance" from the pivot.
+    return (1.0 + RESTITUTION) * mass * speed * distance / (inertia + mass * distance ** 2)
+
+
+def _simulate_dominoes(part, speed, mass):
+    positions, headings, dims = _domino_geometry(part)
+    inertia = _domino_constants(dims)["inertia"]
+    first_omega = _strike(speed, mass, STRIKE_HEIGHT * dims["height"], inertia)
+    chain = (_chain_numpy if numpy is not None else _chain_python)(positions, headings, dims, first_omega)
+    # The last domino's top hits the targets with the mass it effectively has at its top.
+    chain["exit"] = (chain["exit_omega"] * dims["height"], inertia / dims["height"] ** 2)
+    chain["count"] = len(positions) - 1
+    return chain
+
+
+def _simulate_ramp(part, speed, mass):
+    dims = {name: float(part.get(name, default)) for name, default in RAMP.items()}
+    if speed * mass < RAMP_RELEASE_MOMENTUM:
+        return None, "impulse too weak to release the ball"
+    angle = math.radians(dims["angle"])
+    # A solid sphere rolling without slipping.
+    acceleration = 5.0 / 7.0 * GRAVITY * (math.sin(angle) - ROLLING_RESISTANCE * math.cos(angle))
+    if acceleration <= 0:
+        return None, "ramp too flat for the ball to roll"
+    descent = math.sqrt(2.0 * dims["length"] / acceleration)
+    speed = acceleration * descent
+    deceleration = ROLLING_RESISTANCE * GRAVITY
+    arrival_sq = speed ** 2 - 2.0 * deceleration * dims["runout"]
+    if arrival_sq <= 0:
+        return None, f"ball stops {speed ** 2 / (2.0 * deceleration):.2f}m into its {dims['runout']:.2f}m runout"
+    arrival = math.sqrt(arrival_sq)
+    runout = (speed - arrival) / deceleration if deceleration > 0 else dims["runout"] / speed
+    return {"duration": descent + runout, "exit": (arrival, dims["ball_mass"]), "bodies": 2}, None
+
+
+def _simulate_lever(part, speed, mass):
+    dims = {name: float(part.get(name, default)) for name, default in LEVER.items()}
+    length, limit = dims["arm_length"], math.radians(dims["limit"])
+    inertia = dims["arm_mass"] * length ** 2 / 3.0
+    omega_sq = _strike(speed, mass, dims["strike_distance"], inertia) ** 2
+    lift = dims["arm_mass"] * GRAVITY * length / inertia  # The centre of mass sits half way along the Arm.
+    end_sq = omega_sq - lift * 2.0 * math.sin(limit)
+    if end_sq <= 0:
+        return None, "impulse too weak to swing the Arm up to its limit"
+    duration = 0.0
+    for sample in range(INTEGRATION_SAMPLES):
+        angle = -limit + 2.0 * limit * (sample + 0.5) / INTEGRATION_SAMPLES
+        duration += 1.0 / math.sqrt(omega_sq - lift * (math.sin(angle) + math.sin(limit)))
+    duration *= 2.0 * limit / INTEGRATION_SAMPLES
+    return {"duration": duration, "exit": (math.sqrt(end_sq) * length, inertia / length ** 2), "bodies": 1}, None
+
+
+def _peak_awake(intervals_start, intervals_end):
+    # Largest number of intervals open at the same time.
+    if numpy is not None:
+        starts = numpy.sort(numpy.concatenate(intervals_start)) if intervals_start else numpy.zeros(0)
+        ends = numpy.sort(numpy.concatenate(intervals_end)) if intervals_end else numpy.zeros(0)
+        if not len(starts):
+            return 0
+        return int((numpy.arange(1, len(starts) + 1) - numpy.searchsorted(ends, starts, side="right")).max())
+    starts = sorted(value for chunk in intervals_start for value in chunk)
+    ends = sorted(value for chunk in intervals_end for value in chunk)
+    return max((index + 1 - bisect.bisect_right(ends, start) for index, start in enumerate(starts)), default=0)
+
+
+def validate_layout(layout):
+    parts = layout.get("parts")
+    if not parts:
+        raise LayoutError("Layout has no parts.")
+    by_id = {}
+    for part in parts:
+        if "id" not in part or part.get("type") not in PART_TYPES:
+            raise LayoutError(f"Every part needs an id and a type of {', '.join(PART_TYPES)}: {part}")
+        if part["id"] in by_id:
+            raise LayoutError(f"Duplicate part id '{part['id']}'.")
+        by_id[part["id"]] = part
+    for part in parts:
+        for target in part.get("targets", ()):
+            if target not in by_id:
+                raise LayoutError(f"Part '{part['id']}' targets unknown part '{target}'.")
+    start = layout.get("start") or [parts[0]["id"]]
+    for part_id in start:
+        if part_id not in by_id:
+            raise LayoutError(f"Start part '{part_id}' is not in the layout.")
+    return by_id, start
+
+
+def simulate_layout(layout, timeline=False):
+    # Runs the chain reaction. Returns {part id: {"type", "fired", "fire_time", "done_time", "note", ...}}
+    # plus the rigidbody count and peak awake bodies; timeline=True adds every domino's fire time.
+    by_id, start = validate_layout(layout)
+    parts = {part_id: {"type": part["type"], "fired": False, "fire_time": None, "done_time": None, "note": "never hit"}
+             for part_id, part in by_id.items()}
+    bodies = 0
+    for part in by_id.values():
+        if part["type"] == "Domino":
+            bodies += len(part["dominoes"]) if "dominoes" in part else int(part.get("count", 1))
+        else:
+            bodies += 2 if part["type"] == "Ramp" else 1
+    awake_start, awake_end = [], []
+    push = (float(layout.get("start_speed", START_SPEED)), float(layout.get("start_mass", START_MASS)))
+    events = [(0.0, index, part_id, push, None) for index, part_id in enumerate(start)]
+    heapq.heapify(events)
+    sequence = len(events)
+    while events:
+        fire_time, _, part_id, (speed, mass), source = heapq.heappop(events)
+        report, part = parts[part_id], by_id[part_id]
+        if report["fired"]:
+            continue
+        if part["type"] == "Domino":
+            chain = _simulate_dominoes(part, speed, mass)
+            report.update({"dominoes": chain["count"], "fallen": chain["fallen"]})
+            if not chain["fallen"]:
+                report["note"] = f"impulse from {source or 'start'} too weak to topple the first domino"
+                continue
+            fire_times = [fire_time + offset for offset in chain["offsets"][:chain["fallen"]]]
+            ends = [begin + duration + SETTLE_SECONDS for begin, duration in zip(fire_times, chain["durations"][:chain["fallen"]])]
+            awake_start.append(fire_times)
+            awake_end.append(ends)
+            done_time = fire_times[-1] + chain["durations"][chain["fallen"] - 1]
+            impulse = chain["exit"] if chain["exits"] else None
+            if chain["fallen"] < chain["count"]:
+                report["note"] = f"chain breaks after domino {chain['fallen']} of {chain['count']}"
+            elif not chain["exits"]:
+                report["note"] = "last domino does not reach its targets"
+            else:
+                report["note"] = None
+            if timeline:
+                report["timeline"] = [round(value, 4) for value in fire_times]
+        else:
+            simulated, failure = (_simulate_ramp if part["type"] == "Ramp" else _simulate_lever)(part, speed, mass)
+            if simulated is None:
+                report["note"] = failure
+                if part["type"] == "Lever" or speed * mass < RAMP_RELEASE_MOMENTUM:
+                    continue
+                simulated = {"duration": 0.0, "exit": None, "bodies": 2}  # The ball is released but never arrives.
+            else:
+                report["note"] = None
+            done_time = fire_time + simulated["duration"]
+            impulse = simulated["exit"]
+            awake_start.append([fire_time] * simulated["bodies"])
+            awake_end.append([done_time + SETTLE_SECONDS] * simulated["bodies"])
+        report.update({"fired": True, "fire_time": round(fire_time, 4), "done_time": round(done_time, 4)})
+        if impulse is not None:
+            for target in part.get("targets", ()):
+                sequence += 1
+                heapq.heappush(events, (done_time, sequence, target, impulse, part_id))
+    return {"parts": parts, "bodies": bodies, "peak_awake": _peak_awake(awake_start, awake_end)}
+
+
+def evaluate_layout(layout, budget=None, timeline=False):
+    # Simulates one layout and checks it against the budget. Never raises for a bad layout.
+    budget = dict(DEFAULT_BUDGET, **(budget or {}))
+    name = layout.get("name", "layout")
+    start = time.monotonic()
+    try:
+        simulated = simulate_layout(layout, timeline=timeline)
+    except (LayoutError, KeyError, TypeError, ValueError) as e:
+        return {"name": name, "accepted": False, "reasons": [f"invalid layout: {e}"], "duration": None, "bodies": 0, "peak_awake": 0, "parts": {},
+                "seconds": time.monotonic() - start}
+    parts = simulated["parts"]
+    reasons = [f"{part_id} ({report['type']}) {report['note']}" for part_id, report in parts.items() if report["note"]]
+    fire_times = [report["done_time"] for report in parts.values() if report["fired"]]
+    duration = max(fire_times) if fire_times else 0.0
+    if duration > budget["max_seconds"]:
+        reasons.append(f"chain takes {duration:.1f}s, budget is {budget['max_seconds']:.1f}s")
+    if simulated["bodies"] > budget["max_bodies"]:
+        reasons.append(f"{simulated['bodies']} rigidbodies, budget is {budget['max_bodies']}")
+    if simulated["peak_awake"] > budget["max_peak_awake"]:
+        reasons.append(f"{simulated['peak_awake']} bodies awake at once, budget is {budget['max_peak_awake']}")
+    return {"name": name, "accepted": not reasons, "reasons": reasons, "duration": round(duration, 4), "bodies": simulated["bodies"],
+            "peak_awake": simulated["peak_awake"], "parts": parts, "seconds": time.monotonic() - start}
+
+
+def evaluate_layouts(layouts, budget=None, workers=None, timeline=False):
+    # One result per layout, in order; layouts are spread over a process pool.
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(layouts) < 2:
+        return [evaluate_layout(layout, budget, timeline) for layout in layouts]
+    with concurrent.futures.ProcessPoolExecutor(max_workers=min(workers, len(layouts))) as executor:
+        futures = [executor.submit(evaluate_layout, layout, budget, timeline) for layout in layouts]
+        return [future.result() for future in futures]
+
+
+def load_layouts(paths):
+    # Each file holds one layout or a list of candidate layouts.
+    layouts = []
+    for path in paths:
+        with open(path, "r") as f:
+            loaded = json.load(f)
+        for index, layout in enumerate(loaded if isinstance(loaded, list) else [loaded]):
+            layout.setdefault("name", f"{os.path.basename(path)}#{index + 1}" if isinstance(loaded, list) else os.path.basename(path))
+            layouts.append(layout)
+    return layouts
+
+
+def print_layout_report(results, verbose=False):
+    for result in results:
+        state = "ACCEPTED" if result["accepted"] else "REJECTED"
+        duration = f"{result['duration']:.2f}s" if result["duration"] is not None else "-"
+        print(f"  {result['name']:<32} {state:<8} chain {duration:>8}  {result['bodies']} bodies, peak {result['peak_awake']} awake  "
+              f"(simulated in {result['seconds'] * 1000:.0f}ms)")
+        for reason in result["reasons"]:
+            print(f"      {reason}")
+        if verbose:
+            for part_id, report in result["parts"].items():
+                when = f"fires at {report['fire_time']:.3f}s, done at {report['done_time']:.3f}s" if report["fired"] else "never fires"
+                fallen = f", {report['fallen']}/{report['dominoes']} dominoes fall" if "dominoes" in report else ""
+                print(f"      {part_id:<20} {report['type']:<7} {when}{fallen}")
+    accepted = sum(1 for result in results if result["accepted"])
+    print(f"  {accepted} of {len(results)} layout(s) accepted.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate Rube Goldberg layouts headlessly and reject broken or too expensive ones.")
+    parser.add_argument("layouts", nargs="+", help="Layout JSON files (one layout or a list of candidate layouts each).")
+    parser.add_argument("--workers", type=int, default=None, help="Processes evaluating layouts concurrently (default: one per CPU).")
+    parser.add_argument("--max-seconds", type=float, default=DEFAULT_BUDGET["max_seconds"], help="Longest acceptable chain reaction.")
+    parser.add_argument("--max-bodies", type=int, default=DEFAULT_BUDGET["max_bodies"], help="Most rigidbodies a layout may use.")
+    parser.add_argument("--max-peak-awake", type=int, default=DEFAULT_BUDGET["max_peak_awake"], help="Most rigidbodies that may be awake at the same time.")
+    parser.add_argument("--verbose", action="store_true", help="Show when every part fires.")
+    parser.add_argument("--json", type=str, default=None, help="Also write the results (with every domino's fire time) to this file.")
+    args = parser.parse_args()
+    try:
+        layouts = load_layouts(args.layouts)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+    budget = {"max_seconds": args.max_seconds, "max_bodies": args.max_bodies, "max_peak_awake": args.max_peak_awake}
+    results = evaluate_layouts(layouts, budget, workers=args.workers, timeline=bool(args.json))
+    print(f"Simulated {len(results)} layout(s) ({'numpy' if numpy is not None else 'pure Python'}):")
+    print_layout_report(results, verbose=args.verbose)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    sys.exit(0 if any(result["accepted"] for result in results) else 1)
+
+
+if __name__ == "__main__":
+    main()
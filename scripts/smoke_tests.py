@@ -0,0 +1,227 @@
+import concurrent.futures
+import contextvars
+import json
+import os
+import re
+import threading
+import time
+import xml.etree.ElementTree as ElementTree
+
+import command_runner
+import pipeline_trace
+import platform_builds
+
+# Sharded smoke tests for create_unity_project.py (--run-smoke-tests). Every test case is declared
+# individually (SMOKE_TESTS below, or a JSON spec with the same fields) and implemented by name in
+# JulesBuildAutomation's SmokeTests table. Per platform the cases are split into shards, and each shard runs
+# in its own process:
+# - editor shards run JulesBuildAutomation.RunSmokeTestShard in a workspace copy of the project (Unity
+#   cannot open one project in two editors), cloned like the parallel platform builds;
+# - with --smoke-player, shards run the built player (or a stub) headless instead, which needs no workspace.
+# Both understand the same arguments: -julesSmokeTests A,B -julesSmokePlatform P -julesSmokeBuildDir DIR
+# -julesSmokeResults FILE. They log "SMOKE_TEST <name> PASSED|FAILED <ms>ms" as each case finishes and
+# append one JSON line per case to the results file. The first failing case stops every shard unless
+# --smoke-keep-going is set. Results are written as JUnit XML (Logs/smoke_tests_junit.xml), and case
+# durations are kept in Logs/smoke_test_timings.json so the next run can balance its shards.
+
+SMOKE_TESTS = (
+    {"name": "BuildOutputExists", "platforms": ("Windows", "Android")},
+    {"name": "BuildOutputNotEmpty", "platforms": ("Windows", "Android")},
+    {"name": "BuildFolderVersioned", "platforms": ("Windows", "Android")},
+    {"name": "SampleSceneInBuild", "platforms": ("Windows", "Android")},
+    {"name": "XRLoaderConfigured", "platforms": ("Windows", "Android")},
+    {"name": "RubeGoldbergPrefabsPresent", "platforms": ("Windows", "Android")},
+)
+DEFAULT_SHARDS_PER_PLATFORM = 2
+DEFAULT_ESTIMATED_SECONDS = 1.0
+JUNIT_FILE_NAME = "smoke_tests_junit.xml"
+TIMINGS_FILE_NAME = "smoke_test_timings.json"
+RESULT_LINE_PATTERN = re.compile(r"SMOKE_TEST (\S+) (PASSED|FAILED)")
+SHARD_METHOD = "JulesBuildAutomation.RunSmokeTestShard"
+
+
+def default_workspace_root(project_path):
+    return os.path.join(os.path.dirname(project_path), os.path.basename(project_path) + "_SmokeWorkspaces")
+
+
+def load_cases(spec_path=None, names=None):
+    # spec_path: JSON list of {"name": ..., "platforms": [...]}; names: optional filter.
+    cases = list(SMOKE_TESTS)
+    if spec_path:
+        with open(spec_path, "r") as f:
+            cases = json.load(f)
+        for case in cases:
+            if "name" not in case:
+                raise ValueError(f"Smoke test entry without a name in {spec_path}: {case}")
+    if names:
+        unknown = set(names) - {case["name"] for case in cases}
+        if unknown:
+            raise ValueError(f"Unknown smoke test(s): {', '.join(sorted(unknown))}")
+        cases = [case for case in cases if case["name"] in names]
+    return cases
+
+
+def load_timings(log_dir):
+    try:
+        with open(os.path.join(log_dir, TIMINGS_FILE_NAME), "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def plan_shards(cases, platforms, shards_per_platform, timings):
+    # Longest-first greedy assignment on the durations of the previous run, so shards finish together.
+    shards = []
+    for platform in platforms:
+        platform_cases = [case["name"] for case in cases if platform in case.get("platforms", platforms)]
+        if not platform_cases:
+            continue
+        estimate = lambda name: timings.get(f"{platform}/{name}", DEFAULT_ESTIMATED_SECONDS)
+        platform_shards = [{"id": f"{platform}-{index + 1}", "platform": platform, "cases": [], "estimated_seconds": 0.0}
+                           for index in range(min(shards_per_platform, len(platform_cases)))]
+        for name in sorted(platform_cases, key=estimate, reverse=True):
+            shard = min(platform_shards, key=lambda candidate: candidate["estimated_seconds"])
+            shard["cases"].append(name)
+            shard["estimated_seconds"] += estimate(name)
+        shards.extend(platform_shards)
+    return shards
+
+
+def _shard_command(shard, project_path, unity_editor_path, build_dir, results_path, log_path, workspace_path, player):
+    test_args = ["-julesSmokeTests", ",".join(shard["cases"]), "-julesSmokePlatform", shard["platform"],
+                 "-julesSmokeBuildDir", build_dir, "-julesSmokeResults", results_path, "-logFile", log_path]
+    if player:
+        executable = player.format(build_dir=build_dir, platform=shard["platform"], project=os.path.basename(project_path))
+        return [executable, "-batchmode", "-nographics"] + test_args
+    return [unity_editor_path, "-batchmode", "-quit", "-projectPath", workspace_path, "-executeMethod", SHARD_METHOD] + test_args
+
+
+def _read_results(results_path):
+    results = {}
+    try:
+        with open(results_path, "r") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    entry = json.loads(line)
+                    results[entry["name"]] = entry
+    except (OSError, ValueError):
+        pass
+    return results
+
+
+def _run_shard(shard, project_path, unity_editor_path, run_command, build_dirs, workspace_root, player, stop):
+    # Runs on a pool thread in a copy of the caller's context; the shard scope is a child of the step's scope.
+    command_runner.PROCESS_SCOPE.set(stop["scope"])
+    threading.current_thread().name = f"smoke-{shard['id']}"
+    log_dir = os.path.join(project_path, "Logs")
+    results_path = os.path.join(log_dir, f"smoke_results_{shard['id'].lower()}.jsonl")
+    log_path = os.path.join(log_dir, f"unity_smoke_{shard['id'].lower()}_log.txt")
+    if os.path.exists(results_path):
+        os.remove(results_path)
+    shard.update({"succeeded": False, "error": None, "results_path": results_path, "log": log_path})
+    start = time.monotonic()
+    if stop["scope"].cancel_reason:
+        shard["error"] = "not started: " + stop["scope"].cancel_reason
+        return shard
+    workspace_path = None
+    if not player:
+        workspace_path = os.path.join(workspace_root, shard["id"])
+        try:
+            with pipeline_trace.span(f"Clone workspace {shard['id']}", "workspace") as span_args:
+                span_args.update(platform_builds.clone_workspace(project_path, workspace_path))
+        except OSError as e:
+            shard["error"] = f"workspace error: {e}"
+            return shard
+
+    def stop_on_failure(line, source):
+        match = RESULT_LINE_PATTERN.search(line)
+        if match and match.group(2) == "FAILED" and not stop["keep_going"]:
+            stop["scope"].cancel(f"smoke test {match.group(1)} failed on {shard['platform']}")
+        return None
+
+    command = _shard_command(shard, project_path, unity_editor_path, build_dirs[shard["platform"]], results_path, log_path, workspace_path, player)
+    line_handlers = [command_runner.make_progress_printer(f"[{shard['id']}] "), command_runner.make_failure_handler(), stop_on_failure]
+    shard["succeeded"] = run_command(command, f"cmd_unity_smoke_{shard['id'].lower()}_log.txt", line_handlers=line_handlers)
+    if not shard["succeeded"] and not stop["keep_going"]:
+        stop["scope"].cancel(f"smoke shard {shard['id']} failed")
+    shard["duration"] = time.monotonic() - start
+    return shard
+
+
+def run_smoke_tests(project_path, unity_editor_path, run_command, cases, platforms, shards_per_platform=DEFAULT_SHARDS_PER_PLATFORM,
+                    player=None, keep_going=False, workspace_root=None):
+    # run_command is create_unity_project.py's run_command. Returns (case results, shards).
+    log_dir = os.path.join(project_path, "Logs")
+    os.makedirs(log_dir, exist_ok=True)
+    build_dirs = platform_builds.find_build_dirs(project_path, platforms)
+    timings = load_timings(log_dir)
+    shards = plan_shards(cases, [platform for platform in platforms if platform in build_dirs], shards_per_platform, timings)
+    results = [{"platform": platform, "name": case["name"], "status": "error", "seconds": 0.0, "message": "no alpha build found for this platform"}
+               for platform in platforms if platform not in build_dirs
+               for case in cases if platform in case.get("platforms", platforms)]
+    stop = {"scope": command_runner.ProcessScope(parent=command_runner.PROCESS_SCOPE.get()), "keep_going": keep_going}
+    workspace_root = workspace_root or default_workspace_root(project_path)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(len(shards), 1)) as executor:
+        futures = [executor.submit(contextvars.copy_context().run, _run_shard, shard, project_path, unity_editor_path, run_command,
+                                   build_dirs, workspace_root, player, stop) for shard in shards]
+        for future in futures:
+            future.result()
+
+    for shard in shards:
+        reported = _read_results(shard["results_path"])
+        for name in shard["cases"]:
+            entry = reported.get(name)
+            if entry is not None:
+                results.append({"platform": shard["platform"], "name": name, "status": "passed" if entry["status"] == "passed" else "failed",
+                                "seconds": entry.get("seconds", 0.0), "message": entry.get("message"), "shard": shard["id"]})
+            elif stop["scope"].cancel_reason:
+                results.append({"platform": shard["platform"], "name": name, "status": "skipped", "seconds": 0.0,
+                                "message": "not run: stopped early after " + stop["scope"].cancel_reason, "shard": shard["id"]})
+            else:
+                results.append({"platform": shard["platform"], "name": name, "status": "error", "seconds": 0.0,
+                                "message": shard["error"] or f"shard {shard['id']} exited without reporting this test", "shard": shard["id"]})
+    for result in results:
+        if result["status"] in ("passed", "failed"):
+            timings[f"{result['platform']}/{result['name']}"] = round(result["seconds"], 3)
+    with open(os.path.join(log_dir, TIMINGS_FILE_NAME), "w") as f:
+        json.dump(timings, f, indent=2, sort_keys=True)
+    return results, shards
+
+
+def write_junit(results, path):
+    # One <testsuite> per platform.
+    root = ElementTree.Element("testsuites", name="smoke tests")
+    for platform in sorted({result["platform"] for result in results}):
+        platform_results = [result for result in results if result["platform"] == platform]
+        suite = ElementTree.SubElement(root, "testsuite", name=f"smoke.{platform}", tests=str(len(platform_results)),
+                                       failures=str(sum(1 for result in platform_results if result["status"] == "failed")),
+                                       errors=str(sum(1 for result in platform_results if result["status"] == "error")),
+                                       skipped=str(sum(1 for result in platform_results if result["status"] == "skipped")),
+                                       time=f"{sum(result['seconds'] for result in platform_results):.3f}")
+        for result in platform_results:
+            case = ElementTree.SubElement(suite, "testcase", classname=f"smoke.{platform}", name=result["name"], time=f"{result['seconds']:.3f}")
+            if result["status"] in ("failed", "error", "skipped"):
+                tag = {"failed": "failure", "error": "error", "skipped": "skipped"}[result["status"]]
+                ElementTree.SubElement(case, tag, message=result["message"] or "")
+    tree = ElementTree.ElementTree(root)
+    ElementTree.indent(tree)
+    tree.write(path, encoding="utf-8", xml_declaration=True)
+    return path
+
+
+def print_report(results, shards, junit_path):
+    print("Smoke test results:")
+    for shard in shards:
+        print(f"  shard {shard['id']:<12} {len(shard['cases'])} case(s), estimated {shard['estimated_seconds']:.1f}s, took {shard.get('duration', 0.0):.1f}s")
+    for result in results:
+        line = f"  {result['platform']:<10} {result['name']:<32} {result['status'].upper():<8} {result['seconds']:.2f}s"
+        if result["status"] != "passed" and result["message"]:
+            line += f"  {result['message']}"
+        print(line)
+    counts = {status: sum(1 for result in results if result["status"] == status) for status in ("passed", "failed", "error", "skipped")}
+    print("  " + ", ".join(f"{count} {status}" for status, count in counts.items()) + f"; JUnit XML written to {junit_path}")
+
+
+def all_passed(results):
+    return bool(results) and all(result["status"] == "passed" for result in results)
@@ -0,0 +1,142 @@
+import hashlib
+import json
+import os
+import re
+
+import asset_index
+
+# Content-hashed step cache for create_unity_project.py. Each cacheable step has a set of named input
+# components (script hash, XR package list, Unity version, optimization flags, project files); their hashes
+# are stored in a manifest inside the project after the step succeeds. On the next run a step whose
+# components all match, and whose outputs still exist, is skipped. --force / --force-step bypass the cache.
+
+MANIFEST_PATH = os.path.join("Library", "jules_step_cache.json")
+MANIFEST_VERSION = 1
+
+CACHEABLE_STEPS = ("DeployScript", "SetupVRProject")
+STEP_OUTPUTS = {
+    "DeployScript": (os.path.join("Assets", "Editor", "JulesBuildAutomation.cs"),),
+    "SetupVRProject": (
+        os.path.join("Assets", "Scenes", "SampleScene.unity"),
+        os.path.join("Assets", "RubeGoldbergPrefabs", "Ramp.prefab"),
+        os.path.join("Assets", "RubeGoldbergPrefabs", "Lever.prefab"),
+        os.path.join("Assets", "RubeGoldbergPrefabs", "Domino.prefab"),
+    ),
+}
+# Project files that influence SetupVRProject besides the automation script itself.
+SETUP_PROJECT_FILES = (os.path.join("Packages", "manifest.json"), os.path.join("ProjectSettings", "ProjectVersion.txt"))
+SETUP_PROJECT_DIRS = (os.path.join("Assets", "Editor"),)
+
+XR_PACKAGES_PATTERN = re.compile(r"xrPackages\s*=\s*new List<string>\s*\{+(.*?)\}+\s*;", re.S)
+OPTIMIZATION_FLAG_PATTERN = re.compile(r"public static bool (enable\w+)\s*=\s*(true|false)\s*;")
+
+
+def _sha256_bytes(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def _sha256_file(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _sha256_json(value):
+    return _sha256_bytes(json.dumps(value, sort_keys=True).encode("utf-8"))
+
+
+def _setup_script_hash(cs_bytes):
+    # --alpha-build bumps buildVersion on every run, and SetupVRProject does not use it.
+    return _sha256_bytes(asset_index.BUILD_VERSION_PATTERN.sub(b"", cs_bytes))
+
+
+def parse_cs_inputs(cs_text):
+    # Extracts the xrPackages list and the optimization flags main_script.py baked into JulesBuildAutomation.cs.
+    packages_match = XR_PACKAGES_PATTERN.search(cs_text)
+    xr_packages = re.findall(r'"([^"]+)"', packages_match.group(1)) if packages_match else []
+    flags = {name: value == "true" for name, value in OPTIMIZATION_FLAG_PATTERN.findall(cs_text)}
+    return xr_packages, flags
+
+
+def _project_files_hash(project_path):
+    entries = []
+    paths = [os.path.join(project_path, rel_path) for rel_path in SETUP_PROJECT_FILES]
+    for rel_dir in SETUP_PROJECT_DIRS:
+        for root, dirs, files in os.walk(os.path.join(project_path, rel_dir)):
+            dirs.sort()
+            # The deployed automation script is already covered by the "script" component.
+            paths.extend(os.path.join(root, name) for name in sorted(files)
+                         if not name.endswith(".meta") and name != "JulesBuildAutomation.cs")
+    for path in paths:
+        if os.path.isfile(path):
+            entries.append((os.path.relpath(path, project_path), _sha256_file(path)))
+    return _sha256_json(entries)
+
+
+def compute_step_inputs(step, project_path, cs_source_path, unity_version):
+    # Returns {component_name: hash} for the given step.
+    with open(cs_source_path, "rb") as f:
+        cs_bytes = f.read()
+    if step == "DeployScript":
+        return {"script": _sha256_bytes(cs_bytes)}
+    xr_packages, flags = parse_cs_inputs(cs_bytes.decode("utf-8", errors="replace"))
+    return {
+        "script": _setup_script_hash(cs_bytes),
+        "xr_packages": _sha256_json(xr_packages),
+        "unity_version": _sha256_json(unity_version),
+        "optimization_flags": _sha256_json(flags),
+        "project_files": _project_files_hash(project_path),
+    }
+
+
+def load_manifest(project_path):
+    path = os.path.join(project_path, MANIFEST_PATH)
+    try:
+        with open(path, "r") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {"version": MANIFEST_VERSION, "steps": {}}
+    if manifest.get("version") != MANIFEST_VERSION:
+        return {"version": MANIFEST_VERSION, "steps": {}}
+    return manifest
+
+
+def save_manifest(project_path, manifest):
+    path = os.path.join(project_path, MANIFEST_PATH)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = path + ".tmp"
+    with open(temp_path, "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(temp_path, path)
+
+
+def check_step(manifest, step, inputs, project_path, forced=False):
+    # Returns (hit, reason).
+    if forced:
+        return False, "forced"
+    recorded = manifest["steps"].get(step)
+    if recorded is None:
+        return False, "no cache entry"
+    changed = sorted(name for name in set(inputs) | set(recorded["inputs"]) if inputs.get(name) != recorded["inputs"].get(name))
+    if changed:
+        return False, "changed: " + ", ".join(changed)
+    missing = [rel_path for rel_path in STEP_OUTPUTS.get(step, ()) if not os.path.exists(os.path.join(project_path, rel_path))]
+    if missing:
+        return False, "missing output: " + ", ".join(missing)
+    return True, "inputs unchanged"
+
+
+def record_step(manifest, step, inputs, project_path):
+    manifest["steps"][step] = {"inputs": inputs}
+    save_manifest(project_path, manifest)
+
+
+def print_cache_report(report):
+    # report is a list of (step, hit, reason) tuples in execution order.
+    if not report:
+        return
+    print("Step cache report:")
+    for step, hit, reason in report:
+        print(f"  {step:<20} {'HIT' if hit else 'MISS':<5} {reason}")
@@ -0,0 +1,237 @@
+import asyncio
+import concurrent.futures
+import contextvars
+import threading
+import time
+
+import command_runner
+import pipeline_trace
+
+# Dependency-graph runner for create_unity_project.py's steps. Each step declares the steps it depends on
+# and runs as soon as they are done, so independent work (log analysis, asset index updates, artifact
+# hashing, version-file sync) overlaps with the next Unity step instead of waiting behind it.
+#
+# Steps are plain blocking functions returning True on success. They run on worker threads driven by an
+# asyncio event loop, which owns scheduling, per-step timeouts and cancellation:
+# - deps must have succeeded; after only has to have finished (in any state) first.
+# - resources are exclusive: Unity cannot open one project in two editors, so every step that launches the
+#   editor on the project holds the "unity_project" resource.
+# - A step that fails or times out stops the run if it is critical: steps that have not started are
+#   skipped, and running ones are cancelled by killing the process groups they started (see
+#   command_runner.ProcessScope). Non-critical failures only skip their own dependents.
+# - Cancelling a step's Python code is cooperative: the long loops in its helpers (artifact_store,
+#   delta_distribution, library_cache) call command_runner.check_cancelled() and stop. A step that times out
+#   and does not return within CANCEL_GRACE seconds of being cancelled is reported as timed out anyway and the
+#   run goes on without it; its thread keeps running and the process exits once it is done.
+# - Background steps (spawn()) can be added from a running step, e.g. log analysis after a Unity command.
+#   They have no dependencies, are not cancelled when another step fails, and the run waits for them.
+
+SUCCEEDED = "SUCCEEDED"
+FAILED = "FAILED"
+TIMED_OUT = "TIMED OUT"
+CANCELLED = "CANCELLED"
+SKIPPED = "SKIPPED"
+MAX_WORKERS = 16
+CANCEL_GRACE = 10.0
+# Name of the step whose action is running in this context (threads a step starts with a copied context
+# inherit it), so work done on a step's behalf can be attributed to it.
+CURRENT_STEP = contextvars.ContextVar("step_graph_current_step", default=None)
+
+
+class Step:
+    def __init__(self, name, action, deps=(), after=(), timeout=None, critical=True, resources=(), background=False):
+        self.name = name
+        self.action = action
+        self.deps = tuple(deps)
+        self.after = tuple(after)
+        self.timeout = timeout
+        self.critical = critical
+        self.resources = tuple(sorted(resources))
+        self.background = background
+        self.result = {"name": name, "status": None, "reason": None, "start": None, "duration": 0.0, "background": background}
+
+
+class StepGraph:
+    def __init__(self, default_timeout=None, timeouts=None):
+        self.default_timeout = default_timeout
+        self.timeouts = dict(timeouts or {})
+        self.steps = {}
+        self.failed_step = None
+        self.scopes = {}
+        self.loop = None
+        self.background_tasks = set()
+        self.lock = threading.Lock()
+        self.executor = None
+
+    def add(self, name, action, deps=(), after=(), timeout=None, critical=True, resources=()):
+        # Dependencies must already be in the graph, which also rules out cycles.
+        for dep in tuple(deps) + tuple(after):
+            if dep not in self.steps:
+                raise ValueError(f"Step '{name}' depends on unknown step '{dep}'.")
+        if name in self.steps:
+            raise ValueError(f"Duplicate step '{name}'.")
+        timeout = self.timeouts.get(name, timeout if timeout is not None else self.default_timeout)
+        self.steps[name] = Step(name, action, deps, after, timeout, critical, resources)
+        return name
+
+    def spawn(self, name, action):
+        # Thread-safe; from outside a run the action just runs inline.
+        if self.loop is None:
+            action()
+            return
+        with self.lock:
+            suffix = 2
+            unique_name = name
+            while unique_name in self.steps:
+                unique_name = f"{name} #{suffix}"
+                suffix += 1
+            step = Step(unique_name, action, critical=False, background=True)
+            self.steps[unique_name] = step
+        self.loop.call_soon_threadsafe(self._start_background, step)
+
+    def _start_background(self, step):
+        task = self.loop.create_task(self._execute(step))
+        self.background_tasks.add(task)
+        task.add_done_callback(self.background_tasks.discard)
+
+    def _run_action(self, step, scope):
+        # Runs on a worker thread. Each step gets its own thread name, i.e. its own track in the trace;
+        # background steps share one.
+        thread = threading.current_thread()
+        previous_name, thread.name = thread.name, "background" if step.background else f"step-{step.name}"
+        command_runner.PROCESS_SCOPE.set(scope)
+        CURRENT_STEP.set(step.name)
+        try:
+            with pipeline_trace.span(step.name, "step") as span_args:
+                succeeded = bool(step.action())
+                span_args.setdefault("status", "ok" if succeeded else "failed")
+                return succeeded
+        finally:
+            thread.name = previous_name
+
+    async def _execute(self, step):
+        scope = command_runner.ProcessScope()
+        with self.lock:
+            self.scopes[step.name] = scope
+        step.result["start"] = time.monotonic()
+        # copy_context() carries the scope into this step's thread only; platform_builds propagates it further.
+        future = self.loop.run_in_executor(self.executor, contextvars.copy_context().run, self._run_action, step, scope)
+        try:
+            succeeded = await asyncio.wait_for(asyncio.shield(future), step.timeout)
+            if succeeded:
+                status = SUCCEEDED
+            elif scope.cancel_reason:
+                status = CANCELLED
+                step.result["reason"] = scope.cancel_reason
+            else:
+                status = FAILED
+        except asyncio.TimeoutError:
+            scope.cancel(f"step '{step.name}' timed out after {step.timeout:g}s")
+            status = TIMED_OUT
+            step.result["reason"] = f"timed out after {step.timeout:g}s"
+            if not await self._wait_after_cancel(future):
+                step.result["reason"] += f"; still running {CANCEL_GRACE:g}s after it was cancelled, no longer waited for"
+        except asyncio.CancelledError:
+            # The run itself was cancelled (Ctrl+C): kill this step's processes so its thread can finish.
+            scope.cancel("interrupted")
+            raise
+        except command_runner.Cancelled as e:
+            status = CANCELLED
+            step.result["reason"] = str(e)
+        except (Exception, SystemExit) as e:
+            status = FAILED
+            step.result["reason"] = f"{type(e).__name__}: {e}"
+            print(f"Step '{step.name}' raised {type(e).__name__}: {e}")
+        finally:
+            with self.lock:
+                self.scopes.pop(step.name, None)
+        step.result["status"] = status
+        step.result["duration"] = time.monotonic() - step.result["start"]
+        if status in (FAILED, TIMED_OUT) and step.critical and self.failed_step is None:
+            self.failed_step = step.name
+            self._cancel_running(f"cancelled because step '{step.name}' {status.lower()}")
+
+    async def _wait_after_cancel(self, future):
+        # Returns False if the step's thread did not finish within CANCEL_GRACE.
+        try:
+            await asyncio.wait_for(asyncio.shield(future), CANCEL_GRACE)
+        except asyncio.TimeoutError:
+            future.cancel()  # Drops the thread's result, which would otherwise arrive on a closed loop.
+            return False
+        except (Exception, SystemExit):
+            pass
+        return True
+
+    def _cancel_running(self, reason):
+        with self.lock:
+            scopes = [scope for name, scope in self.scopes.items() if not self.steps[name].background]
+        for scope in scopes:
+            scope.cancel(reason)
+
+    def _skip(self, step, reason):
+        step.result["status"] = SKIPPED
+        step.result["reason"] = reason
+
+    async def _schedule(self, step, tasks, locks):
+        for name in step.deps + step.after:
+            await tasks[name]
+        if self.failed_step is not None:
+            return self._skip(step, f"run stopped after '{self.failed_step}' failed")
+        for name in step.deps:
+            if self.steps[name].result["status"] != SUCCEEDED:
+                return self._skip(step, f"needs '{name}', which {self.steps[name].result['status'].lower()}")
+        for resource in step.resources:
+            await locks[resource].acquire()
+        try:
+            if self.failed_step is not None:
+                return self._skip(step, f"run stopped after '{self.failed_step}' failed")
+            await self._execute(step)
+        finally:
+            for resource in step.resources:
+                locks[resource].release()
+
+    async def _run(self):
+        self.loop = asyncio.get_running_loop()
+        locks = {resource: asyncio.Lock() for step in self.steps.values() for resource in step.resources}
+        tasks = {}
+        for step in list(self.steps.values()):
+            tasks[step.name] = self.loop.create_task(self._schedule(step, tasks, locks))
+        await asyncio.gather(*tasks.values())
+        while self.background_tasks:
+            await asyncio.gather(*list(self.background_tasks))
+
+    def run(self):
+        # Runs the graph to completion. Returns True if no critical step failed.
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=MAX_WORKERS)
+        try:
+            asyncio.run(self._run())
+        finally:
+            # Threads still running after CANCEL_GRACE are not waited for here.
+            self.executor.shutdown(wait=False)
+            self.loop = None
+        return self.failed_step is None
+
+    def results(self):
+        return [step.result for step in self.steps.values() if step.result["status"] is not None]
+
+
+def parse_timeouts(values):
+    # "--step-timeout alpha_build=3600" values -> {"alpha_build": 3600.0}.
+    timeouts = {}
+    for value in values:
+        name, separator, seconds = value.partition("=")
+        if not separator:
+            raise ValueError(f"Expected STEP=SECONDS, got '{value}'.")
+        timeouts[name.strip()] = float(seconds)
+    return timeouts
+
+
+def print_step_report(graph):
+    print("Step graph report:")
+    start = min((result["start"] for result in graph.results() if result["start"] is not None), default=0.0)
+    for result in graph.results():
+        offset = f"{result['start'] - start:>7.1f}s" if result["start"] is not None else f"{'-':>8}"
+        line = f"  {result['name']:<40} {result['status']:<10} start {offset} took {result['duration']:>7.1f}s"
+        if result["reason"]:
+            line += f"  ({result['reason']})"
+        print(line)
@@ -0,0 +1,224 @@
+import argparse
+import json
+import mmap
+import os
+import re
+import sys
+import time
+
+# Single-pass analyzer for Unity editor logs (<project>/Logs/unity_*.log / *_log.txt). Real editor logs run to
+# hundreds of MB, so the file is memory-mapped (or, where mmap is not possible, read in large chunks) and
+# scanned once for a literal keyword alternation, which sre runs far faster than the full patterns; the
+# detailed pattern is only matched at keyword hits, and only those lines become Python objects. The result is
+# a compact JSON-serialisable summary: asset import and refresh times, script compilation and domain reload
+# times, package resolution time, the PerformAlphaTestBuild BuildReport lines (size, time and the build version)
+# and JulesBuildAutomation errors.
+#
+# Used by create_unity_project.py's run_command after every Unity step, and standalone:
+#   python scripts/unity_log_analyzer.py RubeGoldbergVR/Logs/unity_alpha_build_log.txt [--pretty]
+
+CHUNK_SIZE = 16 * 1024 * 1024
+MAX_ERRORS = 50
+SLOWEST_IMPORTS = 10
+METRICS_SUFFIX = ".metrics.json"
+
+KEYWORD_PATTERN = re.compile(rb"Start importing|Asset Pipeline Refresh|Tundra build|Finished compile|Domain Reload Profiling|Done resolving packages|Jules")
+# Matched at a KEYWORD_PATTERN hit; every alternative starts with one of the keywords.
+DETAIL_PATTERN = re.compile(
+    rb"Start importing (?P<import_asset>[^\n]+?) using Guid\([^\n]*? in (?P<import_seconds>[\d.]+) seconds"
+    rb"|Asset Pipeline Refresh[^\n]*?Total: (?P<refresh_seconds>[\d.]+) seconds"
+    rb"|Tundra build (?P<tundra_result>success|failed) \((?P<tundra_seconds>[\d.]+) seconds\)"
+    rb"|Finished compile (?P<compiled_assembly>[^\s]+)(?: in (?P<compile_seconds>[\d.]+) seconds)?"
+    rb"|Domain Reload Profiling: (?P<reload_ms>\d+)ms"
+    rb"|Done resolving packages in (?P<package_seconds>[\d.]+)s?(?: seconds)?"
+    rb"|Jules(?:BuildAutomation)?: (?P<build_platform>\w+) Alpha Test Build (?P<build_result>succeeded|failed): (?P<build_value>\d+) (?:bytes|errors)"
+    rb"(?: at [^\n]*? in (?P<build_seconds>[\d.]+) seconds)?"
+    rb"|Jules(?:BuildAutomation)?: Starting Alpha Test Build for version (?P<build_version>\d+(?:\.\d+)*)"
+    rb"|(?P<jules_line>JulesBuildAutomation: [^\n]*)\n?(?P<log_error>UnityEngine\.Debug:LogError)?"
+)
+# Messages from Debug.LogError are followed by a "UnityEngine.Debug:LogError" stack frame in the editor log.
+# Logs without stack traces (-stackTraceLogType None, the dummy editor) fall back to wording.
+ERROR_WORDING = re.compile(r"\b(?:failed|error|errors|exception|not found|could not|aborting)\b", re.I)
+NON_ERROR_WORDING = re.compile(r"\b0 errors\b|\bskipped\b", re.I)
+
+
+def new_summary(log_path):
+    return {
+        "log": log_path,
+        "size_bytes": 0,
+        "scan_seconds": 0.0,
+        "scan_method": None,
+        "asset_imports": {"count": 0, "total_seconds": 0.0, "slowest": []},
+        "asset_refresh": {"count": 0, "total_seconds": 0.0},
+        "script_compilation": {"count": 0, "total_seconds": 0.0, "failed": 0, "assemblies": []},
+        "domain_reload": {"count": 0, "total_ms": 0},
+        "package_resolution": {"count": 0, "total_seconds": 0.0},
+        "build_version": None,
+        "builds": [],
+        "errors": {"count": 0, "messages": []},
+    }
+
+
+def _add_error(summary, line):
+    errors = summary["errors"]
+    errors["count"] += 1
+    if len(errors["messages"]) < MAX_ERRORS:
+        errors["messages"].append(line)
+
+
+def _record_match(summary, match, imports):
+    if match.group("import_seconds") is not None:
+        seconds = float(match.group("import_seconds"))
+        summary["asset_imports"]["count"] += 1
+        summary["asset_imports"]["total_seconds"] += seconds
+        imports.append((seconds, match.group("import_asset")))
+    elif match.group("refresh_seconds") is not None:
+        summary["asset_refresh"]["count"] += 1
+        summary["asset_refresh"]["total_seconds"] += float(match.group("refresh_seconds"))
+    elif match.group("tundra_seconds") is not None:
+        compilation = summary["script_compilation"]
+        compilation["count"] += 1
+        compilation["total_seconds"] += float(match.group("tundra_seconds"))
+        if match.group("tundra_result") == b"failed":
+            compilation["failed"] += 1
+    elif match.group("compiled_assembly") is not None:
+        assembly = os.path.basename(match.group("compiled_assembly").decode("utf-8", "replace"))
+        if assembly not in summary["script_compilation"]["assemblies"]:
+            summary["script_compilation"]["assemblies"].append(assembly)
+        if match.group("compile_seconds") is not None:
+            summary["script_compilation"]["total_seconds"] += float(match.group("compile_seconds"))
+    elif match.group("reload_ms") is not None:
+        summary["domain_reload"]["count"] += 1
+        summary["domain_reload"]["total_ms"] += int(match.group("reload_ms"))
+    elif match.group("package_seconds") is not None:
+        summary["package_resolution"]["count"] += 1
+        summary["package_resolution"]["total_seconds"] += float(match.group("package_seconds"))
+    elif match.group("build_platform") is not None:
+        succeeded = match.group("build_result") == b"succeeded"
+        value = int(match.group("build_value"))
+        summary["builds"].append({
+            "platform": match.group("build_platform").decode("utf-8", "replace"),
+            "result": "succeeded" if succeeded else "failed",
+            "total_size": value if succeeded else None,
+            "total_errors": 0 if succeeded else value,
+            "seconds": float(match.group("build_seconds")) if match.group("build_seconds") is not None else None,
+            "version": summary["build_version"],
+        })
+        if not succeeded and match.group(0).startswith(b"JulesBuildAutomation:"):
+            _add_error(summary, match.group(0).decode("utf-8", "replace"))
+    elif match.group("build_version") is not None:
+        summary["build_version"] = match.group("build_version").decode("ascii")
+    elif match.group("jules_line") is not None:
+        line = match.group("jules_line").decode("utf-8", "replace").rstrip("\r")
+        if match.group("log_error") is not None or (ERROR_WORDING.search(line) and not NON_ERROR_WORDING.search(line)):
+            _add_error(summary, line)
+
+
+def _scan(buffer, summary, imports, end=None):
+    end = len(buffer) if end is None else end
+    position = 0
+    while True:
+        keyword = KEYWORD_PATTERN.search(buffer, position, end)
+        if keyword is None:
+            return
+        match = DETAIL_PATTERN.match(buffer, keyword.start(), end)
+        if match is None:
+            position = keyword.end()
+            continue
+        _record_match(summary, match, imports)
+        position = max(match.end(), keyword.end())
+
+
+def analyze_log(log_path):
+    # Returns the summary dict for one log file.
+    summary = new_summary(log_path)
+    imports = []
+    start = time.perf_counter()
+    with open(log_path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        summary["size_bytes"] = size
+        try:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+        except (ValueError, OSError):
+            mapped = None
+        if mapped is not None:
+            summary["scan_method"] = "mmap"
+            with mapped:
+                _scan(mapped, summary, imports)
+        else:
+            # Chunked fallback: only complete lines are scanned; the partial last line is carried over.
+            summary["scan_method"] = "chunked"
+            carry = b""
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                buffer = carry + chunk
+                cut = buffer.rfind(b"\n") + 1
+                _scan(buffer, summary, imports, cut)
+                carry = buffer[cut:]
+            if carry:
+                _scan(carry, summary, imports)
+
+    imports.sort(key=lambda item: item[0], reverse=True)
+    summary["asset_imports"]["slowest"] = [{"asset": asset.decode("utf-8", "replace"), "seconds": seconds}
+                                           for seconds, asset in imports[:SLOWEST_IMPORTS]]
+    for section in ("asset_imports", "asset_refresh", "script_compilation", "package_resolution"):
+        summary[section]["total_seconds"] = round(summary[section]["total_seconds"], 3)
+    summary["scan_seconds"] = round(time.perf_counter() - start, 4)
+    return summary
+
+
+def write_metrics(log_path, summary=None):
+    # Writes <log>.metrics.json next to the log and returns (path, summary).
+    summary = summary or analyze_log(log_path)
+    metrics_path = log_path + METRICS_SUFFIX
+    with open(metrics_path, "w") as f:
+        json.dump(summary, f, separators=(",", ":"))
+    return metrics_path, summary
+
+
+def format_brief(summary):
+    # One-line digest for the orchestrator's console output.
+    parts = [f"{summary['size_bytes'] / (1024 * 1024):.1f} MiB scanned in {summary['scan_seconds']:.3f}s"]
+    if summary["asset_imports"]["count"]:
+        parts.append(f"{summary['asset_imports']['count']} imports {summary['asset_imports']['total_seconds']:.1f}s")
+    if summary["script_compilation"]["count"] or summary["script_compilation"]["total_seconds"]:
+        parts.append(f"compile {summary['script_compilation']['total_seconds']:.1f}s")
+    if summary["package_resolution"]["count"]:
+        parts.append(f"packages {summary['package_resolution']['total_seconds']:.1f}s")
+    for build in summary["builds"]:
+        if build["result"] == "succeeded":
+            parts.append(f"{build['platform']} {build['total_size']} bytes")
+        else:
+            parts.append(f"{build['platform']} FAILED ({build['total_errors']} errors)")
+    if summary["errors"]["count"]:
+        parts.append(f"{summary['errors']['count']} JulesBuildAutomation error(s)")
+    return ", ".join(parts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarise Unity editor logs as JSON build metrics.")
+    parser.add_argument("logs", nargs="+", help="Unity log files to analyze.")
+    parser.add_argument("--output", type=str, default=None, help="Write the JSON here instead of stdout.")
+    parser.add_argument("--write-metrics", action="store_true", help="Also write <log>.metrics.json next to each log.")
+    parser.add_argument("--pretty", action="store_true", help="Indent the JSON output.")
+    args = parser.parse_args()
+
+    summaries = []
+    for log_path in args.logs:
+        if not os.path.isfile(log_path):
+            print(f"Error: log file not found: {log_path}", file=sys.stderr)
+            sys.exit(1)
+        summary = analyze_log(log_path)
+        if args.write_metrics:
+            write_metrics(log_path, summary)
+        summaries.append(summary)
+    result = summaries[0] if len(summaries) == 1 else summaries
+    text = json.dumps(result, indent=2 if args.pretty else None, separators=None if args.pretty else (",", ":"))
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
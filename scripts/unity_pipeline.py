@@ -0,0 +1,102 @@
+import os
+import re
+
+# Helpers for the single-editor pipeline mode of create_unity_project.py (--pipeline-mode).
+# Instead of paying Unity's startup cost (project load, script compilation, domain reload) once per
+# -executeMethod step, the orchestrator passes the ordered step list to JulesBuildAutomation.RunPipeline
+# and afterwards splits the single Unity log back into one section and one status per step.
+
+PIPELINE_ENTRY_METHOD = "JulesBuildAutomation.RunPipeline"
+
+STEP_BEGIN_PATTERN = re.compile(r"PIPELINE_STEP_BEGIN (\w+)")
+STEP_END_PATTERN = re.compile(r"PIPELINE_STEP_END (\w+) (SUCCEEDED|FAILED) exitCode=(-?\d+)(?: elapsedMs=(\d+))?")
+STEP_SKIPPED_PATTERN = re.compile(r"PIPELINE_STEP_SKIPPED (\w+)")
+
+
+def format_pipeline_steps(steps):
+    # steps is an ordered list of (step_name, optional) tuples. Optional steps get a trailing '?',
+    # which tells RunPipeline to carry on with the remaining steps if they fail.
+    return ",".join(name + ("?" if optional else "") for name, optional in steps)
+
+
+def build_pipeline_command(unity_editor_path, project_path, steps, log_file_path):
+    # No -quit here: RunPipeline calls EditorApplication.Exit itself once the last step has completed,
+    # and -quit would close the editor before asynchronous steps such as SetupVRProject finish.
+    return [
+        unity_editor_path,
+        "-batchmode",
+        "-projectPath", project_path,
+        "-executeMethod", PIPELINE_ENTRY_METHOD,
+        "-pipelineSteps", format_pipeline_steps(steps),
+        "-logFile", log_file_path,
+    ]
+
+
+def parse_pipeline_log(log_file_path, steps):
+    # Returns one result dict per requested step, in order. Steps that never logged a BEGIN marker
+    # (e.g. because the editor crashed) are reported as NOT_RUN.
+    results = {}
+    for name, optional in steps:
+        results[name] = {"name": name, "optional": optional, "status": "NOT_RUN",
+                         "exit_code": None, "elapsed_ms": None, "lines": []}
+    if not os.path.exists(log_file_path):
+        return [results[name] for name, _ in steps]
+
+    current = None
+    with open(log_file_path, "r", errors="replace") as f:
+        for line in f:
+            begin = STEP_BEGIN_PATTERN.search(line)
+            if begin and begin.group(1) in results:
+                current = results[begin.group(1)]
+                current["status"] = "RUNNING"
+                current["lines"].append(line)
+                continue
+            end = STEP_END_PATTERN.search(line)
+            if end and end.group(1) in results:
+                result = results[end.group(1)]
+                result["status"] = end.group(2)
+                result["exit_code"] = int(end.group(3))
+                if end.group(4) is not None:
+                    result["elapsed_ms"] = int(end.group(4))
+                result["lines"].append(line)
+                current = None
+                continue
+            skipped = STEP_SKIPPED_PATTERN.search(line)
+            if skipped and skipped.group(1) in results:
+                results[skipped.group(1)]["status"] = "SKIPPED"
+                continue
+            if current is not None:
+                current["lines"].append(line)
+
+    # A step that began but never ended means the editor died (or hung) inside it.
+    for result in results.values():
+        if result["status"] == "RUNNING":
+            result["status"] = "FAILED"
+    return [results[name] for name, _ in steps]
+
+
+def write_step_logs(results, log_dir):
+    # Writes each step's section of the combined Unity log to Logs/unity_pipeline_<Step>.log,
+    # so that per-step logs look the same as when every step had its own editor launch.
+    os.makedirs(log_dir, exist_ok=True)
+    paths = {}
+    for result in results:
+        step_log_path = os.path.join(log_dir, f"unity_pipeline_{result['name']}.log")
+        with open(step_log_path, "w") as f:
+            f.writelines(result["lines"])
+        paths[result["name"]] = step_log_path
+    return paths
+
+
+def pipeline_succeeded(results):
+    return all(result["status"] == "SUCCEEDED" or result["optional"] for result in results)
+
+
+def print_pipeline_report(results, step_log_paths=None):
+    print("Pipeline step results:")
+    for result in results:
+        elapsed = f"{result['elapsed_ms']} ms" if result["elapsed_ms"] is not None else "-"
+        optional = " (optional)" if result["optional"] else ""
+        print(f"  {result['name']:<28} {result['status']:<10} {elapsed:>10}{optional}")
+        if step_log_paths and result["name"] in step_log_paths:
+            print(f"    log: {step_log_paths[result['name']]}")
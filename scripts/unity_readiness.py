@@ -0,0 +1,176 @@
+import ctypes
+import ctypes.util
+import glob
+import os
+import select
+import sys
+import time
+
+# Readiness detection for create_unity_project.py. Replaces the fixed time.sleep() after deploying
+# JulesBuildAutomation.cs with a wait that returns as soon as the deployed script is usable:
+# - If no editor holds the project open (no Temp/UnityLockfile), there is nothing to wait for: the next
+#   batchmode launch compiles the script itself during startup.
+# - Otherwise an open editor has to recompile. We consider the script ready once the editor assembly in
+#   Library/ScriptAssemblies is newer than the deployed script and no compilation marker files remain, or
+#   once the editor log reports a finished domain reload.
+# Changes are watched with inotify on Linux; elsewhere (or if inotify is unavailable) we poll with backoff.
+
+LOCK_FILE = os.path.join("Temp", "UnityLockfile")
+EDITOR_ASSEMBLY = os.path.join("Library", "ScriptAssemblies", "Assembly-CSharp-Editor.dll")
+COMPILATION_MARKER_GLOBS = (os.path.join("Temp", "UnityTempFile-*"),)
+LOG_READY_MARKERS = ("Reloading assemblies after", "Domain Reload Profiling", "Finished compile Library/ScriptAssemblies/Assembly-CSharp-Editor.dll")
+LOG_ERROR_MARKERS = ("Scripts have compiler errors", ": error CS")
+
+DEFAULT_TIMEOUT = 60.0
+INITIAL_POLL_INTERVAL = 0.05
+MAX_POLL_INTERVAL = 1.0
+
+# inotify(7) constants
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+WATCH_MASK = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+
+def default_editor_log_path():
+    # Where an interactive editor writes its log when it was not started with -logFile.
+    if sys.platform.startswith("win"):
+        return os.path.join(os.environ.get("LOCALAPPDATA", ""), "Unity", "Editor", "Editor.log")
+    if sys.platform == "darwin":
+        return os.path.expanduser("~/Library/Logs/Unity/Editor.log")
+    return os.path.expanduser("~/.config/unity3d/Editor.log")
+
+
+def _open_inotify(directories):
+    # Returns an inotify file descriptor watching the given directories, or None if inotify cannot be used.
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+    except (OSError, AttributeError):
+        return None
+    if fd < 0:
+        return None
+    watched = 0
+    for directory in directories:
+        if os.path.isdir(directory) and libc.inotify_add_watch(fd, os.fsencode(directory), WATCH_MASK) >= 0:
+            watched += 1
+    if watched == 0:
+        os.close(fd)
+        return None
+    return fd
+
+
+def _drain_inotify(fd):
+    try:
+        while os.read(fd, 65536):
+            pass
+    except BlockingIOError:
+        pass
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+class _LogWatcher:
+    # Reads only the part of the editor log written since the wait started.
+    def __init__(self, log_path):
+        self.log_path = log_path
+        self.offset = os.path.getsize(log_path) if log_path and os.path.exists(log_path) else 0
+        self.pending = ""
+
+    def new_lines(self):
+        if not self.log_path or not os.path.exists(self.log_path):
+            return []
+        size = os.path.getsize(self.log_path)
+        if size < self.offset:
+            self.offset = 0  # Log was truncated (editor restarted); read it from the start.
+        if size == self.offset:
+            return []
+        with open(self.log_path, "r", errors="replace") as f:
+            f.seek(self.offset)
+            data = self.pending + f.read()
+            self.offset = f.tell()
+        lines = data.split("\n")
+        self.pending = lines.pop()
+        return lines
+
+
+def check_script_ready(project_path, deployed_script_path, log_watcher=None):
+    # Returns (ready, reason, compile_error) for the current project state.
+    if not os.path.exists(os.path.join(project_path, LOCK_FILE)):
+        return True, "no running editor holds the project; the next launch compiles on startup", False
+
+    if log_watcher is not None:
+        for line in log_watcher.new_lines():
+            if any(marker in line for marker in LOG_ERROR_MARKERS):
+                return True, f"editor log reports compile errors: {line.strip()}", True
+            if any(marker in line for marker in LOG_READY_MARKERS):
+                return True, f"editor log reports: {line.strip()}", False
+
+    compiling = any(glob.glob(os.path.join(project_path, pattern)) for pattern in COMPILATION_MARKER_GLOBS)
+    script_mtime = _mtime(deployed_script_path)
+    assembly_mtime = _mtime(os.path.join(project_path, EDITOR_ASSEMBLY))
+    if not compiling and script_mtime is not None and assembly_mtime is not None and assembly_mtime >= script_mtime:
+        return True, "editor assembly is newer than the deployed script", False
+    return False, "waiting for the open editor to recompile", False
+
+
+def wait_for_script_ready(project_path, deployed_script_path, unity_log_path=None, timeout=DEFAULT_TIMEOUT):
+    # Blocks until the deployed script is ready or the timeout expires. Returns a dict describing the wait.
+    start = time.monotonic()
+    deadline = start + timeout
+    log_watcher = _LogWatcher(unity_log_path or default_editor_log_path())
+    watch_dirs = [os.path.join(project_path, "Temp"), os.path.join(project_path, "Library"),
+                  os.path.dirname(os.path.join(project_path, EDITOR_ASSEMBLY))]
+    if log_watcher.log_path:
+        watch_dirs.append(os.path.dirname(log_watcher.log_path))
+    inotify_fd = None
+    poll_interval = INITIAL_POLL_INTERVAL
+    checks = 0
+    try:
+        while True:
+            checks += 1
+            ready, reason, compile_error = check_script_ready(project_path, deployed_script_path, log_watcher)
+            remaining = deadline - time.monotonic()
+            if ready or remaining <= 0:
+                break
+            if inotify_fd is None and checks == 1:
+                inotify_fd = _open_inotify(watch_dirs)
+            if inotify_fd is not None:
+                # Directories created after the watch was set up are still picked up by the periodic re-check.
+                readable, _, _ = select.select([inotify_fd], [], [], min(remaining, MAX_POLL_INTERVAL))
+                if readable:
+                    _drain_inotify(inotify_fd)
+            else:
+                time.sleep(min(poll_interval, remaining))
+                poll_interval = min(poll_interval * 2, MAX_POLL_INTERVAL)
+    finally:
+        if inotify_fd is not None:
+            os.close(inotify_fd)
+    return {
+        "ready": ready,
+        "timed_out": not ready,
+        "compile_error": compile_error,
+        "reason": reason if ready else f"timed out after {timeout:.1f}s ({reason})",
+        "elapsed": time.monotonic() - start,
+        "checks": checks,
+        "method": "inotify" if inotify_fd is not None else ("poll" if checks > 1 else "immediate"),
+    }
+
+
+def print_wait_report(result):
+    status = "ready" if result["ready"] else "NOT ready"
+    print(f"Script readiness: {status} after {result['elapsed']:.3f}s via {result['method']} ({result['checks']} checks): {result['reason']}")
+    if result["compile_error"]:
+        print("Warning: Unity reported compile errors for the deployed script; the next Unity step is likely to fail.")
+    elif result["timed_out"]:
+        print("Warning: Unity did not finish recompiling in time; continuing, the next batchmode launch will compile on startup.")
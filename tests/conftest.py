@@ -0,0 +1,6 @@
+import os
+import sys
+
+# The pipeline modules are imported as top-level modules, the way create_unity_project.py imports them.
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(REPO_ROOT, "scripts"))
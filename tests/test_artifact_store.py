@@ -0,0 +1,39 @@
+import os
+
+import artifact_store
+
+
+def _write_build(path, files, size):
+    os.makedirs(path)
+    data = os.urandom(size)
+    for i in range(files):
+        with open(os.path.join(path, f"file{i:03d}.bin"), "wb") as f:
+            f.write(data)
+
+
+def test_ingest_identical_files_concurrently(tmp_path):
+    # Every HASH_WORKERS thread stores the same chunks at the same time.
+    source = str(tmp_path / "build")
+    store = str(tmp_path / "store")
+    _write_build(source, 64, 3 * 1024 * 1024)
+    stats = artifact_store.ingest(store, source, "Project/Windows", "0.1.0")
+    assert stats["files"] == 64
+    assert stats["new_chunks"] == 1
+    assert stats["new_bytes"] == 3 * 1024 * 1024
+    chunks_root = os.path.join(store, "chunks")
+    stored = [name for root, _, files in os.walk(chunks_root) for name in files]
+    assert len(stored) == 1 and not stored[0].endswith(".tmp")
+
+
+def test_ingest_then_materialize_round_trip(tmp_path):
+    source = str(tmp_path / "build")
+    store = str(tmp_path / "store")
+    _write_build(source, 3, artifact_store.CHUNK_SIZE + 1000)
+    artifact_store.ingest(store, source, "Project/Android", "0.1.1")
+    second = artifact_store.ingest(store, source, "Project/Android", "0.1.2")
+    assert second["new_chunks"] == 0
+    dest = str(tmp_path / "out")
+    artifact_store.materialize(store, "Project/Android", "0.1.2", dest)
+    for name in sorted(os.listdir(source)):
+        with open(os.path.join(source, name), "rb") as a, open(os.path.join(dest, name), "rb") as b:
+            assert a.read() == b.read()
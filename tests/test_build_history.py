@@ -0,0 +1,72 @@
+import pytest
+
+import build_history
+
+ALL_FLAGS_ON = {column: 1 for column in build_history.FLAG_COLUMNS.values()}
+
+
+def _record(version, size, errors=0, seconds=100.0, platform="Android", **flags):
+    return {"version": version, "platform": platform, "result": "succeeded", "size_bytes": size, "build_seconds": seconds,
+            "step_seconds": None, "build_errors": 0, "log_errors": errors, "errors": errors, **dict(ALL_FLAGS_ON, **flags)}
+
+
+def _record_one(path, record):
+    return build_history.record_builds(path, "Project", [record])[0]
+
+
+def test_parse_budgets():
+    growth, absolute, seconds = build_history.parse_budgets(["Android:size:+5%", "*:size:300MB", "Windows:seconds:900"])
+    assert growth["growth_percent"] == 5.0 and "limit" not in growth
+    assert absolute["limit"] == 300 * 1024 ** 2
+    assert seconds["limit"] == 900.0
+    for bad in ("Android:size", "Android:colour:+5%", "Android:seconds:10MB", "Android:size:-5%"):
+        with pytest.raises(ValueError):
+            build_history.parse_budgets([bad])
+
+
+def test_growth_budget_compares_with_previous_version(tmp_path):
+    path = str(tmp_path / "history.sqlite")
+    budgets = build_history.parse_budgets(["Android:size:+5%"])
+    _record_one(path, _record("0.1.0", 1000))
+    within = _record_one(path, _record("0.1.1", 1040))
+    assert within["previous"]["version"] == "0.1.0"
+    assert build_history.check_budgets([within], budgets) == []
+    over = _record_one(path, _record("0.1.2", 1100))
+    assert over["previous"]["version"] == "0.1.1"
+    violations = build_history.check_budgets([over], budgets)
+    assert len(violations) == 1 and "+5.8%" in violations[0] and "1040 -> 1100" in violations[0]
+    # Another platform's budget does not apply.
+    assert build_history.check_budgets([over], build_history.parse_budgets(["Windows:size:+5%"])) == []
+
+
+def test_absolute_budget(tmp_path):
+    record = _record_one(str(tmp_path / "history.sqlite"), _record("0.1.0", 80000000, seconds=950.0))
+    violations = build_history.check_budgets([record], build_history.parse_budgets(["*:size:64MB", "*:seconds:900", "*:errors:0"]))
+    assert len(violations) == 2
+    assert "is 80000000, over the limit of 67108864" in violations[0]
+    assert "seconds is 950" in violations[1]
+
+
+def test_error_growth_from_zero_baseline(tmp_path):
+    path = str(tmp_path / "history.sqlite")
+    budgets = build_history.parse_budgets(["*:errors:+0%"])
+    _record_one(path, _record("0.1.0", 1000, errors=0))
+    unchanged = _record_one(path, _record("0.1.1", 1000, errors=0))
+    assert build_history.check_budgets([unchanged], budgets) == []
+    regressed = _record_one(path, _record("0.1.2", 1000, errors=3))
+    violations = build_history.check_budgets([regressed], budgets)
+    assert len(violations) == 1 and "went up from zero" in violations[0]
+
+
+def test_baseline_has_same_flags(tmp_path):
+    path = str(tmp_path / "history.sqlite")
+    _record_one(path, _record("0.1.0", 1000))
+    # Turning texture optimization off makes the build bigger; it must not be compared with the optimized one.
+    unoptimized = _record_one(path, _record("0.1.1", 5000, texture_optimization=0))
+    assert unoptimized["previous"] is None
+    optimized = _record_one(path, _record("0.1.2", 1010))
+    assert optimized["previous"]["version"] == "0.1.0"
+    assert _record_one(path, _record("0.1.3", 5100, texture_optimization=0))["previous"]["version"] == "0.1.1"
+    # Rebuilding the same version is not its own baseline, and a failed build is never one.
+    _record_one(path, dict(_record("0.1.4", None), result="failed"))
+    assert _record_one(path, _record("0.1.4", 1020))["previous"]["version"] == "0.1.2"
@@ -0,0 +1,92 @@
+import glob
+import os
+import shutil
+import subprocess
+import sys
+import time
+
+import pytest
+
+# Starts build_service.py serve on a Unix socket in a copy of the repository, with dummy_unity.sh as the
+# editor its workers run, and talks to it with the service's own client.
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+import build_service  # noqa: E402
+
+JOB_TIMEOUT = 300
+
+pytestmark = pytest.mark.skipif(not hasattr(os, "fork") or shutil.which("bash") is None, reason="needs fork, Unix sockets and bash")
+
+
+@pytest.fixture
+def service(tmp_path):
+    root = tmp_path / "repo"
+    root.mkdir()
+    shutil.copytree(os.path.join(REPO_ROOT, "scripts"), root / "scripts", ignore=shutil.ignore_patterns("__pycache__"))
+    shutil.copytree(os.path.join(REPO_ROOT, "templates"), root / "templates")
+    for path in glob.glob(os.path.join(REPO_ROOT, "*.py")) + [os.path.join(REPO_ROOT, "dummy_unity.sh")]:
+        shutil.copy2(path, root)
+    socket_path = str(tmp_path / "service.sock")
+    process = subprocess.Popen([sys.executable, "build_service.py", "--socket", socket_path, "serve", "--workers", "2", "--root", "svc",
+                                "--unity-editor-path", str(root / "dummy_unity.sh")],
+                               cwd=root, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, env=dict(os.environ, DUMMY_UNITY_STARTUP_SECONDS="0"))
+    for line in process.stdout:
+        if "Listening on" in line:
+            break
+    else:
+        pytest.fail("build service did not start")
+    yield {"socket": socket_path, "root": root / "svc"}
+    process.terminate()
+    process.wait(timeout=30)
+
+
+def submit(service, *args):
+    code, job = build_service.request("POST", "/jobs", {"args": list(args)}, socket_path=service["socket"])
+    assert code == 202, job
+    return job["id"]
+
+
+def wait(service, job_id):
+    deadline = time.monotonic() + JOB_TIMEOUT
+    while time.monotonic() < deadline:
+        _, job = build_service.request("GET", f"/jobs/{job_id}", socket_path=service["socket"])
+        if job["state"] not in ("queued", "running"):
+            _, log = build_service.request("GET", f"/jobs/{job_id}/log", socket_path=service["socket"])
+            assert job["state"] == "succeeded", log
+            return job
+        time.sleep(0.1)
+    pytest.fail(f"{job_id} did not finish")
+
+
+def test_routing_status_and_versions(service):
+    first = wait(service, submit(service))
+    assert first["match"] == "cold"
+    second = wait(service, submit(service))
+    # Same project, same script: routed to the worker that already has it set up.
+    assert second["match"] == "exact" and second["worker"] == first["worker"]
+
+    # Submitted together, but each --alpha-build job builds from the version the previous one synced.
+    alpha_ids = [submit(service, "--alpha-build"), submit(service, "--alpha-build")]
+    alpha_jobs = [wait(service, job_id) for job_id in alpha_ids]
+    assert [job["build_version"] for job in alpha_jobs] == ["0.1.0", "0.1.1"]
+    with open(service["root"] / "build_version.txt") as f:
+        assert f.read().strip() == "0.1.2"
+    for job in alpha_jobs:
+        worker_dir = service["root"] / job["worker"]
+        assert glob.glob(str(worker_dir / "RubeGoldbergVR" / "Builds" / "AlphaTest" / "*" / f"RubeGoldbergVR_v{job['build_version']}"))
+
+    code, status = build_service.request("GET", "/status", socket_path=service["socket"])
+    assert code == 200
+    assert status["queue_depth"] == 0
+    assert status["jobs"] == {"succeeded": 4}
+    assert status["latency"]["run_seconds"]["count"] == 4
+    assert status["latency"]["queue_seconds"]["p95"] is not None
+    assert status["matches"]["exact"] >= 2
+    assert sum(worker["jobs_run"] for worker in status["workers"]) == 4
+
+
+def test_invalid_job_is_rejected(service):
+    code, body = build_service.request("POST", "/jobs", {"args": ["--no-such-flag"]}, socket_path=service["socket"])
+    assert code == 400 and "unknown job flags" in body["error"]
@@ -0,0 +1,102 @@
+import filecmp
+import os
+import random
+
+import delta_distribution
+
+BLOCK = delta_distribution.DELTA_BLOCK_SIZE
+
+
+def _random_bytes(size, seed):
+    return random.Random(seed).randbytes(size)
+
+
+def _write_build(root, version, files):
+    build_dir = root / "Builds" / f"RubeGoldbergVR_v{version}"
+    for rel_path, data in files.items():
+        (build_dir / rel_path).parent.mkdir(parents=True, exist_ok=True)
+        (build_dir / rel_path).write_bytes(data)
+    return str(build_dir)
+
+
+def _assert_same_tree(left, right):
+    comparison = filecmp.dircmp(left, right)
+    assert not comparison.left_only and not comparison.right_only and not comparison.funny_files
+    for name in comparison.common_files:
+        with open(os.path.join(left, name), "rb") as a, open(os.path.join(right, name), "rb") as b:
+            assert a.read() == b.read(), name
+    for name in comparison.common_dirs:
+        _assert_same_tree(os.path.join(left, name), os.path.join(right, name))
+
+
+def _edited(data):
+    # An insertion, a deletion and an in-place change, so later blocks are shifted by odd amounts.
+    data = data[:300000] + b"inserted" * 13 + data[300000:]
+    data = data[:1000000] + data[1000000 + 50000:]
+    return data[:1500000] + b"\xff" * 10 + data[1500010:]
+
+
+def _apply(ops, base, new):
+    sources = {"base": base, "new": new}
+    return b"".join(sources[source][offset:offset + length] for source, offset, length in ops)
+
+
+def test_compute_delta_round_trip(tmp_path):
+    base = _random_bytes(2 * 1024 * 1024, 1)
+    new = _edited(base)
+    (tmp_path / "base").write_bytes(base)
+    _, signature = delta_distribution._fingerprint(str(tmp_path / "base"), len(base))
+    ops = delta_distribution.compute_delta(new, len(new), signature, len(base))
+    assert _apply(ops, base, new) == new
+    literal = sum(length for source, _, length in ops if source == "new")
+    # Each edit costs at most a couple of blocks.
+    assert literal <= 6 * BLOCK
+
+
+def test_distribute_new_version_from_previous(tmp_path):
+    data = _random_bytes(2 * 1024 * 1024, 2)
+    same = _random_bytes(3 * BLOCK, 3)
+    platform_dir = str(tmp_path / "Distribution" / "AlphaTest" / "Windows")
+    first = delta_distribution.distribute_build(
+        _write_build(tmp_path, "0.1.0", {"RubeGoldbergVR_Data/level0": data, "RubeGoldbergVR_Data/shared": same, "removed.txt": b"old"}), platform_dir)
+    assert first["base"] is None and first["copied"] == 3 and first["bytes_transferred"] == first["bytes_total"]
+
+    build_dir = _write_build(tmp_path, "0.1.1", {"RubeGoldbergVR_Data/level0": _edited(data), "RubeGoldbergVR_Data/shared": same,
+                                                  "RubeGoldbergVR.exe": b"new player", "empty.txt": b""})
+    second = delta_distribution.distribute_build(build_dir, platform_dir, workers=2)
+    assert second["base"] == "RubeGoldbergVR_v0.1.0"
+    assert (second["unchanged"], second["delta"], second["copied"]) == (1, 1, 2)
+    assert second["bytes_transferred"] < 8 * BLOCK < second["bytes_total"]
+    assert second["dest"] == os.path.join(platform_dir, "RubeGoldbergVR_v0.1.1")
+    _assert_same_tree(build_dir, second["dest"])
+    # The unchanged file shares its data with the previous version.
+    assert os.path.samefile(os.path.join(second["dest"], "RubeGoldbergVR_Data", "shared"),
+                            os.path.join(first["dest"], "RubeGoldbergVR_Data", "shared"))
+    assert os.path.isfile(second["dest"] + delta_distribution.MANIFEST_SUFFIX)
+    # The previous version is left as it was.
+    assert open(os.path.join(first["dest"], "RubeGoldbergVR_Data", "level0"), "rb").read() == data
+
+
+def test_redistribute_same_version(tmp_path):
+    platform_dir = str(tmp_path / "Distribution")
+    data = _random_bytes(BLOCK * 4, 4)
+    build_dir = _write_build(tmp_path, "0.1.0", {"level0": data, "player": b"player"})
+    delta_distribution.distribute_build(build_dir, platform_dir)
+    again = delta_distribution.distribute_build(build_dir, platform_dir)
+    assert again["base"] == "RubeGoldbergVR_v0.1.0"
+    assert again["unchanged"] == 2 and again["bytes_transferred"] == 0
+    _assert_same_tree(build_dir, again["dest"])
+    assert not os.path.exists(again["dest"] + ".partial")
+
+    # A rebuild of the same version is diffed against what was distributed under that name.
+    _write_build(tmp_path, "0.1.0", {"level0": data[:BLOCK] + b"patch" + data[BLOCK:]})
+    rebuilt = delta_distribution.distribute_build(build_dir, platform_dir)
+    assert (rebuilt["unchanged"], rebuilt["delta"]) == (1, 1)
+    _assert_same_tree(build_dir, rebuilt["dest"])
+
+
+def test_find_base_version_ignores_other_folders(tmp_path):
+    platform_dir = tmp_path / "Windows"
+    (platform_dir / "notes").mkdir(parents=True)
+    (platform_dir / "RubeGoldbergVR_v0.1.0").mkdir()  # No manifest: a folder copied by hand.
+    assert delta_distribution.find_base_version(str(platform_dir), "RubeGoldbergVR_v0.1.1") is None
@@ -0,0 +1,192 @@
+import glob
+import json
+import os
+import shutil
+import subprocess
+import sys
+import xml.etree.ElementTree as ElementTree
+
+import pytest
+
+# Drives main_script.py and the generated scripts/create_unity_project.py against dummy_unity.sh in a copy
+# of the repository, the way a developer runs the pipeline locally.
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROJECT_NAME = "RubeGoldbergVR"
+RUN_TIMEOUT = 300
+ALPHA_ARGS = ("--run-alpha-build", "--increment-version-after-build", "--sync-version-file", "build_version.txt")
+
+pytestmark = pytest.mark.skipif(shutil.which("bash") is None, reason="dummy_unity.sh needs bash")
+
+
+@pytest.fixture
+def workspace(tmp_path):
+    root = tmp_path / "repo"
+    root.mkdir()
+    ignore = shutil.ignore_patterns("__pycache__")
+    for name in ("scripts", "templates"):
+        shutil.copytree(os.path.join(REPO_ROOT, name), root / name, ignore=ignore)
+    for path in glob.glob(os.path.join(REPO_ROOT, "*.py")) + [os.path.join(REPO_ROOT, "dummy_unity.sh")]:
+        shutil.copy2(path, root)
+    return root
+
+
+def _run(workspace, args, env=None):
+    result = subprocess.run([sys.executable] + list(args), cwd=workspace, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
+                            timeout=RUN_TIMEOUT, env=dict(os.environ, DUMMY_UNITY_STARTUP_SECONDS="0", **(env or {})))
+    return result.returncode, result.stdout
+
+
+def generate(workspace):
+    # JulesBuildAutomation.cs and create_unity_project.py, with the version in build_version.txt.
+    returncode, output = _run(workspace, ["main_script.py", "--alpha-build"])
+    assert returncode == 0 and "Generated files changed" in output, output
+
+
+def run_pipeline(workspace, *args, env=None):
+    returncode, output = _run(workspace, ["scripts/create_unity_project.py", "--project-name", PROJECT_NAME, "--unity-editor-path", "./dummy_unity.sh",
+                                          *ALPHA_ARGS, *args], env=env)
+    assert returncode == 0, output
+    return output
+
+
+def step_statuses(output):
+    # {step: status} from the step graph report.
+    report = output.split("Step graph report:\n", 1)[1]
+    statuses = {}
+    for line in report.splitlines():
+        if not line.startswith("  "):
+            break
+        name, status = line.split()[:2]
+        statuses[name] = status
+    return statuses
+
+
+def cache_report(output):
+    report = output.split("Step cache report:\n", 1)[1]
+    return {line.split()[0]: line.split()[1] for line in report.splitlines()[:2]}
+
+
+def build_dirs(workspace, version):
+    return sorted(glob.glob(str(workspace / PROJECT_NAME / "Builds" / "AlphaTest" / "*" / f"{PROJECT_NAME}_v{version}")))
+
+
+def test_cold_run_builds_every_platform(workspace):
+    generate(workspace)
+    output = run_pipeline(workspace)
+    statuses = step_statuses(output)
+    for step in ("create_project", "deploy_script", "setup_vr_project", "alpha_build", "register_artifacts", "increment_version"):
+        assert statuses[step] == "SUCCEEDED", output
+    assert cache_report(output) == {"DeployScript": "MISS", "SetupVRProject": "MISS"}
+    assert len(build_dirs(workspace, "0.1.0")) == 2
+    with open(workspace / "build_version.txt") as f:
+        assert f.read().strip() == "0.1.1"
+
+
+def test_rerun_hits_step_cache(workspace):
+    generate(workspace)
+    run_pipeline(workspace)
+    output = run_pipeline(workspace)
+    assert cache_report(output) == {"DeployScript": "HIT", "SetupVRProject": "HIT"}, output
+    assert step_statuses(output)["setup_vr_project"] == "SUCCEEDED"
+
+
+def test_rerun_after_version_bump_hits_setup_cache(workspace):
+    generate(workspace)
+    run_pipeline(workspace)
+    generate(workspace)
+    output = run_pipeline(workspace)
+    # The new buildVersion has to be deployed, but it does not change what SetupVRProject produces.
+    assert cache_report(output) == {"DeployScript": "MISS", "SetupVRProject": "HIT"}, output
+    assert len(build_dirs(workspace, "0.1.1")) == 2
+
+
+def test_pipeline_mode_runs_all_steps_in_one_launch(workspace):
+    generate(workspace)
+    output = run_pipeline(workspace, "--pipeline-mode")
+    assert step_statuses(output)["pipeline"] == "SUCCEEDED", output
+    assert "in a single Unity launch (pipeline mode)" in output
+    assert len(build_dirs(workspace, "0.1.0")) == 2
+    generate(workspace)
+    output = run_pipeline(workspace, "--pipeline-mode")
+    assert cache_report(output)["SetupVRProject"] == "HIT", output
+    assert len(build_dirs(workspace, "0.1.1")) == 2
+
+
+def test_build_with_duplicate_files_is_registered(workspace):
+    generate(workspace)
+    output = run_pipeline(workspace, env={"DUMMY_UNITY_BUILD_DATA_FILES": "32"})
+    assert step_statuses(output)["register_artifacts"] == "SUCCEEDED", output
+    store = workspace / f"{PROJECT_NAME}_ArtifactStore"
+    for platform in ("Android", "Windows"):
+        with open(store / "manifests" / PROJECT_NAME / platform / "0.1.0.json") as f:
+            manifest = json.load(f)
+        data_files = [entry for entry in manifest["files"] if entry["path"].startswith(f"{PROJECT_NAME}_Data/")]
+        assert len(data_files) == 32
+        assert len({chunk for entry in data_files for chunk in entry["chunks"]}) == 1
+
+
+def test_force_step_bypasses_cache(workspace):
+    generate(workspace)
+    run_pipeline(workspace)
+    output = run_pipeline(workspace, "--force-step", "SetupVRProject")
+    assert cache_report(output) == {"DeployScript": "HIT", "SetupVRProject": "MISS"}, output
+    assert "forced" in output.split("Step cache report:\n", 1)[1].splitlines()[1]
+    assert cache_report(run_pipeline(workspace, "--force")) == {"DeployScript": "MISS", "SetupVRProject": "MISS"}
+
+
+def test_step_timeout_fails_run(workspace):
+    generate(workspace)
+    returncode, output = _run(workspace, ["scripts/create_unity_project.py", "--project-name", PROJECT_NAME, "--unity-editor-path", "./dummy_unity.sh",
+                                          *ALPHA_ARGS, "--step-timeout", "setup_vr_project=3"],
+                              env={"DUMMY_UNITY_HANG_METHOD": "SetupVRProject", "DUMMY_UNITY_HANG_TIMES": "0"})
+    assert returncode == 1, output
+    statuses = step_statuses(output)
+    assert statuses["setup_vr_project"] == "TIMED", output  # "TIMED OUT"
+    assert statuses["alpha_build"] == "SKIPPED" and statuses["increment_version"] == "SKIPPED"
+    assert not build_dirs(workspace, "0.1.0")
+    # The version is never synced, so the next run builds 0.1.0 again.
+    assert not (workspace / "build_version.txt").exists()
+
+
+def _junit_results(workspace):
+    # {(platform, test): status} from the smoke test JUnit XML.
+    root = ElementTree.parse(workspace / PROJECT_NAME / "Logs" / "smoke_tests_junit.xml").getroot()
+    results = {}
+    for suite in root.iter("testsuite"):
+        for case in suite.iter("testcase"):
+            outcome = [child.tag for child in case if child.tag in ("failure", "error", "skipped")]
+            results[(suite.get("name").split(".", 1)[1], case.get("name"))] = outcome[0] if outcome else "passed"
+    return results
+
+
+def test_smoke_tests_with_player(workspace):
+    generate(workspace)
+    output = run_pipeline(workspace, "--run-smoke-tests", "--smoke-player", "./dummy_unity.sh", "--smoke-shards", "2")
+    assert step_statuses(output)["smoke_tests"] == "SUCCEEDED", output
+    results = _junit_results(workspace)
+    assert len(results) == 12 and set(results.values()) == {"passed"}
+
+
+def test_failing_smoke_test_stops_other_shards(workspace):
+    generate(workspace)
+    returncode, output = _run(workspace, ["scripts/create_unity_project.py", "--project-name", PROJECT_NAME, "--unity-editor-path", "./dummy_unity.sh",
+                                          *ALPHA_ARGS, "--run-smoke-tests", "--smoke-player", "./dummy_unity.sh", "--smoke-shards", "2"],
+                              env={"DUMMY_UNITY_FAIL_SMOKE_TESTS": "Android/BuildOutputExists", "DUMMY_UNITY_SMOKE_TEST_SECONDS": "1"})
+    assert returncode == 1, output
+    assert step_statuses(output)["smoke_tests"] == "FAILED", output
+    results = _junit_results(workspace)
+    assert len(results) == 12
+    assert results[("Android", "BuildOutputExists")] == "failure"
+    assert results[("Windows", "BuildOutputExists")] in ("passed", "skipped")
+    # Without earlier timings BuildOutputExists is the first case of Android-1; the other shards are stopped
+    # during their first case, so at most one case per shard runs.
+    assert list(results.values()).count("skipped") >= 6, results
+    assert "failure" not in [status for key, status in results.items() if key != ("Android", "BuildOutputExists")]
+
+    returncode, output = _run(workspace, ["scripts/create_unity_project.py", "--project-name", PROJECT_NAME, "--unity-editor-path", "./dummy_unity.sh",
+                                          *ALPHA_ARGS, "--run-smoke-tests", "--smoke-player", "./dummy_unity.sh", "--smoke-keep-going"],
+                              env={"DUMMY_UNITY_FAIL_SMOKE_TESTS": "Android/BuildOutputExists"})
+    assert returncode == 1, output
+    results = _junit_results(workspace)
+    assert list(results.values()).count("passed") == 11 and results[("Android", "BuildOutputExists")] == "failure"
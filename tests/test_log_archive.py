@@ -0,0 +1,101 @@
+import itertools
+import os
+import random
+
+import pytest
+
+import log_archive
+
+WORDS = ("shader", "compile", "texture", "import", "mesh", "lightmap", "bake", "Prefab", "XRLoader", "OpenXR", "android", "gradle",
+         "Domain", "reload", "asset", "bundle", "physics", "layer")
+ERROR_TEMPLATES = ("Error building Player: {}", "NullReferenceException in {}", "Shader compile failed for {}", "{} aborted by user")
+
+
+@pytest.fixture
+def archive_path(tmp_path, monkeypatch):
+    # Run ids have one-second resolution; every archive opened here gets its own.
+    counter = itertools.count()
+    monkeypatch.setattr(log_archive.time, "strftime", lambda fmt: f"20260101-{next(counter):06d}")
+    return str(tmp_path / "LogArchive")
+
+
+def _line(rng):
+    words = " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 8)))
+    if rng.random() < 0.05:
+        return rng.choice(ERROR_TEMPLATES).format(words)
+    return f"[{rng.randint(0, 9999):04d}] {words}"
+
+
+def _write_runs(archive_path, count, lines_per_log=400, seed=0):
+    # Returns {run id: {log name: [lines]}}.
+    rng = random.Random(seed)
+    written = {}
+    for _ in range(count):
+        archive = log_archive.RunArchive(archive_path, codec="gzip", block_bytes=2048)
+        logs = {}
+        for name in ("cmd_setup_vr_log.txt", "unity_alpha_build_log.txt"):
+            stream = archive.open_stream(name, source="stdout", step="alpha_build")
+            logs[name] = [_line(rng) for _ in range(lines_per_log)]
+            for line in logs[name]:
+                stream.write(line)
+        archive.close()
+        written[archive.run_id] = logs
+    return written
+
+
+def _brute_force(written, pattern, ignore_case=False, errors_only=False):
+    matches = []
+    for run_id, logs in written.items():
+        for name, lines in logs.items():
+            for number, text in enumerate(lines, 1):
+                if errors_only and not any(word in text.lower() for word in log_archive.ERROR_WORDS):
+                    continue
+                if (pattern.lower() in text.lower()) if ignore_case else (pattern in text):
+                    matches.append((run_id, name, number, text))
+    return matches
+
+
+def _search(archive_path, pattern, **kwargs):
+    return [(match["run"], match["log"], match["line"], match["text"]) for match in log_archive.search(archive_path, pattern, **kwargs)]
+
+
+def test_search_matches_brute_force(archive_path):
+    written = _write_runs(archive_path, 3)
+    assert [run["run"] for run in log_archive.list_runs(archive_path)] == list(written)
+    for pattern in ("shader", "Shader compile", "XRLoader OpenXR", "domain reload", "prefab", "aborted by", "[004", "NullReference", "zzz"):
+        for ignore_case in (False, True):
+            expected = _brute_force(written, pattern, ignore_case)
+            assert _search(archive_path, pattern, ignore_case=ignore_case) == expected, (pattern, ignore_case)
+            assert _search(archive_path, pattern, ignore_case=ignore_case, errors_only=True) == _brute_force(written, pattern, ignore_case, errors_only=True)
+    regex_matches = _search(archive_path, r"Error building Player: \w+ bake", regex=True)
+    assert regex_matches and all("bake" in text for *_, text in regex_matches)
+
+
+def test_search_filters_and_pruning(archive_path):
+    written = _write_runs(archive_path, 2)
+    first_run, second_run = written
+    matches = _search(archive_path, "gradle", log_pattern="unity_*", run_ids=[second_run])
+    assert matches == [match for match in _brute_force(written, "gradle") if match[0] == second_run and match[1] == "unity_alpha_build_log.txt"]
+    # A word that is in no block is answered from the bloom filters alone.
+    stats = {}
+    assert _search(archive_path, "keystore", stats=stats) == []
+    assert stats["blocks"] > 20 and stats["blocks_read"] == 0
+    stats = {}
+    _search(archive_path, "xyz", errors_only=True, stats=stats)
+    assert stats["blocks_read"] == 0
+
+
+def test_retention_by_count_keeps_current_run(archive_path):
+    runs = list(_write_runs(archive_path, 5, lines_per_log=20))
+    assert log_archive.apply_retention(archive_path, keep_runs=2, max_bytes=None, keep=(runs[0],)) == runs[1:4]
+    assert [run["run"] for run in log_archive.list_runs(archive_path)] == [runs[0], runs[4]]
+    assert sorted(os.listdir(archive_path)) == sorted(f"{run}{suffix}" for run in (runs[0], runs[4]) for suffix in (".log.gz", log_archive.INDEX_SUFFIX))
+
+
+def test_retention_by_size(archive_path):
+    runs = list(_write_runs(archive_path, 4, lines_per_log=100))
+    sizes = [log_archive._run_bytes(run) for run in log_archive.list_runs(archive_path)]
+    assert log_archive.apply_retention(archive_path, keep_runs=None, max_bytes=sum(sizes[2:])) == runs[:2]
+    # The current run stays even if it alone is over the limit.
+    assert log_archive.apply_retention(archive_path, keep_runs=None, max_bytes=1, keep=(runs[3],)) == [runs[2]]
+    assert [run["run"] for run in log_archive.list_runs(archive_path)] == [runs[3]]
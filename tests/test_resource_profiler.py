@@ -0,0 +1,38 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+import resource_profiler
+
+pytestmark = pytest.mark.skipif(not resource_profiler.available(), reason="needs /proc")
+
+BUSY_CHILD = "import time\nend = time.process_time() + 0.4\nwhile time.process_time() < end: pass"
+
+
+def test_cpu_of_short_lived_children_is_counted():
+    # Eight helpers that each start and exit between two samples; only the shell that reaps them is ever seen.
+    script = f"for i in 1 2 3 4 5 6 7 8; do '{sys.executable}' -c '{BUSY_CHILD}'; done; sleep 1.5"
+    before = os.times()
+    process = subprocess.Popen(["bash", "-c", script], start_new_session=True)
+    sampler = resource_profiler.start_sampler(process.pid, interval=1.0)
+    process.wait()
+    summary, _ = sampler.finish()
+    after = os.times()
+    used = (after.children_user - before.children_user) + (after.children_system - before.children_system)
+    assert used > 3.0
+    assert used * 0.9 <= summary["cpu_seconds"] <= used * 1.1 + 0.1
+
+
+def test_cpu_of_sampled_children_is_not_counted_twice():
+    # Children long enough to be sampled while running are reaped later; their time must not be added again.
+    script = "for i in 1 2; do timeout 1.5 bash -c 'while :; do :; done'; done; sleep 1.5"
+    before = os.times()
+    process = subprocess.Popen(["bash", "-c", script], start_new_session=True)
+    sampler = resource_profiler.start_sampler(process.pid, interval=0.2)
+    process.wait()
+    summary, _ = sampler.finish()
+    after = os.times()
+    used = (after.children_user - before.children_user) + (after.children_system - before.children_system)
+    assert used * 0.9 <= summary["cpu_seconds"] <= used * 1.1 + 0.1
@@ -0,0 +1,110 @@
+import os
+
+import step_cache
+
+CS_TEMPLATE = """public class JulesBuildAutomation
+{{
+    public static string buildVersion = "{version}";
+    public static bool enableTextureOptimization = {texture};
+    public static bool enableAudioOptimization = true;
+    private static List<string> xrPackages = new List<string> {{ {packages} }};
+}}
+"""
+PACKAGES = '"com.unity.xr.management", "com.unity.xr.openxr"'
+
+
+def _write_cs(path, version="0.1.0", texture="true", packages=PACKAGES):
+    path.write_text(CS_TEMPLATE.format(version=version, texture=texture, packages=packages))
+    return str(path)
+
+
+def _make_project(root):
+    project = root / "Project"
+    for rel_path in step_cache.SETUP_PROJECT_FILES + step_cache.STEP_OUTPUTS["SetupVRProject"]:
+        (project / rel_path).parent.mkdir(parents=True, exist_ok=True)
+        (project / rel_path).write_text(rel_path)
+    (project / "Assets" / "Editor").mkdir(parents=True)
+    (project / "Assets" / "Editor" / "JulesBuildAutomation.cs").write_text("deployed")
+    return str(project)
+
+
+def _setup_inputs(project, cs_path):
+    return step_cache.compute_step_inputs("SetupVRProject", project, cs_path, "2022.3.0f1")
+
+
+def _recorded(tmp_path):
+    project = _make_project(tmp_path)
+    cs_path = _write_cs(tmp_path / "JulesBuildAutomation.cs")
+    manifest = step_cache.load_manifest(project)
+    step_cache.record_step(manifest, "SetupVRProject", _setup_inputs(project, cs_path), project)
+    return project, cs_path, step_cache.load_manifest(project)
+
+
+def test_parse_cs_inputs(tmp_path):
+    packages, flags = step_cache.parse_cs_inputs(open(_write_cs(tmp_path / "a.cs", texture="false")).read())
+    assert packages == ["com.unity.xr.management", "com.unity.xr.openxr"]
+    assert flags == {"enableTextureOptimization": False, "enableAudioOptimization": True}
+
+
+def test_unchanged_inputs_hit(tmp_path):
+    project, cs_path, manifest = _recorded(tmp_path)
+    assert step_cache.check_step(manifest, "SetupVRProject", _setup_inputs(project, cs_path), project) == (True, "inputs unchanged")
+    assert step_cache.check_step(step_cache.load_manifest(str(tmp_path / "Other")), "SetupVRProject", {}, project) == (False, "no cache entry")
+
+
+def test_build_version_change_hits_setup_but_not_deploy(tmp_path):
+    project, cs_path, manifest = _recorded(tmp_path)
+    deploy_inputs = step_cache.compute_step_inputs("DeployScript", project, cs_path, "2022.3.0f1")
+    _write_cs(tmp_path / "JulesBuildAutomation.cs", version="0.1.1")
+    assert step_cache.check_step(manifest, "SetupVRProject", _setup_inputs(project, cs_path), project)[0]
+    assert step_cache.compute_step_inputs("DeployScript", project, cs_path, "2022.3.0f1") != deploy_inputs
+
+
+def test_changed_inputs_miss(tmp_path):
+    project, cs_path, manifest = _recorded(tmp_path)
+    cs_file = tmp_path / "JulesBuildAutomation.cs"
+    cases = [
+        ("xr_packages", lambda: _write_cs(cs_file, packages='"com.unity.xr.management"')),
+        ("optimization_flags", lambda: _write_cs(cs_file, texture="false")),
+        ("project_files", lambda: (tmp_path / "Project" / "Assets" / "Editor" / "VRSetup.cs").write_text("// new editor asset")),
+        ("project_files", lambda: (tmp_path / "Project" / "Packages" / "manifest.json").write_text("{}")),
+    ]
+    for component, change in cases:
+        _write_cs(cs_file)
+        change()
+        hit, reason = step_cache.check_step(manifest, "SetupVRProject", _setup_inputs(project, cs_path), project)
+        assert not hit and component in reason, (component, reason)
+        # Restore the recorded state for the next case.
+        _write_cs(cs_file)
+        for rel_path in step_cache.SETUP_PROJECT_FILES:
+            (tmp_path / "Project" / rel_path).write_text(rel_path)
+        if (tmp_path / "Project" / "Assets" / "Editor" / "VRSetup.cs").exists():
+            os.remove(tmp_path / "Project" / "Assets" / "Editor" / "VRSetup.cs")
+    # A different Unity version misses too.
+    inputs = step_cache.compute_step_inputs("SetupVRProject", project, cs_path, "6000.0.1f1")
+    assert step_cache.check_step(manifest, "SetupVRProject", inputs, project) == (False, "changed: unity_version")
+
+
+def test_deployed_script_is_not_a_project_file(tmp_path):
+    project, cs_path, manifest = _recorded(tmp_path)
+    (tmp_path / "Project" / "Assets" / "Editor" / "JulesBuildAutomation.cs").write_text("redeployed")
+    assert step_cache.check_step(manifest, "SetupVRProject", _setup_inputs(project, cs_path), project)[0]
+
+
+def test_missing_output_reruns(tmp_path):
+    project, cs_path, manifest = _recorded(tmp_path)
+    os.remove(os.path.join(project, step_cache.STEP_OUTPUTS["SetupVRProject"][1]))
+    hit, reason = step_cache.check_step(manifest, "SetupVRProject", _setup_inputs(project, cs_path), project)
+    assert not hit and reason.startswith("missing output: ") and "Ramp.prefab" in reason
+
+
+def test_forced_step_reruns(tmp_path):
+    project, cs_path, manifest = _recorded(tmp_path)
+    assert step_cache.check_step(manifest, "SetupVRProject", _setup_inputs(project, cs_path), project, forced=True) == (False, "forced")
+
+
+def test_manifest_of_another_version_is_ignored(tmp_path):
+    project, _, manifest = _recorded(tmp_path)
+    manifest["version"] = step_cache.MANIFEST_VERSION + 1
+    step_cache.save_manifest(project, manifest)
+    assert step_cache.load_manifest(project)["steps"] == {}
@@ -0,0 +1,151 @@
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+import command_runner
+import step_graph
+
+
+def _statuses(graph):
+    return {result["name"]: result["status"] for result in graph.results()}
+
+
+def _alive(pid):
+    # A killed process that nobody has reaped yet is a zombie; it no longer runs.
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            return f.read().rsplit(")", 1)[1].split()[0] != "Z"
+    except FileNotFoundError:
+        return False
+
+
+def test_dependency_order_and_resource_lock():
+    events = []
+    holders = []
+    lock = threading.Lock()
+
+    def action(name, seconds=0.0, resource=False):
+        def run():
+            with lock:
+                events.append(("start", name))
+                if resource:
+                    holders.append(name)
+                    assert len(holders) == 1, holders
+            time.sleep(seconds)
+            with lock:
+                if resource:
+                    holders.remove(name)
+                events.append(("end", name))
+            return True
+        return run
+
+    graph = step_graph.StepGraph()
+    graph.add("create", action("create", 0.1, resource=True), resources=("unity_project",))
+    graph.add("setup", action("setup", 0.2, resource=True), deps=("create",), resources=("unity_project",))
+    graph.add("analyze", action("analyze", 0.2), deps=("create",))
+    graph.add("build", action("build", 0.1, resource=True), deps=("create",), resources=("unity_project",))
+    graph.add("report", action("report"), after=("setup", "analyze", "build"))
+    assert graph.run()
+    assert set(_statuses(graph).values()) == {step_graph.SUCCEEDED}
+    order = [name for kind, name in events if kind == "start"]
+    assert order[0] == "create" and order[-1] == "report"
+    # analyze needs no resource, so it overlaps with the Unity steps instead of waiting behind them.
+    last_unity_end = max(events.index(("end", "setup")), events.index(("end", "build")))
+    assert events.index(("start", "analyze")) < last_unity_end
+    for name in ("setup", "analyze", "build"):
+        assert events.index(("end", "create")) < events.index(("start", name))
+
+
+def test_unknown_dependency_is_rejected():
+    graph = step_graph.StepGraph()
+    with pytest.raises(ValueError):
+        graph.add("build", lambda: True, deps=("setup",))
+    graph.add("setup", lambda: True)
+    with pytest.raises(ValueError):
+        graph.add("setup", lambda: True)
+
+
+@pytest.mark.skipif(not hasattr(os, "killpg") or not os.path.isdir("/proc"), reason="needs process groups and /proc")
+def test_timeout_kills_process_group(tmp_path):
+    pid_file = tmp_path / "child.pid"
+
+    def hang():
+        # The shell starts a grandchild of its own; killing the group has to take it down as well.
+        command_runner.run_streaming_command(["bash", "-c", f"sleep 60 & echo $! > {pid_file}; wait"])
+        command_runner.check_cancelled()
+        return True
+
+    graph = step_graph.StepGraph(timeouts={"hang": 0.5})
+    graph.add("hang", hang)
+    graph.add("after_hang", lambda: True, deps=("hang",))
+    started = time.monotonic()
+    assert not graph.run()
+    assert time.monotonic() - started < 10
+    results = {result["name"]: result for result in graph.results()}
+    assert results["hang"]["status"] == step_graph.TIMED_OUT
+    assert results["hang"]["reason"] == "timed out after 0.5s"
+    assert results["after_hang"]["status"] == step_graph.SKIPPED
+    assert not _alive(int(pid_file.read_text()))
+
+
+def test_critical_failure_cancels_dependents_but_not_background_steps():
+    background_done = threading.Event()
+    graph = step_graph.StepGraph()
+
+    def background():
+        time.sleep(0.5)
+        background_done.set()
+        return True
+
+    def slow():
+        # Cancellation is cooperative for Python code.
+        for _ in range(100):
+            command_runner.check_cancelled()
+            time.sleep(0.05)
+        return True
+
+    def start_background():
+        graph.spawn("analyze_log", background)
+        return True
+
+    def fail():
+        time.sleep(0.2)
+        return False
+
+    graph.add("create", start_background)
+    graph.add("optional", lambda: False, deps=("create",), critical=False)
+    graph.add("optional_dependent", lambda: True, deps=("optional",))
+    graph.add("slow", slow, deps=("create",))
+    graph.add("setup", fail, deps=("create",))
+    graph.add("build", lambda: True, deps=("setup",))
+    graph.add("archive", lambda: True, after=("slow",))
+    assert not graph.run()
+    statuses = _statuses(graph)
+    assert statuses["optional"] == step_graph.FAILED
+    assert statuses["optional_dependent"] == step_graph.SKIPPED
+    assert statuses["setup"] == step_graph.FAILED
+    assert statuses["build"] == step_graph.SKIPPED
+    assert statuses["slow"] == step_graph.CANCELLED
+    assert statuses["archive"] == step_graph.SKIPPED
+    assert statuses["analyze_log"] == step_graph.SUCCEEDED and background_done.is_set()
+    assert graph.failed_step == "setup"
+
+
+def test_non_critical_failure_does_not_fail_run():
+    graph = step_graph.StepGraph()
+    graph.add("optional", lambda: False, critical=False)
+    graph.add("raises", lambda: 1 / 0, critical=False)
+    graph.add("build", lambda: True)
+    assert graph.run()
+    results = {result["name"]: result for result in graph.results()}
+    assert results["raises"]["status"] == step_graph.FAILED and results["raises"]["reason"].startswith("ZeroDivisionError")
+    assert results["build"]["status"] == step_graph.SUCCEEDED
+
+
+def test_parse_timeouts():
+    assert step_graph.parse_timeouts(["alpha_build=3600", " setup_vr_project =90.5"]) == {"alpha_build": 3600.0, "setup_vr_project": 90.5}
+    with pytest.raises(ValueError):
+        step_graph.parse_timeouts(["alpha_build"])